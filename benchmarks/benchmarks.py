@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+import argparse
+import datetime
+import grpc
+import json
+import logging
+import numpy as np
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from concurrent import futures
+
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+repo_root = os.path.dirname(script_path)
+src_dir = os.path.join(repo_root, "src")
+for name in ("auto_generated", "Common", "Tracker", "TrackConsumer", "Simulator"):
+  sys.path.insert(1, os.path.join(src_dir, name))
+import measurement_pb2
+import measurement_pb2_grpc
+import ColumnarCodec
+import Kalman_Filter_Tracker as kft
+import Inst_Vel_Tracker as ivt
+from TrackStrategyFactory import TrackStrategyFactory
+from TrackPublisher import TrackPublisher
+from TrackFileWriter import TrackFileWriter
+from simulator import Simulator, initialize_track_creation
+import tracker
+import TrackConsumer
+
+# Sizes benchmarked in the full and the --quick runs
+SIZES = {
+  'full': {'tracks': (10, 100, 1000), 'history': (10, 100, 1000), 'scans': 20},
+  'quick': {'tracks': (10, 100), 'history': (10, 100), 'scans': 5},
+}
+DEFAULT_TOLERANCE = 0.25
+
+def input_args():
+  """
+    Input argument parser
+    ...
+  """
+  parser = argparse.ArgumentParser(description='Benchmark the tracker hot paths')
+  parser.add_argument('-o', '--output', default=None,
+                    help='Write the results as JSON to this file')
+  parser.add_argument('-b', '--baseline', default=None,
+                    help='Compare the results against a JSON file written by a ' +
+                          'previous run, exits with 1 on a regression')
+  parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                    help='Relative slow down of the median time reported as a ' +
+                          f'regression (default: {DEFAULT_TOLERANCE})')
+  parser.add_argument('-k', '--filter', default=None,
+                    help='Only run the benchmarks whose name contains this string')
+  parser.add_argument('-r', '--repeat', type=int, default=5,
+                    help='Timed repeats of each benchmark (default: 5)')
+  parser.add_argument('-m', '--mintime', type=float, default=0.05,
+                    help='Minimum seconds of each repeat (default: 0.05)')
+  parser.add_argument('-q', '--quick', action='store_true',
+                    help='Only run the smaller sizes')
+  parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Verbose logging')
+  args = parser.parse_args()
+
+  # the code under test logs at INFO and DEBUG, only the benchmark reports
+  # are shown unless verbose logging is requested
+  logLevel = logging.WARNING
+  if args.verbose:
+    logLevel = logging.DEBUG
+  logging.basicConfig(
+    format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+          '[%(filename)s:%(lineno)d] %(message)s',
+    datefmt='%Y-%m-%d:%H:%M:%S',
+    level=logLevel)
+  return args
+
+def measure(op, prepare=None, repeat=5, min_time=0.05, number=1):
+  """
+    Time an operation, only op itself is timed
+
+    Parameters
+    ---------
+    op: callable
+      operation being timed, called with the value returned by prepare
+    prepare: callable
+      untimed setup called with the iteration index before every op
+    repeat: int
+      number of timed repeats
+    min_time: float
+      each repeat runs op until at least min_time seconds have been timed
+    number: int
+      minimum number of ops of each repeat
+
+    Returns
+    ---------
+    result: dict
+      median, min and max seconds per op over the repeats, the number of
+      ops per repeat and the repeats
+  """
+  iteration = 0
+  per_op = []
+  for _ in range(repeat):
+    elapsed = 0.0
+    count = 0
+    while elapsed < min_time or count < number:
+      arg = prepare(iteration) if prepare else None
+      start = time.perf_counter()
+      op(arg)
+      elapsed += time.perf_counter() - start
+      iteration += 1
+      count += 1
+    per_op.append(elapsed / count)
+  return {'median': float(np.median(per_op)), 'min': min(per_op),
+          'max': max(per_op), 'number': count, 'repeat': repeat}
+
+def _measurement(i, x=0.0):
+  return measurement_pb2.measurement(x=x + i, y=2.0 * i, z=0.5 * i, time=float(i),
+                                     true_x=x + i, true_y=2.0 * i, true_z=0.5 * i)
+
+def _filled(strategy, history):
+  track = strategy(retention='last-k', capacity=history)
+  for i in range(history):
+    track.add_measurement(_measurement(i))
+  return track
+
+def bench_kft_predict(sizes, **kwargs):
+  track = _filled(kft.Kalman_Filter_Tracker, 2)
+  yield 'kft.predict', lambda: measure(lambda t: track.predict(t),
+                                       lambda i: 2.0 + (i % 16), **kwargs)
+
+def bench_kft_update(sizes, **kwargs):
+  for kernel in kft.KERNELS:
+    track = kft.create_tracker(kernel=kernel)
+    for i in range(2):
+      track.add_measurement(_measurement(i))
+    def prepare(i, track=track):
+      new_X, new_P = track.predict(track.time + 1.0)
+      return new_X, new_P, track.time + 1.0, np.array([[i], [2.0 * i], [0.5 * i]])
+    yield (f'kft.update[kernel={kernel}]',
+           lambda track=track, prepare=prepare:
+             measure(lambda arg: track.update(*arg), prepare, **kwargs))
+
+def bench_kft_steady_state(sizes, **kwargs):
+  for steady_state in (False, True):
+    track = kft.Kalman_Filter_Tracker(kernel='standard', steady_state=steady_state)
+    for i in range(300):
+      track.add_measurement(_measurement(i))
+    def prepare(i, track=track):
+      return np.array([[i], [2.0 * i], [0.5 * i]]), track.time + 1.0
+    yield (f'kft.measurement_input[steady_state={steady_state}]',
+           lambda track=track, prepare=prepare:
+             measure(lambda arg: track.measurement_input(*arg, z=track.z), prepare, **kwargs))
+
+def bench_kft_oosm(sizes, **kwargs):
+  for lag in (1, 4, 15):
+    track = kft.create_tracker(kernel='standard', oosm_window=1e6)
+    for i in range(kft.DEFAULT_OOSM_DEPTH + 1):
+      track.add_measurement(_measurement(i))
+    # folding in at the same time replays the same number of later states
+    late = _measurement(track.time - lag + 0.5)
+    yield (f'kft.measurement_late[lag={lag}]',
+           lambda track=track, late=late: measure(lambda _: track.add_measurement(late), **kwargs))
+
+def bench_add_measurement(sizes, **kwargs):
+  for name, strategy in (('kft', kft.Kalman_Filter_Tracker), ('ivt', ivt.Inst_Vel_Tracker)):
+    for history in sizes['history']:
+      def run():
+        track = _filled(strategy, history)
+        return measure(track.add_measurement, lambda i: _measurement(history + i), **kwargs)
+      yield f'{name}.add_measurement[history={history}]', run
+
+def _scans(num_tracks, num_scans, seed=0):
+  """
+    Pre-generated scans of well separated targets, so association is not
+    confused and the track count stays at num_tracks
+  """
+  rng = np.random.default_rng(seed)
+  positions, velocities, accelerations = initialize_track_creation(num_tracks, rng)
+  positions[:, 0] = np.arange(num_tracks) * 100.0
+  sim = Simulator(positions, velocities, accelerations, time=0.0, seed=rng)
+  return [sim.predict_at_time(2.0 * i) for i in range(num_scans)]
+
+def bench_factory(sizes, repeat=5, min_time=0.05):
+  for num_tracks in sizes['tracks']:
+    for cell_size, kernel in ((None, 'legacy'), (50.0, 'legacy'), (None, 'axis'), (50.0, 'axis')):
+      def run(cell_size=cell_size, kernel=kernel):
+        # the track state moves on with every scan so scans are never reused,
+        # every repeat processes a fixed number of scans
+        scans = _scans(num_tracks, 1 + repeat * sizes['scans'])
+        factory = TrackStrategyFactory('kft', gate=1e6, cell_size=cell_size, kernel=kernel)
+        factory.process_measurement(scans[0])
+        return measure(factory.process_measurement, lambda i: scans[1 + i],
+                       repeat=repeat, min_time=0.0, number=sizes['scans'])
+      name = f'factory.process_measurement[tracks={num_tracks}'
+      name += '' if cell_size is None else f',cell={cell_size:g}'
+      name += ']' if kernel == 'legacy' else f',kernel={kernel}]'
+      yield name, run
+
+def _track_group(num_tracks, history):
+  measurements = [_measurement(i).SerializeToString() for i in range(history)]
+  tracks = [measurement_pb2.track(track_id=i, x_pred_pos=i, x_velocity=1.0,
+                                  measurements=measurements).SerializeToString()
+            for i in range(num_tracks)]
+  return measurement_pb2.track_group(tracks=tracks)
+
+def _parse_track_group(data):
+  for track_data in measurement_pb2.track_group.FromString(data).tracks:
+    for meas_data in measurement_pb2.track.FromString(track_data).measurements:
+      measurement_pb2.measurement.FromString(meas_data)
+
+def bench_protobuf(sizes, **kwargs):
+  for num_tracks in sizes['tracks']:
+    for history in sizes['history']:
+      if num_tracks * history > 100000:
+        continue
+      group = _track_group(num_tracks, history)
+      data = group.SerializeToString()
+      columns = ColumnarCodec.track_group_v1_to_columns(group, measurement_pb2.track,
+                                                        measurement_pb2.measurement)
+      encoded = ColumnarCodec.encode_track_group(columns)
+      params = f'[tracks={num_tracks},history={history}]'
+      yield (f'protobuf.serialize{params}',
+             lambda: measure(lambda _: group.SerializeToString(), **kwargs))
+      yield (f'protobuf.parse{params}',
+             lambda: measure(lambda _: _parse_track_group(data), **kwargs))
+      yield (f'columnar.encode{params}',
+             lambda: measure(lambda _: ColumnarCodec.encode_track_group(columns), **kwargs))
+      yield (f'columnar.decode{params}',
+             lambda: measure(lambda _: ColumnarCodec.decode_track_group(encoded), **kwargs))
+
+def _e2e(num_tracks, num_scans, repeat):
+  """
+    Simulator scans sent to an in-process tracker publishing to an
+    in-process track consumer over localhost gRPC
+  """
+  with tempfile.TemporaryDirectory() as tmpdir, \
+       open(os.path.join(tmpdir, "track.track"), "w") as trackfile:
+    writer = TrackFileWriter(trackfile)
+    consumer = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    measurement_pb2_grpc.add_TrackProducerServicer_to_server(
+      TrackConsumer.TrackWriter(writer), consumer)
+    consumer_port = consumer.add_insecure_port('localhost:0')
+    consumer.start()
+
+    channel = grpc.insecure_channel(f'localhost:{consumer_port}')
+    publisher = TrackPublisher(channel)
+    servicer = tracker.Tracker(measurement_pb2_grpc.TrackProducerStub(channel),
+                               gate=1e6, publisher=publisher)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(servicer, server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    scans = _scans(num_tracks, 1 + repeat * num_scans)
+    try:
+      with grpc.insecure_channel(f'localhost:{port}') as sim_channel:
+        stub = measurement_pb2_grpc.MeasurementProducerStub(sim_channel)
+        stub.ProcessMeasurement(scans[0])
+        start = time.perf_counter()
+        result = measure(stub.ProcessMeasurement, lambda i: scans[1 + i],
+                         repeat=repeat, min_time=0.0, number=num_scans)
+        # throughput includes draining the publisher and the track file
+        publisher.close()
+        writer.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+      server.stop(None)
+      consumer.stop(None)
+      channel.close()
+      writer.close()
+  result['measurements_per_second'] = num_tracks * repeat * num_scans / elapsed
+  result['publish'] = publisher.stats()
+  return result
+
+def bench_e2e(sizes, repeat=5, min_time=0.05):
+  for num_tracks in sizes['tracks']:
+    yield (f'e2e.grpc[tracks={num_tracks}]',
+           lambda: _e2e(num_tracks, sizes['scans'], repeat))
+
+BENCHMARKS = (bench_kft_predict, bench_kft_update, bench_kft_steady_state,
+              bench_kft_oosm, bench_add_measurement, bench_factory, bench_protobuf, bench_e2e)
+
+def run_benchmarks(sizes, name_filter=None, repeat=5, min_time=0.05):
+  """
+    Run every benchmark, each benchmark function yields the name and a
+    callable running the measurement of every size, so filtered out
+    benchmarks are never set up
+
+    Returns
+    ---------
+    results: dict
+      maps each benchmark name to its measure() result
+  """
+  results = {}
+  for benchmark in BENCHMARKS:
+    for name, run in benchmark(sizes, repeat=repeat, min_time=min_time):
+      if name_filter and name_filter not in name:
+        continue
+      result = run()
+      results[name] = result
+      print(f"{name:55s} {result['median'] * 1e6:12.1f} us/op " +
+            f"(min {result['min'] * 1e6:.1f}, {result['number']} x {result['repeat']})")
+  return results
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+  """
+    Compare median times against a baseline run
+
+    Returns
+    ---------
+    regressions: list
+      (name, ratio of the median time to the baseline median) of every
+      benchmark more than tolerance slower than its baseline
+  """
+  regressions = []
+  for name, result in results.items():
+    if name not in baseline:
+      continue
+    ratio = result['median'] / baseline[name]['median']
+    flag = ''
+    if ratio > 1.0 + tolerance:
+      regressions.append((name, ratio))
+      flag = ' REGRESSION'
+    print(f"{name:55s} {ratio:6.2f}x baseline{flag}")
+  return regressions
+
+def main(args):
+  sizes = SIZES['quick' if args.quick else 'full']
+  results = run_benchmarks(sizes, args.filter, args.repeat, args.mintime)
+  report = {
+    'meta': {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+             'python': platform.python_version(), 'numpy': np.__version__,
+             'platform': platform.platform(), 'cpus': os.cpu_count(),
+             'quick': args.quick},
+    'results': results,
+  }
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+      print(f"{len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}")
+      sys.exit(1)
+
+if __name__ == "__main__":
+  args = input_args()
+  main(args)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import numpy as np
+import os
+import sys
+
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+repo_root = os.path.dirname(script_path)
+src_dir = os.path.join(repo_root, "src")
+for name in ("auto_generated", "Common", "Tracker", "Simulator"):
+  sys.path.insert(1, os.path.join(src_dir, name))
+import measurement_pb2
+import Kalman_Filter_Tracker as kft
+from simulator import Simulator, initialize_track_creation
+from benchmarks import measure
+
+def input_args():
+  """
+    Input argument parser
+    ...
+  """
+  parser = argparse.ArgumentParser(description='Compare the accuracy and cost of the ' +
+                                               'Kalman filter update kernels')
+  parser.add_argument('-n', '--numtarget', type=int, default=20,
+                    help='Number of simulated targets (default: 20)')
+  parser.add_argument('-t', '--steps', type=int, default=2000,
+                    help='Measurements per target (default: 2000)')
+  parser.add_argument('-p', '--period', type=float, default=2.0,
+                    help='Seconds between measurements (default: 2)')
+  parser.add_argument('--seed', type=int, default=0,
+                    help='Seed of the simulated scenario (default: 0)')
+  parser.add_argument('-o', '--output', default=None,
+                    help='Write the comparison as JSON to this file')
+  parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Verbose logging')
+  args = parser.parse_args()
+
+  logLevel = logging.WARNING
+  if args.verbose:
+    logLevel = logging.DEBUG
+  logging.basicConfig(
+    format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+          '[%(filename)s:%(lineno)d] %(message)s',
+    datefmt='%Y-%m-%d:%H:%M:%S',
+    level=logLevel)
+  return args
+
+def scenario(num_targets, steps, period, seed):
+  """
+    Measurement columns of every scan of a simulated scenario
+  """
+  rng = np.random.default_rng(seed)
+  positions, velocities, accelerations = initialize_track_creation(num_targets, rng)
+  sim = Simulator(positions, velocities, accelerations, time=0.0, seed=rng)
+  return [sim.predict_columns(period * i) for i in range(steps)]
+
+def compare_kernel(kernel, scans):
+  """
+    Run one filter per target through the scenario
+
+    Returns
+    ---------
+    result: dict
+      position RMSE against truth over the second half of the scenario,
+      the worst covariance asymmetry and smallest covariance eigenvalue
+      seen, and the number of updates that failed (non finite state or a
+      linear algebra error)
+  """
+  num_targets = scans[0]['x'].size
+  trackers = [kft.create_tracker(retention='none', kernel=kernel)
+              for _ in range(num_targets)]
+  errors = []
+  asymmetry = 0.0
+  min_eig = np.inf
+  failures = 0
+  for step, columns in enumerate(scans):
+    for i, tracker in enumerate(trackers):
+      meas = measurement_pb2.measurement(**{name: float(values[i])
+                                            for name, values in columns.items()})
+      try:
+        tracker.add_measurement(meas)
+      except np.linalg.LinAlgError:
+        failures += 1
+        continue
+      if not np.all(np.isfinite(tracker.X)):
+        failures += 1
+      if step >= len(scans) // 2:
+        truth = np.array([meas.true_x, meas.true_y, meas.true_z])
+        errors.append(np.sum((tracker.X[:3, 0] - truth) ** 2))
+      P = tracker.covariance()
+      asymmetry = max(asymmetry, float(np.abs(P - P.T).max()))
+      min_eig = min(min_eig, float(np.linalg.eigvalsh(0.5 * (P + P.T)).min()))
+  return {'rmse': float(np.sqrt(np.mean(errors))) if errors else float('nan'),
+          'max_asymmetry': asymmetry, 'min_eigenvalue': min_eig, 'failures': failures}
+
+def update_cost(kernel):
+  track = kft.create_tracker(kernel=kernel)
+  for i in range(2):
+    track.add_measurement(measurement_pb2.measurement(x=i, y=2.0 * i, z=0.5 * i, time=float(i)))
+  def prepare(i):
+    new_X, new_P = track.predict(track.time + 1.0)
+    return new_X, new_P, track.time + 1.0, np.array([[i], [2.0 * i], [0.5 * i]])
+  return measure(lambda arg: track.update(*arg), prepare)['median']
+
+def main(args):
+  scans = scenario(args.numtarget, args.steps, args.period, args.seed)
+  report = {}
+  print(f"{'kernel':10s} {'us/update':>10s} {'rmse':>10s} {'max |P-P^T|':>12s} " +
+        f"{'min eig(P)':>12s} {'failures':>8s}")
+  for kernel in kft.KERNELS:
+    result = compare_kernel(kernel, scans)
+    result['update_seconds'] = update_cost(kernel)
+    report[kernel] = result
+    print(f"{kernel:10s} {result['update_seconds'] * 1e6:10.1f} {result['rmse']:10.4f} " +
+          f"{result['max_asymmetry']:12.3g} {result['min_eigenvalue']:12.3g} " +
+          f"{result['failures']:8d}")
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  return report
+
+if __name__ == "__main__":
+  args = input_args()
+  main(args)
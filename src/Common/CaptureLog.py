@@ -0,0 +1,98 @@
+import struct
+import threading
+import time
+
+# Schema tags of captured measurement groups
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+
+MAGIC = b'KPYCAP\x00\x01'
+# Every record is a little endian payload length, schema tag and receive
+# timestamp (seconds since the epoch) followed by the payload
+_RECORD = struct.Struct('<IBd')
+
+class CaptureWriter:
+  """
+    A class used to capture incoming measurement groups to a length prefixed
+    binary log, so the traffic can be replayed later. It is safe to use from
+    the gRPC worker threads, records are appended under a lock and flushed
+    as they are written so a killed tracker leaves a readable log
+
+    Attributes
+    ---------
+    path: str
+      path of the capture log
+    records: int
+      number of records captured so far
+
+    Methods
+    --------
+    write()
+      append a serialized measurement group
+    close()
+      flush and close the log
+  """
+  def __init__(self, path) -> None:
+    self.path = path
+    self.records = 0
+    self._lock = threading.Lock()
+    self._file = open(path, 'wb')
+    self._file.write(MAGIC)
+    self._file.flush()
+
+  def write(self, schema, data, timestamp=None) -> None:
+    """
+      Append a serialized measurement group
+
+      Parameters
+      ---------
+      schema: int
+        SCHEMA_V1 or SCHEMA_V2
+      data: bytes
+        serialized measurement group
+      timestamp: float
+        receive time, defaults to now
+    """
+    if timestamp is None:
+      timestamp = time.time()
+    record = _RECORD.pack(len(data), schema, timestamp) + data
+    with self._lock:
+      self._file.write(record)
+      self._file.flush()
+      self.records += 1
+
+  def close(self) -> None:
+    with self._lock:
+      self._file.close()
+
+def read_capture(path):
+  """
+    Read the records of a capture log
+
+    Parameters
+    ---------
+    path: str
+      path of the capture log
+
+    Yields
+    ---------
+    schema: int
+      SCHEMA_V1 or SCHEMA_V2
+    timestamp: float
+      receive time of the measurement group
+    data: bytes
+      serialized measurement group
+  """
+  with open(path, 'rb') as f:
+    if f.read(len(MAGIC)) != MAGIC:
+      raise ValueError(f"{path} is not a capture log")
+    while True:
+      header = f.read(_RECORD.size)
+      if len(header) < _RECORD.size:
+        # a truncated trailing record is from a capture that was cut short
+        return
+      size, schema, timestamp = _RECORD.unpack(header)
+      data = f.read(size)
+      if len(data) < size:
+        return
+      yield schema, timestamp, data
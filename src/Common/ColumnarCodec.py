@@ -0,0 +1,424 @@
+import collections
+import functools
+import grpc
+import numpy as np
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+# Columns of a measurement_v2.measurement_group, in field number order
+MEASUREMENT_FIELDS = ('x', 'y', 'z', 'time', 'true_x', 'true_y', 'true_z')
+# Columns of a measurement_v2.track_group, in field number order. Field 8
+# holds the nested measurement history of every track
+TRACK_FIELDS = ('track_id', 'x_pred_pos', 'y_pred_pos', 'z_pred_pos',
+                'x_velocity', 'y_velocity', 'z_velocity')
+TRACK_MEASUREMENTS_FIELD = 8
+
+# One row of measurement columns, read with the same attribute names as a
+# measurement_pb2.measurement so the trackers take either
+MeasurementRow = collections.namedtuple('MeasurementRow', MEASUREMENT_FIELDS)
+
+MEASUREMENT_SERVICE = 'kalmanpy.v2.MeasurementProducer'
+TRACK_SERVICE = 'kalmanpy.v2.TrackProducer'
+
+# protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+# wire type of an unpacked value of each fixed width
+_FIXED_WIRE_TYPES = {8: _FIXED64, 4: _FIXED32}
+
+def _read_varint(buf, pos):
+  byte = buf[pos]
+  if not byte & 0x80:
+    return byte, pos + 1
+  result = 0
+  shift = 0
+  while True:
+    byte = buf[pos]
+    pos += 1
+    result |= (byte & 0x7f) << shift
+    if not byte & 0x80:
+      return result, pos
+    shift += 7
+
+def _write_varint(value):
+  out = bytearray()
+  while True:
+    byte = value & 0x7f
+    value >>= 7
+    if value:
+      out.append(byte | 0x80)
+    else:
+      out.append(byte)
+      return bytes(out)
+
+def _iter_fields(buf, start, end):
+  """
+    Walk the fields of an encoded message yielding
+    (field number, wire type, value start, value end)
+  """
+  pos = start
+  while pos < end:
+    key, pos = _read_varint(buf, pos)
+    field, wire_type = key >> 3, key & 0x7
+    if wire_type == _LENGTH_DELIMITED:
+      length, pos = _read_varint(buf, pos)
+      value_end = pos + length
+    elif wire_type == _FIXED64:
+      value_end = pos + 8
+    elif wire_type == _FIXED32:
+      value_end = pos + 4
+    elif wire_type == _VARINT:
+      _, value_end = _read_varint(buf, pos)
+    else:
+      raise ValueError(f"unsupported wire type {wire_type}")
+    yield field, wire_type, pos, value_end
+    pos = value_end
+
+def _decode_columns(buf, start, end, dtypes, nested=None):
+  """
+    Decode the packed repeated columns of a message straight from the
+    wire bytes with np.frombuffer, no per element parsing is done
+  """
+  chunks = [[] for _ in dtypes]
+  nested_values = []
+  for field, wire_type, value_start, value_end in _iter_fields(buf, start, end):
+    if field == nested and wire_type == _LENGTH_DELIMITED:
+      nested_values.append((value_start, value_end))
+    elif 1 <= field <= len(dtypes) and wire_type in (_LENGTH_DELIMITED,
+                                                     _FIXED_WIRE_TYPES[dtypes[field - 1].itemsize]):
+      # packed (length delimited) and unpacked (fixed width) encodings
+      # both hold raw little endian values, any other wire type is an
+      # unknown field to protobuf and is skipped
+      dtype = dtypes[field - 1]
+      count = (value_end - value_start) // dtype.itemsize
+      chunks[field - 1].append(np.frombuffer(buf, dtype=dtype, count=count,
+                                             offset=value_start))
+  columns = []
+  for i in range(len(dtypes)):
+    if len(chunks[i]) == 1:
+      columns.append(chunks[i][0])
+    elif chunks[i]:
+      columns.append(np.concatenate(chunks[i]))
+    else:
+      columns.append(np.zeros(0, dtype=dtypes[i]))
+  return columns, nested_values
+
+# smallest value of each varint length past one byte
+_VARINT_LIMITS = np.array([1 << 7, 1 << 14, 1 << 21, 1 << 28])
+
+@functools.lru_cache(maxsize=None)
+def _packed_headers(num_fields, nbytes):
+  """
+    Key and length bytes of each of num_fields packed columns of nbytes,
+    one row per field (num_fields, header length)
+  """
+  headers = [_write_varint(field << 3 | _LENGTH_DELIMITED) + _write_varint(nbytes)
+             for field in range(1, num_fields + 1)]
+  return np.frombuffer(b''.join(headers), dtype=np.uint8).reshape(num_fields, -1)
+
+def _decode_nested(buf, spans, names, dtype):
+  """
+    Decode the packed columns of many nested messages at once when every
+    message holds each column, all of one dtype, once, in field order and
+    all of the same length, the layout encode_measurement_group writes.
+    Messages of one size written back to back are evenly spaced, so every
+    run of them is checked and read as one strided (message, field, value)
+    view, with no Python loop over the messages or their values. Returns
+    None for any other layout, which is then decoded one message at a time
+  """
+  spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+  num_msgs = spans.shape[0]
+  if not num_msgs:
+    return []
+  num_fields = len(names)
+  start = spans[:, 0]
+  size = spans[:, 1] - start
+  # one byte key and the varint size in front of every message
+  header_size = 2 + np.searchsorted(_VARINT_LIMITS, size, side='right')
+  breaks = np.ones(num_msgs, dtype=bool)
+  breaks[1:] = (size[1:] != size[:-1]) | (start[1:] - spans[:-1, 1] != header_size[1:])
+  runs = np.nonzero(breaks)[0].tolist() + [num_msgs]
+  start, size, header_size = start.tolist(), size.tolist(), header_size.tolist()
+
+  length = np.zeros(num_msgs, dtype=np.int64)
+  views = []
+  for begin, stop in zip(runs[:-1], runs[1:]):
+    if size[begin] == 0:
+      continue
+    field_size, rest = divmod(size[begin], num_fields)
+    if rest:
+      return None
+    for varint in range(1, 5):
+      nbytes = field_size - 1 - varint
+      if nbytes >= 0 and len(_write_varint(nbytes)) == varint:
+        break
+    else:
+      return None
+    if nbytes % dtype.itemsize:
+      return None
+    expected = _packed_headers(num_fields, nbytes)
+    stride = size[begin] + header_size[begin]
+    headers = np.ndarray((stop - begin,) + expected.shape, dtype=np.uint8, buffer=buf,
+                         offset=start[begin], strides=(stride, field_size, 1))
+    if (headers != expected).any():
+      return None
+    count = nbytes // dtype.itemsize
+    length[begin:stop] = count
+    views.append((begin, np.ndarray((stop - begin, num_fields, count), dtype=dtype,
+                                    buffer=buf, offset=start[begin] + 1 + varint,
+                                    strides=(stride, field_size, dtype.itemsize))))
+
+  offsets = np.concatenate(([0], np.cumsum(length))).tolist()
+  block = np.empty((num_fields, offsets[-1]), dtype=dtype)
+  for begin, view in views:
+    end = offsets[begin] + view.shape[0] * view.shape[2]
+    block[:, offsets[begin]:end].reshape(view.shape[1], view.shape[0], -1)[...] = (
+      view.transpose(1, 0, 2))
+  return [dict(zip(names, block[:, begin:stop]))
+          for begin, stop in zip(offsets[:-1], offsets[1:])]
+
+def _encode_column(field, values, dtype):
+  values = np.ascontiguousarray(values, dtype=dtype)
+  if values.size == 0:
+    return b''
+  data = values.tobytes()
+  return (_write_varint(field << 3 | _LENGTH_DELIMITED) +
+          _write_varint(len(data)) + data)
+
+_F64 = np.dtype('<f8')
+_I32 = np.dtype('<i4')
+_MEASUREMENT_DTYPES = (_F64,) * len(MEASUREMENT_FIELDS)
+_TRACK_DTYPES = (_I32,) + (_F64,) * (len(TRACK_FIELDS) - 1)
+
+def decode_measurement_group(data):
+  """
+    Decode an encoded measurement_v2.measurement_group into numpy arrays
+
+    Parameters
+    ---------
+    data: bytes
+      serialized measurement_v2.measurement_group
+
+    Returns
+    ---------
+    columns: dict
+      maps each name in MEASUREMENT_FIELDS to a read only float64 array,
+      columns left empty by the sender are filled with zeros
+  """
+  data = bytes(data)
+  columns, _ = _decode_columns(data, 0, len(data), _MEASUREMENT_DTYPES)
+  return _fill_empty(dict(zip(MEASUREMENT_FIELDS, columns)))
+
+def _fill_empty(columns):
+  # Unset proto3 fields default to zero, so a column left out of the group
+  # is all zeros rather than missing
+  count = max(len(values) for values in columns.values())
+  for name in columns:
+    if len(columns[name]) == 0 and count:
+      columns[name] = np.zeros(count, dtype=columns[name].dtype)
+  return columns
+
+def encode_measurement_group(columns):
+  """
+    Encode measurement columns as a measurement_v2.measurement_group
+
+    Parameters
+    ---------
+    columns: dict
+      maps names in MEASUREMENT_FIELDS to equal length arrays,
+      missing columns are left empty
+
+    Returns
+    ---------
+    data: bytes
+      serialized measurement_v2.measurement_group
+  """
+  return b''.join(_encode_column(i + 1, columns[name], _F64)
+                  for i, name in enumerate(MEASUREMENT_FIELDS)
+                  if name in columns)
+
+def decode_track_group(data):
+  """
+    Decode an encoded measurement_v2.track_group into numpy arrays
+
+    Parameters
+    ---------
+    data: bytes
+      serialized measurement_v2.track_group
+
+    Returns
+    ---------
+    columns: dict
+      maps each name in TRACK_FIELDS to an array, and 'measurements' to a
+      list holding the decoded measurement columns of every track, columns
+      left empty by the sender are filled with zeros
+  """
+  data = bytes(data)
+  columns, nested = _decode_columns(data, 0, len(data), _TRACK_DTYPES,
+                                    TRACK_MEASUREMENTS_FIELD)
+  tracks = _fill_empty(dict(zip(TRACK_FIELDS, columns)))
+  measurements = _decode_nested(data, nested, MEASUREMENT_FIELDS, _F64)
+  if measurements is None:
+    measurements = []
+    for start, end in nested:
+      meas_columns, _ = _decode_columns(data, start, end, _MEASUREMENT_DTYPES)
+      measurements.append(_fill_empty(dict(zip(MEASUREMENT_FIELDS, meas_columns))))
+  tracks['measurements'] = measurements
+  return tracks
+
+def encode_track_group(columns):
+  """
+    Encode track columns as a measurement_v2.track_group
+
+    Parameters
+    ---------
+    columns: dict
+      maps names in TRACK_FIELDS to equal length arrays, and optionally
+      'measurements' to a list of measurement columns, one per track
+
+    Returns
+    ---------
+    data: bytes
+      serialized measurement_v2.track_group
+  """
+  parts = [_encode_column(i + 1, columns[name], _TRACK_DTYPES[i])
+           for i, name in enumerate(TRACK_FIELDS) if name in columns]
+  key = _write_varint(TRACK_MEASUREMENTS_FIELD << 3 | _LENGTH_DELIMITED)
+  for meas_columns in columns.get('measurements', []):
+    nested = encode_measurement_group(meas_columns)
+    parts.append(key + _write_varint(len(nested)) + nested)
+  return b''.join(parts)
+
+def measurement_group_v1_to_columns(group, measurement_cls):
+  """
+    Convert a v1 measurement_group of serialized measurements to columns
+
+    Parameters
+    ---------
+    group: measurement_pb2.measurement_group
+      v1 group holding one serialized measurement per element
+    measurement_cls: class
+      measurement_pb2.measurement used to parse each element
+
+    Returns
+    ---------
+    columns: dict
+      maps each name in MEASUREMENT_FIELDS to a float64 array
+  """
+  rows = np.zeros((len(group.measurements), len(MEASUREMENT_FIELDS)))
+  for i in range(len(group.measurements)):
+    meas = measurement_cls.FromString(group.measurements[i])
+    rows[i] = [getattr(meas, name) for name in MEASUREMENT_FIELDS]
+  return dict(zip(MEASUREMENT_FIELDS, rows.T))
+
+# Layout of a v1 measurement with every field present, a one byte key
+# followed by the little endian double of each field
+_V1_MEASUREMENT_DTYPE = np.dtype([(part + name, dtype) for name in MEASUREMENT_FIELDS
+                                  for part, dtype in (('key_', 'u1'), ('', '<f8'))])
+
+def encode_measurements_v1(columns):
+  """
+    Serialize measurement columns as v1 measurement messages in one
+    vectorized pass, instead of building a message per measurement
+
+    Parameters
+    ---------
+    columns: dict
+      maps each name in MEASUREMENT_FIELDS to equal length arrays
+
+    Returns
+    ---------
+    measurements: list
+      one serialized measurement_pb2.measurement per row, ready for the
+      measurements field of a measurement_group
+  """
+  rows = np.zeros(len(columns['x']), dtype=_V1_MEASUREMENT_DTYPE)
+  for i, name in enumerate(MEASUREMENT_FIELDS):
+    rows['key_' + name] = (i + 1) << 3 | _FIXED64
+    rows[name] = columns[name]
+  data = rows.tobytes()
+  size = _V1_MEASUREMENT_DTYPE.itemsize
+  return [data[i:i + size] for i in range(0, len(data), size)]
+
+def track_group_v1_to_columns(group, track_cls, measurement_cls):
+  """
+    Convert a v1 track_group of serialized tracks to the columns returned
+    by decode_track_group
+
+    Parameters
+    ---------
+    group: measurement_pb2.track_group
+      v1 group holding one serialized track per element
+    track_cls: class
+      measurement_pb2.track used to parse each element
+    measurement_cls: class
+      measurement_pb2.measurement used to parse the track measurements
+
+    Returns
+    ---------
+    columns: dict
+      maps each name in TRACK_FIELDS to an array, and 'measurements' to a
+      list holding the measurement columns of every track
+  """
+  rows = np.zeros((len(group.tracks), len(TRACK_FIELDS)))
+  measurements = []
+  for i in range(len(group.tracks)):
+    track = track_cls.FromString(group.tracks[i])
+    rows[i] = [getattr(track, name) for name in TRACK_FIELDS]
+    measurements.append(measurement_group_v1_to_columns(track, measurement_cls))
+  columns = dict(zip(TRACK_FIELDS, rows.T))
+  columns['track_id'] = rows[:, 0].astype(np.int32)
+  columns['measurements'] = measurements
+  return columns
+
+def _passthrough(data):
+  return data
+
+class MeasurementProducerV2Stub:
+  """
+    Client for the v2 measurement service that sends already encoded
+    measurement_v2.measurement_group bytes
+  """
+  def __init__(self, channel):
+    self.ProcessMeasurement = channel.unary_unary(
+      f'/{MEASUREMENT_SERVICE}/ProcessMeasurement',
+      request_serializer=_passthrough,
+      response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString)
+
+class TrackProducerV2Stub:
+  """
+    Client for the v2 track service that sends already encoded
+    measurement_v2.track_group bytes
+  """
+  def __init__(self, channel):
+    self.ProcessTrack = channel.unary_unary(
+      f'/{TRACK_SERVICE}/ProcessTrack',
+      request_serializer=_passthrough,
+      response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString)
+
+def add_MeasurementProducerV2_to_server(servicer, server):
+  """
+    Register a v2 measurement servicer, its ProcessMeasurement method
+    receives the raw encoded bytes so they can be decoded with
+    decode_measurement_group
+  """
+  handler = grpc.unary_unary_rpc_method_handler(
+    servicer.ProcessMeasurement,
+    request_deserializer=_passthrough,
+    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString)
+  server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(
+    MEASUREMENT_SERVICE, {'ProcessMeasurement': handler}),))
+
+def add_TrackProducerV2_to_server(servicer, server):
+  """
+    Register a v2 track servicer, its ProcessTrack method receives the raw
+    encoded bytes so they can be decoded with decode_track_group
+  """
+  handler = grpc.unary_unary_rpc_method_handler(
+    servicer.ProcessTrack,
+    request_deserializer=_passthrough,
+    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString)
+  server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(
+    TRACK_SERVICE, {'ProcessTrack': handler}),))
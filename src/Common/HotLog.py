@@ -0,0 +1,59 @@
+"""
+  Logging for the per measurement and per scan hot paths. Messages take
+  logging's lazy %-style arguments instead of f-strings, so nothing is
+  formatted (matrices, protobuf messages) when their level is disabled and
+  a disabled call costs a single cached level check. High volume messages
+  are logged through sampled(), which only emits one in every `every` calls
+"""
+import logging
+
+_logger = logging.getLogger()
+_counts = {}
+every = 1
+
+def configure(sample_every=1, name=None) -> None:
+  """
+    Set the sampling rate of sampled() messages and the logger written to
+
+    Parameters
+    ---------
+    sample_every: int
+      emit one in every sample_every calls of each sampled message
+    name: str
+      logger name, the root logger by default
+  """
+  global _logger, every
+  _logger = logging.getLogger(name)
+  every = max(int(sample_every), 1)
+  _counts.clear()
+
+def enabled(level) -> bool:
+  """
+    True when messages of level would be emitted, guards formatting work
+    that cannot be deferred to the lazy arguments
+  """
+  return _logger.isEnabledFor(level)
+
+def debug(msg, *args) -> None:
+  if _logger.isEnabledFor(logging.DEBUG):
+    _logger.debug(msg, *args, stacklevel=2)
+
+def info(msg, *args) -> None:
+  if _logger.isEnabledFor(logging.INFO):
+    _logger.info(msg, *args, stacklevel=2)
+
+def sampled(level, msg, *args) -> None:
+  """
+    Log one in every `every` calls of a message, counted per format string.
+    The count is not locked, concurrent callers may shift which call is
+    emitted but every message is still sampled at roughly the same rate
+  """
+  if not _logger.isEnabledFor(level):
+    return
+  count = _counts.get(msg, 0)
+  _counts[msg] = count + 1
+  if count % every:
+    return
+  if every > 1:
+    msg = f"{msg} [sampled 1/{every}]"
+  _logger.log(level, msg, *args, stacklevel=2)
@@ -0,0 +1,319 @@
+import bisect
+import http.server
+import logging
+import threading
+import time
+
+# Upper bounds in seconds of the latency histogram buckets, the last
+# bucket (+Inf) catches everything slower
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels(labels):
+  if not labels:
+    return ''
+  return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+class Counter:
+  """
+    A monotonically increasing count
+
+    Methods
+    --------
+    inc()
+      add to the count
+  """
+  kind = 'counter'
+
+  def __init__(self) -> None:
+    self.value = 0
+    self._lock = threading.Lock()
+
+  def inc(self, amount=1) -> None:
+    with self._lock:
+      self.value += amount
+
+  def samples(self, name, labels):
+    yield f'{name}{_labels(labels)} {self.value}'
+
+class Gauge:
+  """
+    A value that can go up and down, either set directly or read from a
+    callable every time the metrics are collected
+
+    Methods
+    --------
+    set()
+      set the value
+  """
+  kind = 'gauge'
+
+  def __init__(self, func=None) -> None:
+    self._value = 0
+    self.func = func
+
+  @property
+  def value(self):
+    return self.func() if self.func else self._value
+
+  def set(self, value) -> None:
+    self._value = value
+
+  def samples(self, name, labels):
+    yield f'{name}{_labels(labels)} {self.value}'
+
+class _Timer:
+  """
+    Context manager observing the elapsed perf_counter time into a histogram
+  """
+  __slots__ = ('histogram', 'start')
+
+  def __init__(self, histogram) -> None:
+    self.histogram = histogram
+
+  def __enter__(self):
+    self.start = time.perf_counter()
+    return self
+
+  def __exit__(self, *exc_info):
+    self.histogram.observe(time.perf_counter() - self.start)
+    return False
+
+class Histogram:
+  """
+    A fixed bucket histogram, observing a value is a bisect and two adds so
+    it is cheap enough for the per request path
+
+    Attributes
+    ---------
+    buckets: tuple
+      upper bound of every bucket, the implicit last bucket is +Inf
+    counts: list
+      number of observations in each bucket (not cumulative)
+    count: int
+      number of observations
+    sum: float
+      sum of the observations
+
+    Methods
+    --------
+    observe()
+      add an observation
+    time()
+      context manager observing its elapsed time in seconds
+    quantile()
+      bucket upper bound estimate of a quantile
+  """
+  kind = 'histogram'
+
+  def __init__(self, buckets=DEFAULT_BUCKETS) -> None:
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+    self._lock = threading.Lock()
+
+  def observe(self, value) -> None:
+    i = bisect.bisect_left(self.buckets, value)
+    with self._lock:
+      self.counts[i] += 1
+      self.count += 1
+      self.sum += value
+
+  def time(self):
+    return _Timer(self)
+
+  def quantile(self, q):
+    """
+      Upper bound of the bucket holding the q quantile, 0 without
+      observations and +Inf when it falls in the last bucket
+    """
+    if not self.count:
+      return 0.0
+    rank = q * self.count
+    total = 0
+    for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+      total += count
+      if total >= rank:
+        return bound
+    return float('inf')
+
+  def samples(self, name, labels):
+    total = 0
+    for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+      total += count
+      yield f'{name}_bucket{_labels(labels + (("le", bound),))} {total}'
+    yield f'{name}_sum{_labels(labels)} {self.sum}'
+    yield f'{name}_count{_labels(labels)} {self.count}'
+
+class MetricsRegistry:
+  """
+    A class holding the counters, gauges and histograms of a process and
+    rendering them in the Prometheus text exposition format or as a single
+    stats log line
+
+    Attributes
+    ---------
+    metrics: dict
+      maps each metric name to its help text, kind and the metric of every
+      label set
+
+    Methods
+    --------
+    counter()
+      get or create a counter
+    gauge()
+      get or create a gauge
+    histogram()
+      get or create a histogram
+    render()
+      Prometheus text exposition of every metric
+    summary()
+      one line summary of every metric
+  """
+  def __init__(self) -> None:
+    self.metrics = {}
+    self._lock = threading.Lock()
+
+  def _get(self, cls, name, help, labels, **kwargs):
+    labels = tuple(sorted(labels.items())) if labels else ()
+    with self._lock:
+      family = self.metrics.setdefault(name, {'help': help, 'kind': cls.kind,
+                                              'children': {}})
+      if family['kind'] != cls.kind:
+        raise ValueError(f"metric {name} is a {family['kind']} not a {cls.kind}")
+      metric = family['children'].get(labels)
+      if metric is None:
+        metric = family['children'][labels] = cls(**kwargs)
+      return metric
+
+  def counter(self, name, help='', labels=None) -> Counter:
+    return self._get(Counter, name, help, labels)
+
+  def gauge(self, name, help='', labels=None, func=None) -> Gauge:
+    gauge = self._get(Gauge, name, help, labels)
+    if func:
+      # the latest owner of a gauge reports it, e.g. a replaced publisher
+      gauge.func = func
+    return gauge
+
+  def histogram(self, name, help='', labels=None, buckets=DEFAULT_BUCKETS) -> Histogram:
+    return self._get(Histogram, name, help, labels, buckets=buckets)
+
+  def _families(self):
+    with self._lock:
+      return [(name, family['help'], family['kind'], list(family['children'].items()))
+              for name, family in self.metrics.items()]
+
+  def render(self):
+    """
+      Prometheus text exposition format of every metric
+    """
+    lines = []
+    for name, help, kind, children in self._families():
+      lines.append(f'# HELP {name} {help}')
+      lines.append(f'# TYPE {name} {kind}')
+      for labels, metric in children:
+        lines.extend(metric.samples(name, labels))
+    return '\n'.join(lines) + '\n'
+
+  def summary(self):
+    """
+      One line summary, counter and gauge values and the count, mean and
+      p50/p99 bucket estimates in milliseconds of every histogram
+    """
+    parts = []
+    for name, _, kind, children in self._families():
+      for labels, metric in children:
+        key = name + _labels(labels)
+        if kind == 'histogram':
+          if metric.count:
+            parts.append(f'{key} n={metric.count} ' +
+                         f'mean={metric.sum / metric.count * 1e3:.3f}ms ' +
+                         f'p50<={metric.quantile(0.5) * 1e3:g}ms ' +
+                         f'p99<={metric.quantile(0.99) * 1e3:g}ms')
+        else:
+          parts.append(f'{key}={metric.value:g}')
+    return ' '.join(parts)
+
+class MetricsServer:
+  """
+    Serves the Prometheus text exposition of a registry over HTTP from a
+    daemon thread
+
+    Attributes
+    ---------
+    port: int
+      port the endpoint is bound to, useful when started on port 0
+
+    Methods
+    --------
+    close()
+      stop serving
+  """
+  def __init__(self, registry, port, host='') -> None:
+    class Handler(http.server.BaseHTTPRequestHandler):
+      def do_GET(self):
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, format, *args):
+        logging.debug(f"metrics request {format % args}")
+
+    self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+    self.port = self._server.server_address[1]
+    self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    self._thread.start()
+    logging.info(f"serving metrics on port {self.port}")
+
+  def close(self) -> None:
+    self._server.shutdown()
+    self._server.server_close()
+
+class StatsLogger:
+  """
+    Logs the summary of a registry every interval seconds from a daemon
+    thread
+
+    Methods
+    --------
+    close()
+      stop logging
+  """
+  def __init__(self, registry, interval) -> None:
+    self.registry = registry
+    self.interval = interval
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def _run(self):
+    while not self._stop.wait(self.interval):
+      logging.info(f"stats {self.registry.summary()}")
+
+  def close(self) -> None:
+    self._stop.set()
+    self._thread.join()
+
+def start(registry, port=None, interval=None):
+  """
+    Start the metrics endpoint and/or the periodic stats log line
+
+    Returns
+    ---------
+    reporters: list
+      the started MetricsServer and StatsLogger, close them on shutdown
+  """
+  reporters = []
+  if port is not None:
+    reporters.append(MetricsServer(registry, port))
+  if interval:
+    reporters.append(StatsLogger(registry, interval))
+  return reporters
+
+# Process wide registry the pipeline records to unless given another one
+REGISTRY = MetricsRegistry()
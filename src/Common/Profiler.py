@@ -0,0 +1,76 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+
+class WindowProfiler:
+  """
+    A class used to record cProfile stats over a window of calls, e.g. the
+    RPCs of a server, and dump them to disk once the window is complete.
+    cProfile only follows the thread it is enabled on so profiled calls are
+    serialized while the window is open, after the stats are dumped calls
+    run unprofiled with only a flag check
+
+    Attributes
+    ---------
+    path: str
+      file the pstats are dumped to, load it with pstats.Stats or snakeviz
+    window: int
+      number of calls profiled
+    skip: int
+      number of calls let through before profiling starts (warm up)
+    calls: int
+      number of calls made so far
+    done: bool
+      True once the stats have been dumped
+
+    Methods
+    --------
+    call()
+      call a function, profiling it while the window is open
+    dump()
+      dump the stats recorded so far
+  """
+  def __init__(self, path, window=100, skip=0) -> None:
+    self.path = path
+    self.window = window
+    self.skip = skip
+    self.calls = 0
+    self.done = False
+    self._profile = cProfile.Profile()
+    self._lock = threading.Lock()
+
+  def call(self, func, *args, **kwargs):
+    """
+      Call func(*args, **kwargs), profiling it while the window is open
+    """
+    if self.done:
+      return func(*args, **kwargs)
+    with self._lock:
+      if self.done:
+        profile = False
+      else:
+        self.calls += 1
+        profile = self.calls > self.skip
+      if not profile:
+        return func(*args, **kwargs)
+      self._profile.enable()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        self._profile.disable()
+        if self.calls >= self.skip + self.window:
+          self.dump()
+
+  def dump(self, top=20) -> None:
+    """
+      Dump the recorded stats to path and log the top functions by
+      cumulative time, ends the window
+    """
+    self.done = True
+    self._profile.dump_stats(self.path)
+    text = io.StringIO()
+    pstats.Stats(self._profile, stream=text).sort_stats('cumulative').print_stats(top)
+    logging.info(f"profiled {self.calls - self.skip} calls, stats written to {self.path}\n" +
+                 text.getvalue())
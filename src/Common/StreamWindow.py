@@ -0,0 +1,133 @@
+import grpc
+import logging
+import queue
+import threading
+
+class StreamWindow:
+  """
+    A class used to send messages over a bidirectional streaming RPC with
+    flow control. Every message is stamped with a sequence number and the
+    server acknowledges each one, at most `window` messages are in flight
+    before send() blocks waiting for acknowledgements. When the server
+    closes the stream, for example on a consumer restart, the next send()
+    opens a new call of the RPC
+
+    Attributes
+    ---------
+    window: int
+      maximum number of unacknowledged messages in flight
+    sequence: int
+      sequence number of the last message sent
+    acked: int
+      sequence number of the last acknowledged message
+    error: grpc.RpcError
+      error that closed the stream, None while the stream is healthy
+    reconnects: int
+      number of times the stream was reopened after the server closed it
+
+    Methods
+    --------
+    send()
+      queue a message on the stream, blocking while the window is full
+    close()
+      finish the stream and wait for the outstanding acknowledgements
+  """
+  def __init__(self, stream_method, window=8) -> None:
+    self.window = window
+    self.sequence = 0
+    self.acked = 0
+    self.error = None
+    self.reconnects = 0
+    self._stream_method = stream_method
+    self._closed = False
+    self._lock = threading.Lock()
+    self._open()
+
+  def _open(self):
+    """
+      Start a new call of the streaming RPC with an empty window. The
+      request queue, window slots and closed event belong to the call, so
+      senders still holding those of a closed call never touch the new one
+    """
+    requests = queue.Queue()
+    slots = threading.Semaphore(self.window)
+    done = threading.Event()
+    responses = self._stream_method(self._requests(requests))
+    self._call = (requests, slots, done)
+    self._ack_thread = threading.Thread(target=self._consume_acks, daemon=True,
+                                        args=(responses, slots, done))
+    self._ack_thread.start()
+
+  @staticmethod
+  def _requests(requests):
+    while True:
+      msg = requests.get()
+      if msg is None:
+        return
+      yield msg
+
+  def _consume_acks(self, responses, slots, done):
+    try:
+      for ack in responses:
+        self.acked = ack.sequence
+        slots.release()
+    except grpc.RpcError as rpc_error:
+      logging.warning(f"stream closed {rpc_error.code()}")
+      self.error = rpc_error
+    finally:
+      # Unblock any sender still waiting on a window slot
+      done.set()
+      slots.release()
+
+  def send(self, msg, timeout=None) -> int:
+    """
+      Queue a message on the stream, blocking while the window is full.
+      A stream closed by the server is reopened, the messages it had not
+      acknowledged are lost
+
+      Parameters
+      ---------
+      msg: protobuf message
+        message with a sequence field, the field is set by the window
+      timeout: float
+        seconds to wait for a window slot, None waits forever
+
+      Returns
+      ---------
+      sequence: int
+        sequence number assigned to the message
+    """
+    requests, slots, done = self._call
+    if not slots.acquire(timeout=timeout):
+      raise TimeoutError(f"no acknowledgement within {timeout} seconds")
+    if done.is_set():
+      # pass the slot on so every blocked sender sees the closed stream
+      slots.release()
+      if self._closed:
+        raise RuntimeError("stream closed")
+      with self._lock:
+        if self._call[1] is slots:
+          self._reopen()
+      requests, slots, done = self._call
+      if not slots.acquire(timeout=timeout):
+        raise TimeoutError(f"no acknowledgement within {timeout} seconds")
+    with self._lock:
+      self.sequence += 1
+      msg.sequence = self.sequence
+      requests.put(msg)
+      return self.sequence
+
+  def _reopen(self):
+    logging.warning(f"reopening stream, {self.sequence - self.acked} messages " +
+                    f"unacknowledged, closed by {self.error}")
+    self.error = None
+    self.reconnects += 1
+    self._open()
+
+  def close(self, timeout=None) -> None:
+    """
+      Finish the stream and wait for the outstanding acknowledgements
+    """
+    self._closed = True
+    self._call[0].put(None)
+    self._ack_thread.join(timeout)
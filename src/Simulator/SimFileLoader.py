@@ -0,0 +1,102 @@
+import logging
+import numpy as np
+
+# Columns of a SimFileCreator CSV row after the optional track id, see
+# SimFileCreator.CSV_HEADER
+CSV_COLUMNS = ('time', 'meas', 'truth', 'truth_velocity', 'truth_acceleration')
+BULK_CSV_PREFIX = "# track_id"
+
+def pad_tracks(track_id, time, **columns):
+  """
+    Group per measurement rows into time ordered, left aligned tracks
+    padded with NaN to the length of the longest track
+
+    Parameters
+    ---------
+    track_id: np array
+      track of each row (M,)
+    time: np array
+      time of each row (M,)
+    columns:
+      other per row arrays (M,...) to group the same way
+
+    Returns
+    ---------
+    tracks: dict
+      'track_id' (N,) sorted, 'length' number of rows of each track (N,),
+      'time' (N,T) and every other column (N,T,...)
+  """
+  track_id = np.asarray(track_id, dtype=np.int64)
+  time = np.asarray(time, dtype=float)
+  order = np.lexsort((time, track_id))
+  ids, start, length = np.unique(track_id[order], return_index=True, return_counts=True)
+  row = np.repeat(np.arange(ids.size), length)
+  step = np.arange(order.size) - np.repeat(start, length)
+  num_steps = int(length.max()) if ids.size else 0
+  tracks = {'track_id': ids, 'length': length}
+  for name, column in dict(time=time, **columns).items():
+    column = np.asarray(column, dtype=float)
+    padded = np.full((ids.size, num_steps) + column.shape[1:], np.nan)
+    padded[row, step] = column[order]
+    tracks[name] = padded
+  return tracks
+
+def _read_csv(path, track_id):
+  with open(path) as f:
+    bulk = f.readline().startswith(BULK_CSV_PREFIX)
+  rows = np.loadtxt(path, delimiter=',', comments='#', ndmin=2)
+  if bulk:
+    track_id = rows[:, 0]
+    rows = rows[:, 1:]
+  else:
+    track_id = np.full(rows.shape[0], track_id)
+  return track_id, {'time': rows[:, 0], 'meas': rows[:, 1:4], 'truth': rows[:, 4:7],
+                    'truth_velocity': rows[:, 7:10], 'truth_acceleration': rows[:, 10:13]}
+
+def _read_npz(path):
+  with np.load(path) as data:
+    times = data['time']
+    num_tracks = data['track_id'].size
+    velocity = (data['velocity'][:, None, :] +
+                data['acceleration'][:, None, :] * (times - times[0])[None, :, None])
+    acceleration = np.broadcast_to(data['acceleration'][:, None, :], velocity.shape)
+    return np.repeat(data['track_id'], times.size), {
+      'time': np.tile(times, num_tracks), 'meas': data['meas'].reshape(-1, 3),
+      'truth': data['truth'].reshape(-1, 3), 'truth_velocity': velocity.reshape(-1, 3),
+      'truth_acceleration': acceleration.reshape(-1, 3)}
+
+def load_sim_files(paths):
+  """
+    Load the measurements and truth of SimFileCreator output, per track
+    CSV files (track<i>.csv) and bulk CSV or npz shards, as padded tracks.
+    A per track CSV holds no track id, its track is numbered by its
+    position among the per track files in paths
+
+    Parameters
+    ---------
+    paths: list
+      files written by SimFileCreator
+
+    Returns
+    ---------
+    tracks: dict
+      see pad_tracks, with 'meas' and 'truth' positions, 'truth_velocity'
+      and 'truth_acceleration' (N,T,3)
+  """
+  ids = []
+  rows = []
+  per_track = 0
+  for path in paths:
+    if path.endswith('.npz'):
+      track_id, columns = _read_npz(path)
+    else:
+      track_id, columns = _read_csv(path, per_track)
+      per_track += 1
+    ids.append(track_id)
+    rows.append(columns)
+    logging.debug(f"loaded {track_id.size} measurements from {path}")
+  if not rows:
+    ids = [np.zeros(0)]
+    rows = [{name: np.zeros((0,) if name == 'time' else (0, 3)) for name in CSV_COLUMNS}]
+  columns = {name: np.concatenate([row[name] for row in rows]) for name in CSV_COLUMNS}
+  return pad_tracks(np.concatenate(ids), **columns)
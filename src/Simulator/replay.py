@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import argparse
+import grpc
+import json
+import logging
+import numpy as np
+import os
+import sys
+import time
+
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+src_dir = os.path.dirname(script_path)
+autogen_dir = os.path.join(src_dir,"auto_generated")
+sys.path.insert(1, autogen_dir)
+common_dir = os.path.join(src_dir,"Common")
+sys.path.insert(1, common_dir)
+import measurement_pb2
+import ColumnarCodec
+import CaptureLog
+
+def input_args():
+  """
+    Input argument parser
+    ...
+  """
+  parser = argparse.ArgumentParser(description='Replay captured measurement traffic')
+  parser.add_argument('capture',
+                    help='capture log written by tracker.py --capture')
+  parser.add_argument('-s', '--hostport', default='localhost:50051',
+                    help='server host port')
+  parser.add_argument('-x', '--speed', default=1.0, type=float,
+                    help='Replay speed up over the captured pace, 0 replays as ' +
+                          'fast as possible (default: 1, original pace)')
+  parser.add_argument('-o', '--output', default=None,
+                    help='Write the replay report as JSON to this file')
+  parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Verbose logging')
+  args = parser.parse_args()
+
+  # initialize logger format
+  logLevel = logging.INFO
+  if args.verbose:
+    logLevel = logging.DEBUG
+  logging.basicConfig(
+    format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+          '[%(filename)s:%(lineno)d] %(message)s',
+    datefmt='%Y-%m-%d:%H:%M:%S',
+    level=logLevel)
+  logging.info(f"logging set to {logging.getLevelName(logLevel)}")
+
+  return args
+
+def load_capture(path):
+  """
+    Load a capture log along with the number of measurements of each record,
+    so counting is not part of the replay timing
+
+    Returns
+    ---------
+    records: list
+      (schema, timestamp, data, number of measurements) of every record
+  """
+  records = []
+  for schema, timestamp, data in CaptureLog.read_capture(path):
+    if schema == CaptureLog.SCHEMA_V1:
+      count = len(measurement_pb2.measurement_group.FromString(data).measurements)
+    else:
+      count = ColumnarCodec.decode_measurement_group(data)['x'].size
+    records.append((schema, timestamp, data, count))
+  return records
+
+def replay(records, senders, speed=1.0):
+  """
+    Send captured records, paced by their receive timestamps
+
+    Parameters
+    ---------
+    records: list
+      records as returned by load_capture
+    senders: dict
+      maps each schema to a callable sending its serialized measurement group
+    speed: float
+      speed up over the captured pace, 0 sends as fast as possible
+
+    Returns
+    ---------
+    report: dict
+      groups and measurements sent, elapsed seconds, throughput, and the
+      send latency percentiles in milliseconds
+  """
+  latency = np.zeros(len(records))
+  measurements = 0
+  start = time.perf_counter()
+  for i, (schema, timestamp, data, count) in enumerate(records):
+    if speed > 0:
+      delay = start + (timestamp - records[0][1]) / speed - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+    sent = time.perf_counter()
+    senders[schema](data)
+    latency[i] = time.perf_counter() - sent
+    measurements += count
+  elapsed = time.perf_counter() - start
+  report = {'groups': len(records), 'measurements': measurements,
+            'elapsed': elapsed, 'speed': speed,
+            'groups_per_second': len(records) / elapsed if elapsed else 0.0,
+            'measurements_per_second': measurements / elapsed if elapsed else 0.0}
+  for percentile in (50, 90, 99, 100):
+    report[f'latency_p{percentile}_ms'] = (float(np.percentile(latency, percentile)) * 1e3
+                                           if latency.size else 0.0)
+  return report
+
+def run(args):
+  """
+    Replays a capture log against the tracker
+  """
+  records = load_capture(args.capture)
+  logging.info(f"replaying {len(records)} measurement groups from {args.capture}")
+  with grpc.insecure_channel(args.hostport) as channel:
+    v1_send = channel.unary_unary('/MeasurementProducer/ProcessMeasurement',
+                                  request_serializer=lambda data: data)
+    senders = {CaptureLog.SCHEMA_V1: v1_send,
+               CaptureLog.SCHEMA_V2: ColumnarCodec.MeasurementProducerV2Stub(channel).ProcessMeasurement}
+    report = replay(records, senders, args.speed)
+  logging.info(f"replayed {report['groups']} groups ({report['measurements']} measurements) " +
+               f"in {report['elapsed']:.3f} s, {report['groups_per_second']:.1f} groups/s " +
+               f"{report['measurements_per_second']:.1f} measurements/s, latency ms " +
+               f"p50 {report['latency_p50_ms']:.3f} p90 {report['latency_p90_ms']:.3f} " +
+               f"p99 {report['latency_p99_ms']:.3f} max {report['latency_p100_ms']:.3f}")
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  return report
+
+if __name__ == "__main__":
+  args = input_args()
+  run(args)
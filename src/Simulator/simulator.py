@@ -4,18 +4,19 @@ import grpc
 import logging
 import numpy as np
 import os
-import random
 import sys
 import time
 
-from google.protobuf import text_format
-
 script_path = os.path.dirname(os.path.abspath( __file__ ))
 src_dir = os.path.dirname(script_path)
 autogen_dir = os.path.join(src_dir,"auto_generated")
 sys.path.insert(1, autogen_dir)
+common_dir = os.path.join(src_dir,"Common")
+sys.path.insert(1, common_dir)
 import measurement_pb2_grpc
 import measurement_pb2
+import ColumnarCodec
+from StreamWindow import StreamWindow
 
 def input_args():
   """
@@ -33,7 +34,27 @@ def input_args():
                     help='Verbose logging')
   parser.add_argument('-t', '--time', default=120, type=int,
                     help='Length of the scenario in seconds (default:120)')
+  parser.add_argument('-n', '--numtarget', default=1, type=int,
+                    help='Number of simulated targets (default: 1)')
+  parser.add_argument('-p', '--period', default=2.0, type=float,
+                    help='Seconds between scans (default: 2)')
+  parser.add_argument('--seed', default=None, type=int,
+                    help='Seed of the random generator, repeatable scenarios ' +
+                          'are produced for a fixed seed')
+  parser.add_argument('--schema', default='v1', choices=['v1', 'v2'],
+                    help='Measurement message schema' +
+                          '  option - description' +
+                          '  v1 = group of serialized measurements' +
+                          '  v2 = columnar measurement group')
+  parser.add_argument('--stream', action='store_true',
+                    help='Send measurement groups over the streaming ' +
+                          'StreamMeasurements RPC (v1 schema only)')
+  parser.add_argument('-w', '--window', type=int, default=8,
+                    help='Maximum unacknowledged measurement groups in flight ' +
+                          'when streaming (default: 8)')
   args = parser.parse_args()
+  if args.stream and args.schema != 'v1':
+    parser.error("--stream requires the v1 schema")
 
   # initialize logger format
   logLevel = logging.INFO
@@ -54,49 +75,82 @@ class Simulator:
     A Class used for managing simulated targets, maintianing their current 
     state, estimating true postion, and measured postion (added uncertainty)
 
+    The state of every target is held in (N,3) arrays so a scan of any
+    number of targets is propagated and measured in single vectorized steps
+
     Attributes
     ---------
-    positions: List
-              a python list of simulated target measurements 
-              as defined by measurement_pb2.measurement
-    x_vel: float
-          The simulated targets instanteous velocity in the x coordinate
-    y_vel: float
-          The simulated targets instanteous velocity in the y coordinate
-    z_vel: float
-          The simulated targets instanteous velocity in the z coordinate
+    positions: np array
+              true position of each target at self.time (N,3)
+    velocities: np array
+              true velocity of each target (N,3)
+    accelerations: np array
+              constant acceleration of each target (N,3)
+    time: float
+          the time the target state is valid at
     sigma: double
           The uncertainty in the measured postion for each corrdinate
           (assumes equal value for each coordinate)
+    rng: np.random.Generator
+          seeded generator used for the measurement noise
     
     Methods
     -------
+    predict_columns()
+      propagate every target to a new time and produce the measured and
+      true positions as measurement columns (ColumnarCodec.MEASUREMENT_FIELDS)
     predict_at_time()
       given a provided input time this method will produce a new measurement
       group containing both measured and true positions for each target being 
       being managed by the Simulator class (self.positions)
     
   """
-  def __init__(self, x_init, y_init, z_init, 
-                      x_vel=0, y_vel=0, z_vel=0,
-                      x_acc=0, y_acc=0, z_acc=0,
-                      time=time.time()):
-    # TODO this currently only implements a single simulated target
-    # This should be updated to maintain multiple targets
-    self.positions = [measurement_pb2.measurement(x=x_init,
-                                                y=y_init,
-                                                z=z_init,
-                                                time=time)]
-    self.x_vel = x_vel
-    self.y_vel = y_vel
-    self.z_vel = z_vel
-    self.x_acc = x_acc
-    self.y_acc = y_acc
-    self.z_acc = z_acc
+  def __init__(self, positions, velocities=None, accelerations=None,
+                      time=time.time(), sigma=0.1, seed=None):
+    self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+    self.velocities = np.zeros_like(self.positions)
+    if velocities is not None:
+      self.velocities[:] = np.reshape(velocities, (-1, 3))
+    self.accelerations = np.zeros_like(self.positions)
+    if accelerations is not None:
+      self.accelerations[:] = np.reshape(accelerations, (-1, 3))
+    self.time = time
     # TODO assumes equal error values in each corrdinate direction
     # It would be good to improve this to provide a more detailed uncertatiny
     # error values
-    self.sigma = 0.1
+    self.sigma = sigma
+    self.rng = np.random.default_rng(seed)
+
+  def predict_columns(self, time):
+    """
+      Propagate every target to time and measure it
+
+      Parameters
+      --------
+      time: float
+        The time at which you wish the targets to be prdicted too, times
+        before the current target state leave the targets in place
+
+      Returns
+      ---------
+        columns: dict
+          maps each name in ColumnarCodec.MEASUREMENT_FIELDS to an array
+          holding the value of every target (N,)
+    """
+    dt = max(time - self.time, 0)
+    logging.debug(f"predicting {self.positions.shape[0]} targets " +
+                  f"to time {time} with a dt of {dt}")
+    self.positions += self.velocities * dt + 0.5 * self.accelerations * dt ** 2
+    self.velocities += self.accelerations * dt
+    self.time = max(time, self.time)
+    new_true_pos = np.around(self.positions, 4)
+    # add uncertainty to the new position
+    new_pos = np.around(self.rng.normal(new_true_pos, self.sigma), 3)
+    columns = {'time': np.full(new_pos.shape[0], float(time))}
+    for i, axis in enumerate('xyz'):
+      columns[axis] = new_pos[:, i]
+      columns['true_' + axis] = new_true_pos[:, i]
+    return columns
 
   def predict_at_time(self, time) -> measurement_pb2.measurement_group:
     """
@@ -118,69 +172,37 @@ class Simulator:
           of each target being maintained by the simulator (self.positions) at 
           the desired time
     """
-    # Predict the position forward
-    new_meas_group = measurement_pb2.measurement_group()
-    for i in range(len(self.positions)):
-      dt = time - self.positions[i].time
-      if dt < 0:
-        dt = 0
-      logging.debug(f"predicting measurement position {i} " +
-                    f"to time {time} with a dt of {dt}")
-
-      pos = np.array([[self.positions[i].x],
-                      [self.positions[i].y],
-                      [self.positions[i].z]])
-      vel = np.array([[self.x_vel],
-                      [self.y_vel],
-                      [self.z_vel]])
-      acc = np.array([[self.x_acc],
-                      [self.y_acc],
-                      [self.z_acc]])
-      new_true_pos = pos + vel * dt + 0.5 * acc ** 2    
-      new_true_pos = np.around(new_true_pos,4)
-      print(f"new_true_pos {new_true_pos}")
-      # add uncertainty to the new position
-      new_pos = random.gauss(new_true_pos, self.sigma)
-      new_pos = np.around(new_pos,3)
-      print(f"new_pos {new_pos}")
-      new_meas = measurement_pb2.measurement(x=new_pos[0],
-                                              y=new_pos[1],
-                                              z=new_pos[2],
-                                              time=time,
-                                              true_x=new_true_pos[0],
-                                              true_y=new_true_pos[1],
-                                              true_z=new_true_pos[2])
-      text_proto = text_format.MessageToString(new_meas)
-      output_str = text_format.Parse(text_proto, measurement_pb2.measurement())
-      logging.debug(f"output: \n {output_str}")
-      new_meas_group.measurements.append(new_meas.SerializeToString())
+    new_meas_group = measurement_pb2.measurement_group(
+      measurements=ColumnarCodec.encode_measurements_v1(self.predict_columns(time)))
     logging.info(f"Producing a new measurement group with " +
                  f"{len(new_meas_group.measurements)} measurements")
     return new_meas_group
     
 
-def initialize_track_creation():
+def initialize_track_creation(num_targets=1, rng=None):
+  """
+    Random initial state of num_targets targets, positions within a 100 unit
+    cube moving in a random direction at 400 to 600 MPH
+
+    Returns
+    ---------
+    positions, velocities, accelerations: np array
+      initial state of each target (N,3)
+  """
+  if rng is None:
+    rng = np.random.default_rng()
   # Set initial positions for the targets to be simulated
-  init_x = random.uniform(0,100)
-  init_y = random.uniform(0,100)
-  init_z = random.uniform(0,100)
+  positions = rng.uniform(0, 100, size=(num_targets, 3))
 
   # Create a random vector with a mag between 400 and 600
-  rand_Vector = np.random.randint(0, 100, size=(3))
-  rand_UnitVector = rand_Vector / np.linalg.norm(rand_Vector)
-  rand_mag = random.uniform(400, 600) # in MPH
+  rand_Vector = rng.integers(1, 100, size=(num_targets, 3))
+  rand_UnitVector = rand_Vector / np.linalg.norm(rand_Vector, axis=1, keepdims=True)
+  rand_mag = rng.uniform(400, 600, size=(num_targets, 1)) # in MPH
   rand_mag = rand_mag/60/60 # in MPS
-  rand_Vector = rand_UnitVector * rand_mag
-  rand_Vector = np.around(rand_Vector, 4)
-
-  velx = rand_Vector[0]
-  vely = rand_Vector[1]
-  velz = rand_Vector[2]
+  velocities = np.around(rand_UnitVector * rand_mag, 4)
 
-  accx = 0.0
-  accy = 0.0
-  accz = 0.0
-  return init_x, init_y, init_z, velx, vely, velz, accx, accy, accz
+  accelerations = np.zeros((num_targets, 3))
+  return positions, velocities, accelerations
 
 def run(args):
   """
@@ -188,43 +210,60 @@ def run(args):
   """
   starttime = time.time()
   logging.debug(f"run time {starttime}")
-  init_x, init_y, init_z, velx, vely, velz, accx, accy, accz = initialize_track_creation()
-  sim = Simulator(init_x, init_y, init_z,
-                  x_vel=velx, y_vel=vely, z_vel=velz, 
-                  x_acc=accx, y_acc=accy, z_acc=accz, 
-                      time=0)
+  rng = np.random.default_rng(args.seed)
+  positions, velocities, accelerations = initialize_track_creation(args.numtarget, rng)
+  sim = Simulator(positions, velocities, accelerations, time=0, seed=rng)
   f = None
   if (args.filepath):
     f = open(args.filepath, 'w')
     f.write("# Measurement time, meas_x, meas_y, meas_z, true_x, true_y, true_z, true_velx, true_vely, true_velz, true_accx, true_accy, true_accz\n")
 
   run_time = 0 
+  channel = None
+  stream = None
   while run_time < args.time:
     try:
-      # Connect to the track consumer
-      with grpc.insecure_channel(args.hostport) as channel:
-        stub = measurement_pb2_grpc.MeasurementProducerStub(channel)
-        # Grab the current time and predict the simulated measurement to this time
-        updatetime = round(time.time() - starttime,3)
-        logging.debug(f"updatetiem {updatetime}")
-        measurement_update = sim.predict_at_time(updatetime)
-        stub.ProcessMeasurement(measurement_update)
-        for i in range(len(measurement_update.measurements)):
-          measurement = measurement_pb2.measurement()
-          measurement.ParseFromString(measurement_update.measurements[i])
-          print(f"measurements{ measurement.time}")
-          if f:
-            f.write(f"{measurement.time},{measurement.x},{measurement.y},{measurement.z},"
-                    f"{measurement.true_x},{measurement.true_y},{measurement.true_z},"
-                    f"{velx},{vely},{velz},"
-                    f"{accx},{accy},{accz}\n")
-        # repeat measurement production every 5 seconds
-        time.sleep(2)
-    except grpc.RpcError as rpc_error:
+      # Grab the current time and predict the simulated measurements to this time
+      updatetime = round(time.time() - starttime,3)
+      logging.debug(f"updatetiem {updatetime}")
+      columns = sim.predict_columns(updatetime)
+      if args.stream:
+        # Keep a single stream open for the whole run
+        if stream is None:
+          channel = grpc.insecure_channel(args.hostport)
+          stub = measurement_pb2_grpc.MeasurementProducerStub(channel)
+          stream = StreamWindow(stub.StreamMeasurements, args.window)
+        stream.send(measurement_pb2.measurement_group(
+          measurements=ColumnarCodec.encode_measurements_v1(columns)))
+      else:
+        # Connect to the track consumer
+        with grpc.insecure_channel(args.hostport) as channel:
+          if args.schema == 'v2':
+            stub = ColumnarCodec.MeasurementProducerV2Stub(channel)
+            stub.ProcessMeasurement(ColumnarCodec.encode_measurement_group(columns))
+          else:
+            stub = measurement_pb2_grpc.MeasurementProducerStub(channel)
+            stub.ProcessMeasurement(measurement_pb2.measurement_group(
+              measurements=ColumnarCodec.encode_measurements_v1(columns)))
+      logging.info(f"sent scan of {len(columns['x'])} measurements at {updatetime}")
+      if f:
+        np.savetxt(f, np.column_stack([columns[name] for name in
+                                       ('time', 'x', 'y', 'z', 'true_x', 'true_y', 'true_z')] +
+                                      [sim.velocities, sim.accelerations]),
+                   delimiter=',', fmt='%.15g')
+      # repeat measurement production every scan period
+      time.sleep(args.period)
+    except (grpc.RpcError, RuntimeError) as rpc_error:
       # Failed to connect, retry in 5 seconds
-      logging.warning(f"failed to connect {rpc_error.code()}, retry in 5 seconds")
+      logging.warning(f"failed to connect {rpc_error}, retry in 5 seconds")
+      if stream:
+        channel.close()
+        stream = None
       time.sleep(5)
     run_time = time.time() - starttime
+  if stream:
+    stream.close()
+    channel.close()
   if f:
     f.close()
 
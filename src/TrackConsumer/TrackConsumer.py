@@ -2,8 +2,10 @@
 import argparse
 import grpc
 import logging
+import numpy as np
 import os
 import sys
+import time
 
 from concurrent import futures
 
@@ -11,8 +13,15 @@ script_path = os.path.dirname(os.path.abspath( __file__ ))
 src_dir = os.path.dirname(script_path)
 autogen_dir = os.path.join(src_dir,"auto_generated")
 sys.path.insert(1, autogen_dir)
+common_dir = os.path.join(src_dir,"Common")
+sys.path.insert(1, common_dir)
 import measurement_pb2_grpc
 import measurement_pb2
+import ColumnarCodec
+import HotLog
+import Metrics
+from TrackFileWriter import TrackFileWriter
+import TrackStore
 
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
@@ -24,6 +33,26 @@ def input_args():
   parser = argparse.ArgumentParser(description='Run Tracker')
   parser.add_argument('-r', '--recvport',type=int, default=50052,
                     help='recieve port')
+  parser.add_argument('-o', '--output', default="text",
+                    choices=('text', 'binary'),
+                    help='Track file format' +
+                          '  option - description' +
+                          '  text = trk/meas text lines written to track.track' +
+                          '  binary = memory mappable TrackStore records written to ' +
+                          'track.bin with a track.bin.idx index')
+  parser.add_argument('-i', '--flushinterval', type=float, default=1.0,
+                    help='Maximum seconds track data is buffered before it ' +
+                          'is written to file (default: 1)')
+  parser.add_argument('-b', '--flushsize', type=int, default=1 << 20,
+                    help='Buffered characters that trigger a write to file ' +
+                          '(default: 1048576)')
+  parser.add_argument('--metricsport', type=int, default=None,
+                    help='Serve Prometheus text format metrics on this port')
+  parser.add_argument('--statsinterval', type=float, default=None,
+                    help='Log a line of consumer statistics every this many seconds')
+  parser.add_argument('--logsample', type=int, default=1,
+                    help='Only log one in every this many of the per track group ' +
+                          'log lines (default: 1, log every line)')
   parser.add_argument('-v', '--verbose', action='store_true',
                     help='Verbose logging')
   args = parser.parse_args()
@@ -36,11 +65,47 @@ def input_args():
                    '[%(filename)s:%(lineno)d] %(message)s',
     datefmt='%Y-%m-%d:%H:%M:%S',
     level=logLevel)
+  HotLog.configure(args.logsample)
   logging.info(f"logging set to {logging.getLevelName(logLevel)}")
   logging.debug(f"Recving data on port {args.recvport}")
 
   return args
 
+class ConsumerMetrics:
+  """
+    Counters and stage timers of the track groups received by a consumer
+
+    Attributes
+    -----------
+    groups, tracks, measurements, received_bytes: Metrics.Counter
+      track groups, tracks, measurements and serialized bytes received
+    request: Metrics.Histogram
+      time to process a track group
+    stages: dict
+      maps format (decoding and formatting the file records) and write
+      (handing them to the TrackFileWriter) to their Metrics.Histogram
+  """
+  def __init__(self, metrics, schema) -> None:
+    labels = {'schema': schema}
+    self.groups = metrics.counter('consumer_track_groups_total', 'Track groups received', labels)
+    self.tracks = metrics.counter('consumer_tracks_total', 'Tracks received', labels)
+    self.measurements = metrics.counter('consumer_measurements_total',
+                                        'Track measurements received', labels)
+    self.received_bytes = metrics.counter('consumer_received_bytes_total',
+                                          'Serialized size of the track groups received', labels)
+    self.request = metrics.histogram('consumer_request_seconds',
+                                     'Time to process a track group', labels)
+    self.stages = {stage: metrics.histogram('consumer_stage_seconds',
+                                            'Time spent in each stage of the track consumer',
+                                            {'stage': stage})
+                   for stage in ('format', 'write')}
+
+  def received(self, num_tracks, num_measurements, num_bytes) -> None:
+    self.groups.inc()
+    self.tracks.inc(num_tracks)
+    self.measurements.inc(num_measurements)
+    self.received_bytes.inc(num_bytes)
+
 class TrackWriter(measurement_pb2_grpc.TrackProducerServicer):
   """
     A class that functions as a track message group consumer and writes
@@ -48,9 +113,13 @@ class TrackWriter(measurement_pb2_grpc.TrackProducerServicer):
 
     Attributes
     -----------
-    trackfile: string
-      The file path to the location of the file that will store all the track
+    writer: TrackFileWriter
+      The background writer that owns the file storing all the track
       message group data
+    binary: bool
+      write TrackStore records instead of text lines
+    metrics: ConsumerMetrics
+      counters and stage timers of the received track groups
 
     Methods
     -----------
@@ -58,54 +127,165 @@ class TrackWriter(measurement_pb2_grpc.TrackProducerServicer):
   ProcessTrack()
     Implementation of the protobuf defined service interface used to consume
     track groups
+  StreamTracks()
+    Implementation of the protobuf defined streaming service interface used
+    to consume track groups, acknowledges each group once it is queued for
+    writing
+  format_track_group()
+    format a track group as a block of the track file
   """
-  def __init__(self, trackfile) -> None:
-    self.trackfile = trackfile
-    pass
+  def __init__(self, writer, binary=False, metrics=Metrics.REGISTRY) -> None:
+    self.writer = writer
+    self.binary = binary
+    self.metrics = ConsumerMetrics(metrics, 'v1')
 
   def ProcessTrack(self, request, context):
-    with open(self.trackfile, "a") as myfile:
-      logging.info(f"received track group with {len(request.tracks)} tracks, logging to file.")
-      for i in range(len(request.tracks)):
-        track = measurement_pb2.track()
-        track.ParseFromString(request.tracks[i])
-
-        logging.debug(f"received velocity of x: {track.x_velocity}")
-        logging.debug(f"received velocity of y: {track.y_velocity}")
-        logging.debug(f"received velocity of z: {track.z_velocity}")
-        logging.debug(f"using : {len(track.measurements)} measurements")
-        myfile.write(f"trk {track.x_pred_pos} {track.y_pred_pos} {track.z_pred_pos} " +
-                     f"{track.x_velocity} {track.y_velocity} {track.z_velocity} {track.track_id}\n")
-        for i in range(len(track.measurements)):
-          meas = measurement_pb2.measurement()
-          meas.ParseFromString(track.measurements[i])
-
-          myfile.write(f"meas {meas.x} " +
-                       f"{meas.y} " +
-                       f"{meas.z} " + 
-                       f"{meas.true_x} " +
-                       f"{meas.true_y} " +
-                       f"{meas.true_z}\n")
+    self.write_track_group(request)
+    return google_dot_protobuf_dot_empty__pb2.Empty()
 
+  def StreamTracks(self, request_iterator, context):
+    for request in request_iterator:
+      self.write_track_group(request)
+      yield measurement_pb2.ack(sequence=request.sequence)
+
+  def write_track_group(self, request):
+    start = time.perf_counter()
+    HotLog.sampled(logging.INFO, "received track group with %d tracks, logging to file.",
+                   len(request.tracks))
+    with self.metrics.stages['format'].time():
+      block, num_measurements = self.format_track_group(request)
+    with self.metrics.stages['write'].time():
+      self.writer.write(block)
+    self.metrics.received(len(request.tracks), num_measurements, request.ByteSize())
+    self.metrics.request.observe(time.perf_counter() - start)
+
+  def format_track_group(self, request):
+    """
+      The file block of a track group and its number of measurements
+    """
+    if self.binary:
+      tracks = ColumnarCodec.track_group_v1_to_columns(request, measurement_pb2.track,
+                                                       measurement_pb2.measurement)
+      records = TrackStore.records(tracks)
+      return records.tobytes(), records.size - len(request.tracks)
+    lines = []
+    for i in range(len(request.tracks)):
+      track = measurement_pb2.track()
+      track.ParseFromString(request.tracks[i])
+
+      HotLog.debug("received velocity of x: %s y: %s z: %s using : %d measurements",
+                   track.x_velocity, track.y_velocity, track.z_velocity,
+                   len(track.measurements))
+      lines.append(f"trk {track.x_pred_pos} {track.y_pred_pos} {track.z_pred_pos} " +
+                   f"{track.x_velocity} {track.y_velocity} {track.z_velocity} {track.track_id}\n")
+      for i in range(len(track.measurements)):
+        meas = measurement_pb2.measurement()
+        meas.ParseFromString(track.measurements[i])
+
+        lines.append(f"meas {meas.x} " +
+                     f"{meas.y} " +
+                     f"{meas.z} " + 
+                     f"{meas.true_x} " +
+                     f"{meas.true_y} " +
+                     f"{meas.true_z}\n")
+    return "".join(lines), len(lines) - len(request.tracks)
+
+class TrackWriterV2:
+  """
+    A class that functions as a columnar (v2) track group consumer and writes
+    track data to files in the same format as TrackWriter
+
+    Attributes
+    -----------
+    writer: TrackFileWriter
+      The background writer that owns the file storing all the track
+      message group data
+    binary: bool
+      write TrackStore records instead of text lines
+    metrics: ConsumerMetrics
+      counters and stage timers of the received track groups
+
+    Methods
+    -----------
+
+  ProcessTrack()
+    Implementation of the v2 service interface used to consume encoded
+    measurement_v2.track_group messages
+  format_track_group()
+    format decoded track group columns as a block of the track file
+  """
+  def __init__(self, writer, binary=False, metrics=Metrics.REGISTRY) -> None:
+    self.writer = writer
+    self.binary = binary
+    self.metrics = ConsumerMetrics(metrics, 'v2')
+
+  def ProcessTrack(self, request, context):
+    start = time.perf_counter()
+    with self.metrics.stages['format'].time():
+      tracks = ColumnarCodec.decode_track_group(request)
+      block = self.format_track_group(tracks)
+    with self.metrics.stages['write'].time():
+      self.writer.write(block)
+    self.metrics.received(len(tracks['track_id']),
+                          sum(meas['x'].size for meas in tracks['measurements']),
+                          len(request))
+    self.metrics.request.observe(time.perf_counter() - start)
     return google_dot_protobuf_dot_empty__pb2.Empty()
 
+  def format_track_group(self, tracks):
+    """
+      The file block of decoded track group columns
+    """
+    if self.binary:
+      HotLog.sampled(logging.INFO, "received columnar track group with %d tracks, logging to file.",
+                     len(tracks['track_id']))
+      return TrackStore.records(tracks).tobytes()
+    track_rows = np.column_stack([tracks[name] for name in ColumnarCodec.TRACK_FIELDS[1:]] +
+                                 [tracks['track_id']]).tolist()
+    HotLog.sampled(logging.INFO, "received columnar track group with %d tracks, logging to file.",
+                   len(track_rows))
+    lines = []
+    for i in range(len(track_rows)):
+      x, y, z, vel_x, vel_y, vel_z, track_id = track_rows[i]
+      lines.append(f"trk {x} {y} {z} {vel_x} {vel_y} {vel_z} {int(track_id)}\n")
+      if i < len(tracks['measurements']):
+        meas = tracks['measurements'][i]
+        meas_rows = np.column_stack((meas['x'], meas['y'], meas['z'],
+                                     meas['true_x'], meas['true_y'], meas['true_z'])).tolist()
+        lines.extend(f"meas {row[0]} {row[1]} {row[2]} {row[3]} {row[4]} {row[5]}\n"
+                     for row in meas_rows)
+    return "".join(lines)
+
 
 def serve(args):
     """
       Creates the grpc server for processing track groups
     """
-    trackfile = os.path.join(script_path, "track.track" )
-    if (os.path.exists(trackfile)):
-      os.remove(trackfile)
-    with open(trackfile, "w") as myfile:
+    binary = args.output == 'binary'
+    if binary:
+      myfile = TrackStore.TrackStore(os.path.join(script_path, "track.bin"))
+    else:
+      trackfile = os.path.join(script_path, "track.track" )
+      if (os.path.exists(trackfile)):
+        os.remove(trackfile)
+      myfile = open(trackfile, "w")
       myfile.write(f"#trk x_pred_pos y_pred_pos z_pred_pos vel_x vel_y vel_z track_id\n")
       myfile.write(f"#meas x y z true_x true_y true_z\n")
+    writer = TrackFileWriter(myfile, args.flushinterval, args.flushsize)
+    reporters = Metrics.start(Metrics.REGISTRY, args.metricsport, args.statsinterval)
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    measurement_pb2_grpc.add_TrackProducerServicer_to_server(TrackWriter(trackfile), 
+    measurement_pb2_grpc.add_TrackProducerServicer_to_server(TrackWriter(writer, binary), 
                                                              server)
+    ColumnarCodec.add_TrackProducerV2_to_server(TrackWriterV2(writer, binary), server)
     server.add_insecure_port('[::]:' + str(args.recvport))
     server.start()
-    server.wait_for_termination()
+    try:
+      server.wait_for_termination()
+    finally:
+      writer.close()
+      myfile.close()
+      for reporter in reporters:
+        reporter.close()
 
 if __name__ == "__main__":
   args = input_args()
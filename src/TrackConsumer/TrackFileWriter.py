@@ -0,0 +1,99 @@
+import logging
+import queue
+import threading
+import time
+
+class TrackFileWriter:
+  """
+    A class that owns the track file and writes to it from a single long
+    lived thread. Track groups are handed over as formatted blocks through
+    a queue, so file I/O is no longer part of the RPC latency. Blocks are
+    gathered into one large buffered write, flushed once flush_size bytes
+    are buffered or flush_interval seconds have passed. A block is always
+    written whole, so concurrent track groups never interleave in the file
+
+    Attributes
+    -----------
+    trackfile: file
+      open file the track data is appended to, text or binary to match
+      the blocks being written
+    flush_interval: float
+      maximum number of seconds a block is buffered before it is written
+    flush_size: int
+      number of buffered bytes (or characters) that triggers a write
+
+    Methods
+    -----------
+    write()
+      queue a block to be written
+    flush()
+      write everything queued so far and wait for it
+    close()
+      flush and stop the writer thread
+  """
+  def __init__(self, trackfile, flush_interval=1.0, flush_size=1 << 20,
+               max_queue=1024) -> None:
+    self.trackfile = trackfile
+    self.flush_interval = flush_interval
+    self.flush_size = flush_size
+    self._queue = queue.Queue(maxsize=max_queue)
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def write(self, block) -> None:
+    """
+      Queue a block to be written, blocks when max_queue blocks are waiting
+
+      Parameters
+      -----------
+      block: str or bytes
+        all the lines/records of one track group
+    """
+    self._queue.put(block)
+
+  def flush(self) -> None:
+    """
+      Write everything queued so far and wait for it
+    """
+    done = threading.Event()
+    self._queue.put(done)
+    done.wait()
+
+  def close(self) -> None:
+    """
+      Flush and stop the writer thread
+    """
+    self._queue.put(None)
+    self._thread.join()
+
+  def _write(self, buffer):
+    if buffer:
+      self.trackfile.write(buffer[0][:0].join(buffer))
+      self.trackfile.flush()
+      logging.debug(f"wrote {len(buffer)} blocks to {self.trackfile.name}")
+
+  def _run(self):
+    buffer = []
+    size = 0
+    deadline = None
+    while True:
+      try:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        block = self._queue.get(timeout=timeout)
+      except queue.Empty:
+        block = False
+      if isinstance(block, (str, bytes)):
+        if not buffer:
+          deadline = time.monotonic() + self.flush_interval
+        buffer.append(block)
+        size += len(block)
+        if size < self.flush_size and time.monotonic() < deadline:
+          continue
+      self._write(buffer)
+      buffer = []
+      size = 0
+      deadline = None
+      if isinstance(block, threading.Event):
+        block.set()
+      elif block is None:
+        return
@@ -0,0 +1,223 @@
+import numpy as np
+import os
+
+# Every row of a track store is one fixed width record. A track row holds the
+# predicted position and velocity of a track, it is followed by one
+# measurement row per measurement published with it holding the measured and
+# true positions. The time of a track row is the time of its newest
+# measurement, NaN when it was published without measurements
+TRACK_ROW = 0
+MEAS_ROW = 1
+RECORD_DTYPE = np.dtype([('kind', '<i4'), ('track_id', '<i4'), ('time', '<f8'),
+                         ('x', '<f8'), ('y', '<f8'), ('z', '<f8'),
+                         ('u', '<f8'), ('v', '<f8'), ('w', '<f8')])
+# One index entry per track row, the time of the track row, the record row
+# it starts at and the number of records (the track row and its measurement
+# rows) that belong to it
+INDEX_DTYPE = np.dtype([('track_id', '<i4'), ('count', '<i4'), ('time', '<f8'),
+                        ('row', '<i8')])
+
+MAGIC = b'KPYTRK\x00\x01'
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'),
+                         ('record_size', '<u4'), ('reserved', 'V48')])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+INDEX_SUFFIX = '.idx'
+
+def records(tracks):
+  """
+    Build the records of a track group
+
+    Parameters
+    ---------
+    tracks: dict
+      track columns as returned by ColumnarCodec.decode_track_group
+
+    Returns
+    ---------
+    rows: np array
+      RECORD_DTYPE records, each track row followed by its measurement rows
+  """
+  num_tracks = len(tracks['track_id'])
+  history = list(tracks.get('measurements', []))
+  history += [None] * (num_tracks - len(history))
+  counts = np.array([0 if meas is None else len(meas['x']) for meas in history],
+                    dtype=np.int64)
+  track_rows = np.arange(num_tracks) + np.concatenate(([0], np.cumsum(counts)[:-1]))
+  rows = np.zeros(num_tracks + int(counts.sum()), dtype=RECORD_DTYPE)
+  rows['track_id'] = np.repeat(np.asarray(tracks['track_id'], dtype=np.int32), counts + 1)
+  rows['kind'] = MEAS_ROW
+
+  track = rows[track_rows]
+  track['kind'] = TRACK_ROW
+  track['time'] = np.nan
+  for name, column in zip('xyzuvw', ('x_pred_pos', 'y_pred_pos', 'z_pred_pos',
+                                     'x_velocity', 'y_velocity', 'z_velocity')):
+    track[name] = tracks[column]
+
+  present = [meas for meas in history if meas is not None and len(meas['x'])]
+  if present:
+    meas_rows = np.ones(rows.size, dtype=bool)
+    meas_rows[track_rows] = False
+    meas = rows[meas_rows]
+    for name, column in zip(('time', 'x', 'y', 'z', 'u', 'v', 'w'),
+                            ('time', 'x', 'y', 'z', 'true_x', 'true_y', 'true_z')):
+      meas[name] = np.concatenate([columns[column] for columns in present])
+    rows[meas_rows] = meas
+    has_meas = counts > 0
+    track['time'][has_meas] = np.maximum.reduceat(meas['time'],
+                                                  np.cumsum(counts)[has_meas] - counts[has_meas])
+  rows[track_rows] = track
+  return rows
+
+def index(rows, start=0):
+  """
+    Index entries of a block of records
+
+    Parameters
+    ---------
+    rows: np array
+      RECORD_DTYPE records as built by records()
+    start: int
+      row of the first record within the store
+
+    Returns
+    ---------
+    entries: np array
+      INDEX_DTYPE entry of every track row in rows
+  """
+  track_rows = np.nonzero(rows['kind'] == TRACK_ROW)[0]
+  entries = np.zeros(track_rows.size, dtype=INDEX_DTYPE)
+  entries['track_id'] = rows['track_id'][track_rows]
+  entries['time'] = rows['time'][track_rows]
+  entries['row'] = track_rows + start
+  entries['count'] = np.diff(np.append(track_rows, rows.size))
+  return entries
+
+def _header():
+  header = np.zeros(1, dtype=HEADER_DTYPE)
+  header['magic'] = MAGIC
+  header['version'] = VERSION
+  header['record_size'] = RECORD_DTYPE.itemsize
+  return header.tobytes()
+
+class TrackStore:
+  """
+    An append only binary track store, a header followed by fixed width
+    RECORD_DTYPE records, with an INDEX_DTYPE sidecar (path + INDEX_SUFFIX)
+    locating the records of every published track. It behaves like a
+    binary file, so it can be handed to a TrackFileWriter, every write must
+    hold whole blocks of records built by records()
+
+    Attributes
+    -----------
+    name: str
+      path of the record file
+    rows: int
+      number of records written so far
+
+    Methods
+    -----------
+    write()
+      append a block of records and index it
+    flush()
+      flush both files
+    close()
+      close both files
+  """
+  def __init__(self, path) -> None:
+    self.name = path
+    self.rows = 0
+    self._records = open(path, 'wb')
+    self._index = open(path + INDEX_SUFFIX, 'wb')
+    self._records.write(_header())
+    self._index.write(_header())
+
+  def write(self, data) -> None:
+    rows = np.frombuffer(data, dtype=RECORD_DTYPE)
+    self._records.write(data)
+    self._index.write(index(rows, self.rows).tobytes())
+    self.rows += rows.size
+
+  def flush(self) -> None:
+    self._records.flush()
+    self._index.flush()
+
+  def close(self) -> None:
+    self._records.close()
+    self._index.close()
+
+def _open(path, dtype):
+  header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+  if header.size != 1 or header['magic'][0] != MAGIC:
+    raise ValueError(f"{path} is not a track store")
+  if header['version'][0] != VERSION or header['record_size'][0] != RECORD_DTYPE.itemsize:
+    raise ValueError(f"{path} has unsupported version {header['version'][0]}")
+  count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+  if count == 0:
+    return np.zeros(0, dtype=dtype)
+  return np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+class TrackStoreReader:
+  """
+    Memory mapped reader of a TrackStore, only the records that are
+    accessed are read from disk
+
+    Attributes
+    -----------
+    records: np array
+      memory mapped RECORD_DTYPE records of the whole store
+    entries: np array
+      memory mapped INDEX_DTYPE entries of the whole store
+
+    Methods
+    -----------
+    track_ids()
+      ids of every track in the store
+    track()
+      the track and measurement rows of one track
+  """
+  def __init__(self, path) -> None:
+    self.records = _open(path, RECORD_DTYPE)
+    self.entries = _open(path + INDEX_SUFFIX, INDEX_DTYPE)
+    # ignore a trailing block whose index entries were not written yet
+    end = 0
+    if self.entries.size:
+      end = self.entries['row'][-1] + self.entries['count'][-1]
+    self.records = self.records[:end]
+
+  def track_ids(self):
+    """
+      Ids of every track in the store
+    """
+    return np.unique(self.entries['track_id'])
+
+  def track(self, track_id, start=-np.inf, end=np.inf):
+    """
+      The track and measurement rows of one track
+
+      Parameters
+      ---------
+      track_id: int
+        id of the track
+      start, end: float
+        only the track rows timed within [start, end] are returned, with
+        the measurement rows published with them
+
+      Returns
+      ---------
+      track_rows: np array
+        RECORD_DTYPE track rows of the track in the order they were published
+      meas_rows: np array
+        RECORD_DTYPE measurement rows published with the track
+    """
+    entries = self.entries[(self.entries['track_id'] == track_id) &
+                           ~(self.entries['time'] < start) &
+                           ~(self.entries['time'] > end)]
+    if entries.size == 0:
+      return np.zeros(0, dtype=RECORD_DTYPE), np.zeros(0, dtype=RECORD_DTYPE)
+    rows = np.concatenate([self.records[row:row + count]
+                           for row, count in zip(entries['row'].tolist(),
+                                                 entries['count'].tolist())])
+    track_rows = rows['kind'] == TRACK_ROW
+    return rows[track_rows], rows[~track_rows]
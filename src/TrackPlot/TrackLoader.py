@@ -0,0 +1,195 @@
+import io
+import logging
+import numpy as np
+
+import TrackStore
+
+# Columns of the trk and meas records of a track file, named after the
+# header TrackConsumer writes
+TRACK_COLUMNS = ('x_pred_pos', 'y_pred_pos', 'z_pred_pos',
+                 'vel_x', 'vel_y', 'vel_z', 'track_id')
+MEAS_COLUMNS = ('x', 'y', 'z', 'true_x', 'true_y', 'true_z')
+
+DEFAULT_CHUNK_SIZE = 1 << 26
+
+def _empty():
+  tracks = {name: np.zeros(0) for name in TRACK_COLUMNS}
+  tracks['track_id'] = np.zeros(0, dtype=np.int64)
+  tracks['update'] = np.zeros(0, dtype=np.int64)
+  meas = {name: np.zeros(0) for name in MEAS_COLUMNS}
+  meas['time'] = np.zeros(0)
+  meas['track_id'] = np.zeros(0, dtype=np.int64)
+  meas['update'] = np.zeros(0, dtype=np.int64)
+  return tracks, meas
+
+def _parse(lines, kind, width):
+  rows = [line for line in lines if line.startswith(kind)]
+  if not rows:
+    return np.zeros((0, width - 1))
+  return np.loadtxt(io.BytesIO(b'\n'.join(rows)), usecols=range(1, width), ndmin=2)
+
+def _parse_text(data, first_update, last_track_id):
+  """
+    Parse a block of whole trk/meas lines into track and measurement columns
+  """
+  lines = data.split(b'\n')
+  kinds = np.array([line[:1] for line in lines])
+  is_trk = kinds == b't'
+  is_meas = kinds == b'm'
+  trk = _parse(lines, b'trk ', len(TRACK_COLUMNS) + 1)
+  meas_rows = _parse(lines, b'meas ', len(MEAS_COLUMNS) + 1)
+
+  tracks = dict(zip(TRACK_COLUMNS, trk.T))
+  tracks['track_id'] = tracks['track_id'].astype(np.int64)
+  tracks['update'] = first_update + np.arange(trk.shape[0])
+  # every meas line belongs to the trk line before it, possibly in a
+  # previous block
+  owner = np.cumsum(is_trk)[is_meas]
+  meas = dict(zip(MEAS_COLUMNS, meas_rows.T))
+  # text files do not record the measurement times
+  meas['time'] = np.full(meas_rows.shape[0], np.nan)
+  meas['track_id'] = np.concatenate(([last_track_id], tracks['track_id']))[owner]
+  meas['update'] = first_update + owner - 1
+  return tracks, meas
+
+def _filter(tracks, meas, track_ids):
+  if track_ids is None:
+    return tracks, meas
+  keep = np.isin(tracks['track_id'], track_ids)
+  tracks = {name: column[keep] for name, column in tracks.items()}
+  keep = np.isin(meas['track_id'], track_ids)
+  meas = {name: column[keep] for name, column in meas.items()}
+  return tracks, meas
+
+def _iter_text(path, chunk_size):
+  first_update = 0
+  last_track_id = -1
+  with open(path, 'rb') as f:
+    leftover = b''
+    while True:
+      data = f.read(chunk_size)
+      if data:
+        data = leftover + data
+        end = data.rfind(b'\n') + 1
+        data, leftover = data[:end], data[end:]
+        if not data:
+          # no whole line yet, keep reading
+          continue
+      elif leftover:
+        data, leftover = leftover, b''
+      else:
+        return
+      tracks, meas = _parse_text(data, first_update, last_track_id)
+      first_update += tracks['update'].size
+      if tracks['track_id'].size:
+        last_track_id = tracks['track_id'][-1]
+      yield tracks, meas
+
+def _iter_store(path, chunk_size):
+  records = TrackStore.TrackStoreReader(path).records
+  chunk_rows = max(chunk_size // TrackStore.RECORD_DTYPE.itemsize, 1)
+  first_update = 0
+  for start in range(0, records.size, chunk_rows):
+    rows = np.asarray(records[start:start + chunk_rows])
+    is_trk = rows['kind'] == TrackStore.TRACK_ROW
+    update = first_update + np.cumsum(is_trk) - 1
+    trk = rows[is_trk]
+    meas_rows = rows[~is_trk]
+    tracks = {name: trk[field] for name, field in zip(TRACK_COLUMNS, 'xyzuvw')}
+    tracks['track_id'] = trk['track_id'].astype(np.int64)
+    tracks['update'] = update[is_trk]
+    meas = {name: meas_rows[field] for name, field in zip(MEAS_COLUMNS, 'xyzuvw')}
+    meas['time'] = meas_rows['time']
+    meas['track_id'] = meas_rows['track_id'].astype(np.int64)
+    meas['update'] = update[~is_trk]
+    first_update += trk.size
+    yield tracks, meas
+
+def is_track_store(path):
+  """
+    True when path is a binary TrackStore rather than a text track file
+  """
+  with open(path, 'rb') as f:
+    return f.read(len(TrackStore.MAGIC)) == TrackStore.MAGIC
+
+def iter_tracks(path, chunk_size=DEFAULT_CHUNK_SIZE, track_ids=None):
+  """
+    Stream a track file in chunks, only one chunk is held in memory
+
+    Parameters
+    ---------
+    path: str
+      text track file or binary TrackStore written by TrackConsumer
+    chunk_size: int
+      number of bytes read per chunk
+    track_ids: list
+      only load these tracks, None loads every track
+
+    Yields
+    ---------
+    tracks: dict
+      maps each name in TRACK_COLUMNS to an array of the track updates in
+      the chunk, and 'update' to the index of each update in the file
+    meas: dict
+      maps each name in MEAS_COLUMNS to an array of the measurements in the
+      chunk, their 'time' (NaN for text files, which do not record it),
+      'track_id' and 'update' identify the track update each measurement
+      was published with
+  """
+  chunks = _iter_store if is_track_store(path) else _iter_text
+  for tracks, meas in chunks(path, chunk_size):
+    logging.debug(f"loaded {tracks['update'].size} track updates and " +
+                  f"{meas['update'].size} measurements from {path}")
+    yield _filter(tracks, meas, track_ids)
+
+def load_tracks(path, chunk_size=DEFAULT_CHUNK_SIZE, track_ids=None):
+  """
+    Load a whole track file, see iter_tracks for the parameters
+
+    Returns
+    ---------
+    tracks, meas: dict
+      the columns of every chunk concatenated
+  """
+  chunks = list(iter_tracks(path, chunk_size, track_ids))
+  tracks, meas = _empty()
+  if chunks:
+    tracks = {name: np.concatenate([chunk[0][name] for chunk in chunks])
+              for name in tracks}
+    meas = {name: np.concatenate([chunk[1][name] for chunk in chunks])
+            for name in meas}
+  logging.info(f"loaded {tracks['update'].size} track updates and " +
+               f"{meas['update'].size} measurements from {path}")
+  return tracks, meas
+
+def last_measurements(meas):
+  """
+    Index of the last measurement published with each track update
+  """
+  update = meas['update']
+  return np.nonzero(np.append(update[1:] != update[:-1], True))[0] if update.size else update
+
+def decimate(size, max_points):
+  """
+    Level of detail decimation, index of at most max_points evenly strided
+    points out of size, always keeping the last point
+
+    Parameters
+    ---------
+    size: int
+      number of points
+    max_points: int
+      maximum number of points to keep
+
+    Returns
+    ---------
+    idx: np array
+      index of the points kept
+  """
+  if size <= max_points:
+    return np.arange(size)
+  step = -(-size // max_points)
+  idx = np.arange(0, size, step)
+  if idx[-1] != size - 1:
+    idx[-1] = size - 1
+  return idx
@@ -2,14 +2,27 @@
 import argparse
 import logging
 import matplotlib.pyplot as plt
-import numpy as np
 import os
 import sys
 
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+src_dir = os.path.dirname(script_path)
+consumer_dir = os.path.join(src_dir,"TrackConsumer")
+sys.path.insert(1, consumer_dir)
+import TrackLoader
+
 def input_args():
   parser = argparse.ArgumentParser(description='Track file plotting tool')
   parser.add_argument('-f', '--filePath', type=str, required=True,
-                    help='track file path')
+                    help='track file path, text or binary (TrackConsumer.py -o binary)')
+  parser.add_argument('-t', '--track', type=int, nargs='+', default=None,
+                    help='only plot these track ids')
+  parser.add_argument('-m', '--maxpoints', type=int, default=100000,
+                    help='Maximum points plotted per series, larger files are ' +
+                          'decimated (default: 100000)')
+  parser.add_argument('-c', '--chunksize', type=int, default=TrackLoader.DEFAULT_CHUNK_SIZE,
+                    help='Bytes of the track file parsed at a time ' +
+                          f'(default: {TrackLoader.DEFAULT_CHUNK_SIZE})')
   parser.add_argument('-v', '--verbose', action='store_true',
                     help='Verbose logging')
   args = parser.parse_args()
@@ -31,53 +44,33 @@ def main(args):
     sys.exit(1)
   
   # Read the track file and capture track state updates and true measurment locations
-  track = {"x":[], "y":[], "z":[]}
-  true = {"x":[], "y":[], "z":[]}
-  temp_true = {"x":None, "y":None, "z":None}
-  with open(args.filePath) as f:
-    for line in f:
-      line = line.split()
-      if line[0] == "trk":
-        if temp_true['x']:
-          # Store the last measurement (most recent)
-          true["x"].append(temp_true["x"])
-          true["y"].append(temp_true["y"])
-          true["z"].append(temp_true["z"])
-        # Store the track state update
-        track["x"].append(float(line[1]))
-        track["y"].append(float(line[2]))
-        track["z"].append(float(line[3]))
-      elif line[0] == "meas":
-        temp_true["x"] = float(line[1])
-        temp_true["y"] = float(line[2])
-        temp_true["z"] = float(line[3])
-    # Store the very last measurement for the final track
-    if temp_true['x']:
-        true["x"].append(temp_true["x"])
-        true["y"].append(temp_true["y"])
-        true["z"].append(temp_true["z"])
-    fig = plt.figure()
-    
-    # syntax for 3-D projection
-    ax = plt.axes(projection ='3d')
-    
-    # defining all 3 axes
-    x = np.array(track["x"])
-    y = np.array(track["y"])
-    z = np.array(track["z"])
-    
-    # plotting
-    ax.plot3D(x, y, z, 'red', label='track prediction')
-    # defining all 3 axes
-    x = np.array(true["x"])
-    y = np.array(true["y"])
-    z = np.array(true["z"])
-    
-    # plotting
-    ax.scatter3D(x, y, z, 'green',label='true measurement')
-    ax.legend()
-    ax.set_title('Track and measurement plot')
-    plt.show()
+  tracks, meas = TrackLoader.load_tracks(args.filePath, args.chunksize, args.track)
+  # Store the last measurement (most recent) of each track state update
+  last = TrackLoader.last_measurements(meas)
+  fig = plt.figure()
+  
+  # syntax for 3-D projection
+  ax = plt.axes(projection ='3d')
+  
+  # defining all 3 axes, decimated so large files stay interactive
+  idx = TrackLoader.decimate(tracks['update'].size, args.maxpoints)
+  x = tracks['x_pred_pos'][idx]
+  y = tracks['y_pred_pos'][idx]
+  z = tracks['z_pred_pos'][idx]
+  
+  # plotting
+  ax.plot3D(x, y, z, 'red', label='track prediction')
+  # defining all 3 axes
+  idx = last[TrackLoader.decimate(last.size, args.maxpoints)]
+  x = meas['x'][idx]
+  y = meas['y'][idx]
+  z = meas['z'][idx]
+  
+  # plotting
+  ax.scatter3D(x, y, z, 'green',label='true measurement')
+  ax.legend()
+  ax.set_title('Track and measurement plot')
+  plt.show()
 
 if __name__ == "__main__":
   args = input_args()
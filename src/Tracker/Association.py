@@ -0,0 +1,239 @@
+import logging
+import numpy as np
+
+import HotLog
+
+try:
+  from scipy.optimize import linear_sum_assignment
+except ImportError:
+  linear_sum_assignment = None
+
+# Chi-square gate for 3 degrees of freedom at 99% probability
+DEFAULT_GATE = 11.345
+
+def mahalanobis_cost(z_pred, S, Y, gate=DEFAULT_GATE):
+  """
+    Build the gated global nearest neighbour cost matrix between predicted
+    track measurements and new measurements
+
+    Parameters
+    ---------
+    z_pred: np array
+      predicted measurement of each track (T,3)
+    S: np array
+      innovation covariance of each track (T,3,3)
+    Y: np array
+      new measurements (M,3)
+    gate: float
+      chi-square threshold on the squared Mahalanobis distance
+
+    Returns
+    ---------
+    cost: np array
+      squared Mahalanobis distance plus log det S for every pair (T,M)
+    gated: np array
+      boolean mask of the pairs inside the gate (T,M)
+  """
+  S_inv = np.linalg.inv(S)
+  _, logdet = np.linalg.slogdet(S)
+  nu = Y[None, :, :] - z_pred[:, None, :]
+  d2 = np.einsum('tmi,tij,tmj->tm', nu, S_inv, nu)
+  return d2 + logdet[:, None], d2 <= gate
+
+def candidate_pairs(z_pred, S, Y, gate=DEFAULT_GATE):
+  """
+    Track/measurement pairs that can fall inside the gate, found without
+    comparing every pair. A pair inside the gate is within
+    sqrt(gate * S_ii) of the track along every axis i, so the measurements
+    are sorted along x, each track takes the run of measurements within its
+    x bound and the pairs outside its y and z bounds are dropped
+
+    Parameters
+    ---------
+    z_pred, S, Y, gate:
+      see mahalanobis_cost
+
+    Returns
+    ---------
+    track_idx: np array
+      track index of each candidate pair, in track then measurement order (P,)
+    meas_idx: np array
+      measurement index of each candidate pair (P,)
+  """
+  radius = np.sqrt(gate * np.diagonal(S, axis1=1, axis2=2))
+  order = np.argsort(Y[:, 0], kind='stable')
+  x = Y[order, 0]
+  lo = np.searchsorted(x, z_pred[:, 0] - radius[:, 0], side='left')
+  hi = np.searchsorted(x, z_pred[:, 0] + radius[:, 0], side='right')
+  counts = hi - lo
+  total = int(counts.sum())
+  # expand each [lo, hi) run of the sorted measurements into individual pairs
+  offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+  track_idx = np.repeat(np.arange(z_pred.shape[0]), counts)
+  meas_idx = order[np.repeat(lo, counts) + offsets]
+  inside = np.all(np.abs(Y[meas_idx, 1:] - z_pred[track_idx, 1:]) <= radius[track_idx, 1:],
+                  axis=1)
+  track_idx, meas_idx = track_idx[inside], meas_idx[inside]
+  pairs = np.argsort(track_idx * max(Y.shape[0], 1) + meas_idx, kind='stable')
+  return track_idx[pairs], meas_idx[pairs]
+
+def pair_cost(z_pred, S, Y, track_idx, meas_idx, gate=DEFAULT_GATE):
+  """
+    Same as mahalanobis_cost but only for a list of candidate pairs
+
+    Parameters
+    ---------
+    z_pred, S, Y, gate:
+      see mahalanobis_cost
+    track_idx: np array
+      track index of each candidate pair (P,)
+    meas_idx: np array
+      measurement index of each candidate pair (P,)
+
+    Returns
+    ---------
+    cost: np array
+      cost of each candidate pair (P,)
+    gated: np array
+      boolean mask of the candidate pairs inside the gate (P,)
+  """
+  S_inv = np.linalg.inv(S)
+  _, logdet = np.linalg.slogdet(S)
+  nu = Y[meas_idx] - z_pred[track_idx]
+  d2 = np.einsum('pi,pij,pj->p', nu, S_inv[track_idx], nu)
+  return d2 + logdet[track_idx], d2 <= gate
+
+def _hungarian(cost):
+  """
+    Minimum cost assignment of every row of a dense cost matrix with no more
+    rows than columns (shortest augmenting path with potentials)
+  """
+  n, m = cost.shape
+  u = np.zeros(n + 1)
+  v = np.zeros(m + 1)
+  p = np.zeros(m + 1, dtype=int)   # row assigned to each column, 1 based
+  way = np.zeros(m + 1, dtype=int)
+  for i in range(1, n + 1):
+    p[0] = i
+    j0 = 0
+    minv = np.full(m + 1, np.inf)
+    used = np.zeros(m + 1, dtype=bool)
+    while p[j0] != 0:
+      used[j0] = True
+      i0 = p[j0]
+      free = ~used[1:]
+      cur = cost[i0 - 1] - u[i0] - v[1:]
+      better = free & (cur < minv[1:])
+      minv[1:][better] = cur[better]
+      way[1:][better] = j0
+      candidates = np.where(free, minv[1:], np.inf)
+      j1 = int(np.argmin(candidates)) + 1
+      delta = candidates[j1 - 1]
+      u[p[used]] += delta
+      v[used] -= delta
+      minv[1:][free] -= delta
+      j0 = j1
+    while j0:
+      j1 = way[j0]
+      p[j0] = p[j1]
+      j0 = j1
+  cols = np.nonzero(p[1:])[0]
+  rows = p[1:][cols] - 1
+  order = np.argsort(rows)
+  return rows[order], cols[order]
+
+def solve_assignment(cost):
+  """
+    Optimal assignment of a dense cost matrix, uses scipy when it is
+    installed and the built in Hungarian solver otherwise
+
+    Returns
+    ---------
+    rows, cols: np array
+      indices of the assigned pairs
+  """
+  if linear_sum_assignment is not None:
+    return linear_sum_assignment(cost)
+  if cost.shape[0] > cost.shape[1]:
+    cols, rows = _hungarian(cost.T)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+  return _hungarian(cost)
+
+def _components(track_idx, meas_idx, num_tracks):
+  """
+    Label the connected components of the gated track/measurement graph
+    with the smallest track index in them. Every track repeatedly takes the
+    smallest label among the tracks sharing a measurement with it, and then
+    the label of its label, until nothing changes. Each pass is a handful
+    of whole array operations over the pairs
+  """
+  label = np.arange(num_tracks)
+  meas_label = np.empty(meas_idx.max() + 1, dtype=label.dtype)
+  while True:
+    meas_label.fill(num_tracks)
+    np.minimum.at(meas_label, meas_idx, label[track_idx])
+    new_label = label.copy()
+    np.minimum.at(new_label, track_idx, meas_label[meas_idx])
+    # labels are track indices of the same component, no larger than the track
+    new_label = new_label[new_label]
+    if np.array_equal(new_label, label):
+      return label[track_idx]
+    label = new_label
+
+def assign(track_idx, meas_idx, cost, num_tracks):
+  """
+    Global nearest neighbour assignment over the gated candidate pairs. The
+    gated graph is split into independent clusters and each cluster is
+    solved optimally, so sparse scans with many targets stay cheap
+
+    Parameters
+    ---------
+    track_idx: np array
+      track index of each gated pair (P,)
+    meas_idx: np array
+      measurement index of each gated pair (P,)
+    cost: np array
+      cost of each gated pair (P,)
+    num_tracks: int
+      number of tracks
+
+    Returns
+    ---------
+    tracks, measurements: np array
+      indices of the assigned track/measurement pairs
+  """
+  if track_idx.size == 0:
+    return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+  labels = _components(track_idx, meas_idx, num_tracks)
+  # the pairs of each cluster are one slice of the pairs sorted by label
+  order = np.argsort(labels, kind='stable')
+  bounds = np.flatnonzero(np.diff(labels[order])) + 1
+  starts = np.concatenate(([0], bounds))
+  sizes = np.diff(np.append(starts, order.size))
+  # a cluster of a single pair is assigned as it is
+  single = order[starts[sizes == 1]]
+  assigned_tracks = [track_idx[single]]
+  assigned_meas = [meas_idx[single]]
+  for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+    member = order[start:start + size]
+    t_ids, t_local = np.unique(track_idx[member], return_inverse=True)
+    m_ids, m_local = np.unique(meas_idx[member], return_inverse=True)
+    if t_ids.size == 1 or m_ids.size == 1:
+      # single candidate on one side, the cheapest pair wins
+      best = np.argmin(cost[member])
+      assigned_tracks.append(t_ids[t_local[best]:t_local[best] + 1])
+      assigned_meas.append(m_ids[m_local[best]:m_local[best] + 1])
+      continue
+    # pairs outside the gate can never be chosen over leaving both unassigned
+    dense = np.full((t_ids.size, m_ids.size), np.inf)
+    dense[t_local, m_local] = cost[member]
+    big = np.abs(cost[member]).max() * 2 * (t_ids.size + m_ids.size) + 1.0
+    rows, cols = solve_assignment(np.where(np.isinf(dense), big, dense))
+    valid = np.isfinite(dense[rows, cols])
+    assigned_tracks.append(t_ids[rows[valid]])
+    assigned_meas.append(m_ids[cols[valid]])
+  if HotLog.enabled(logging.DEBUG):
+    logging.debug(f"assigned {sum(len(t) for t in assigned_tracks)} pairs " +
+                  f"across {len(assigned_tracks)} clusters")
+  return np.concatenate(assigned_tracks), np.concatenate(assigned_meas)
@@ -0,0 +1,218 @@
+import asyncio
+import grpc
+import logging
+import time
+
+from concurrent import futures
+
+import measurement_pb2
+import measurement_pb2_grpc
+import ColumnarCodec
+import CaptureLog
+import HotLog
+from Profiler import WindowProfiler
+import Metrics
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+import ShardedTracker
+import TrackerMetrics
+from TrackPublisher import RETRY_CODES
+
+class AsyncTracker(measurement_pb2_grpc.MeasurementProducerServicer):
+    """
+      An asyncio version of tracker.Tracker built on grpc.aio. Filtering is
+      CPU bound so it runs on a single worker executor (keeping the track
+      state single threaded) while the event loop keeps accepting
+      measurement groups. Track groups are handed to a bounded publish
+      queue so a slow track consumer does not hold up ingest
+
+      Attributes
+      --------
+      track_int: TrackStrategyFactory
+        The object that manages track state and produces new track group messages
+      stub: measurement_pb2_grpc.TrackProducerStub
+        grpc.aio stub used to publish track groups to track consumers
+      stub_v2: ColumnarCodec.TrackProducerV2Stub
+        grpc.aio stub used to publish columnar track groups to track consumers
+      executor: concurrent.futures.Executor
+        executor the filtering is run on
+      queue: asyncio.Queue
+        bounded queue of track groups waiting to be published
+      capture: CaptureLog.CaptureWriter
+        Optional log every received measurement group is captured to
+      metrics: dict
+        maps each schema (v1, v2) to the TrackerMetrics.RequestMetrics of
+        its measurement groups
+      profiler: Profiler.WindowProfiler
+        Optional profiler the filtering is run under on the executor
+      deadline: float
+        deadline in seconds of each publish, None waits forever
+      retries: int
+        number of times a publish that is unavailable or past its deadline
+        is retried before the track group is dropped
+
+      Methods
+      --------
+      ProcessMeasurement()
+        implementation of the protobuf defined service method used to process
+        measurement group messages that have been created by producers
+      StreamMeasurements()
+        implementation of the protobuf defined streaming service method,
+        acknowledges each measurement group once it has been processed
+      ProcessColumns()
+        implementation of the v2 service method used to process encoded
+        measurement_v2.measurement_group messages
+      publish_loop()
+        coroutine publishing the queued track groups
+      drain()
+        coroutine waiting for every queued track group to be published
+    """
+    def __init__(self, track_int, stub, stub_v2, executor, queue_size=64,
+                 capture=None, metrics=Metrics.REGISTRY, profiler=None,
+                 deadline=5.0, retries=2) -> None:
+        super().__init__()
+        self.track_int = track_int
+        self.stub = stub
+        self.stub_v2 = stub_v2
+        self.executor = executor
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.capture = capture
+        self.metrics = {schema: TrackerMetrics.RequestMetrics(metrics, schema)
+                        for schema in ('v1', 'v2')}
+        self.profiler = profiler
+        self.deadline = deadline
+        self.retries = retries
+
+    async def _filter(self, func, request):
+      loop = asyncio.get_running_loop()
+      if self.profiler:
+        return await loop.run_in_executor(self.executor, self.profiler.call, func, request)
+      return await loop.run_in_executor(self.executor, func, request)
+
+    async def _process(self, request):
+      start = time.perf_counter()
+      metrics = self.metrics['v1']
+      metrics.received(len(request.measurements), request.ByteSize())
+      if self.capture:
+        with metrics.stages['capture'].time():
+          self.capture.write(CaptureLog.SCHEMA_V1, request.SerializeToString())
+      with metrics.stages['filter'].time():
+        track_msg = await self._filter(self.track_int.process_measurement, request)
+      with metrics.stages['publish'].time():
+        await self.queue.put((self.stub.ProcessTrack, track_msg))
+      metrics.published(len(track_msg.tracks), track_msg.ByteSize())
+      metrics.request.observe(time.perf_counter() - start)
+
+    async def ProcessMeasurement(self, request, context):
+      await self._process(request)
+      return google_dot_protobuf_dot_empty__pb2.Empty()
+
+    async def StreamMeasurements(self, request_iterator, context):
+      async for request in request_iterator:
+        await self._process(request)
+        yield measurement_pb2.ack(sequence=request.sequence)
+
+    async def ProcessColumns(self, request, context):
+      start = time.perf_counter()
+      metrics = self.metrics['v2']
+      if self.capture:
+        with metrics.stages['capture'].time():
+          self.capture.write(CaptureLog.SCHEMA_V2, request)
+      with metrics.stages['filter'].time():
+        columns = ColumnarCodec.decode_measurement_group(request)
+        metrics.received(columns['x'].size, len(request))
+        tracks = await self._filter(self.track_int.process_columns, columns)
+      with metrics.stages['publish'].time():
+        data = ColumnarCodec.encode_track_group(tracks)
+        await self.queue.put((self.stub_v2.ProcessTrack, data))
+      metrics.published(len(tracks['track_id']), len(data))
+      metrics.request.observe(time.perf_counter() - start)
+      return google_dot_protobuf_dot_empty__pb2.Empty()
+
+    async def _send(self, send, track_msg):
+      for attempt in range(self.retries + 1):
+        try:
+          await send(track_msg, timeout=self.deadline)
+          return
+        except grpc.RpcError as rpc_error:
+          if rpc_error.code() not in RETRY_CODES or attempt == self.retries:
+            raise
+          await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def publish_loop(self):
+      """
+        Publish the queued track groups to the track consumer in order, a
+        hung consumer holds each group up for at most the deadline of every
+        attempt
+      """
+      while True:
+        send, track_msg = await self.queue.get()
+        try:
+          HotLog.sampled(logging.INFO, "publishing track group")
+          await self._send(send, track_msg)
+        except grpc.RpcError as rpc_error:
+          logging.warning(f"failed to publish track group {rpc_error.code()}")
+        finally:
+          self.queue.task_done()
+
+    async def drain(self):
+      """
+        Wait until every queued track group has been published or has
+        failed, publish_loop must be running
+      """
+      await self.queue.join()
+
+class _ColumnarServicer:
+    """
+      Exposes AsyncTracker.ProcessColumns under the v2 service method name
+    """
+    def __init__(self, tracker) -> None:
+        self.ProcessMeasurement = tracker.ProcessColumns
+
+async def serve(args):
+    """
+      Create the grpc.aio service server for processing measurement groups
+    """
+    # shard workers are forked, so they are started before any gRPC channel
+    # or thread they could inherit a copy of
+    track_int = ShardedTracker.create_track_int(args)
+    channel = grpc.aio.insecure_channel(args.sendserver)
+    stub = measurement_pb2_grpc.TrackProducerStub(channel)
+    stub_v2 = ColumnarCodec.TrackProducerV2Stub(channel)
+    executor = futures.ThreadPoolExecutor(max_workers=1)
+
+    capture = None
+    if args.capture:
+      capture = CaptureLog.CaptureWriter(args.capture)
+      logging.info(f"capturing measurement groups to {args.capture}")
+    profiler = None
+    if args.profile:
+      profiler = WindowProfiler(args.profile, args.profilewindow, args.profileskip)
+      logging.info(f"profiling the filtering of {args.profilewindow} RPCs to {args.profile}")
+    tracker = AsyncTracker(track_int, stub, stub_v2, executor, args.queue, capture,
+                           profiler=profiler, deadline=args.deadline)
+    Metrics.REGISTRY.gauge('tracker_publish_queue_depth', 'Track groups waiting to be published',
+                           func=tracker.queue.qsize)
+    reporters = Metrics.start(Metrics.REGISTRY, args.metricsport, args.statsinterval)
+    server = grpc.aio.server()
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(tracker, server)
+    ColumnarCodec.add_MeasurementProducerV2_to_server(_ColumnarServicer(tracker), server)
+    server.add_insecure_port('[::]:' + str(args.recvport))
+
+    publisher = asyncio.create_task(tracker.publish_loop())
+    await server.start()
+    try:
+      await server.wait_for_termination()
+    finally:
+      # nothing is received once the server stops, publish what is queued
+      await server.stop(None)
+      await tracker.drain()
+      publisher.cancel()
+      await channel.close()
+      executor.shutdown()
+      if capture:
+        capture.close()
+      if profiler and not profiler.done:
+        profiler.dump()
+      for reporter in reporters:
+        reporter.close()
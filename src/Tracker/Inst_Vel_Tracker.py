@@ -2,14 +2,30 @@ import numpy as np
 
 import trackStrategyInterface as ti
 import measurement_pb2
+from MeasurementHistory import MeasurementHistory
 
 class Inst_Vel_Tracker(ti.trackStrategyInterface):
-  def __init__(self):
+  def __init__(self, retention='last-k', capacity=100):
       super().__init__()
-      self.meas_list = []
+      self.meas_list = MeasurementHistory(retention, capacity)
+      # Positional uncertainty used when associating new measurements,
+      # the instantaneous velocity estimate carries no covariance
+      self.gate_variance = 1.0
+
+  def predict_measurement(self, time):
+    if len(self.meas_list) == 0:
+      return np.zeros(3), np.identity(3) * self.gate_variance
+    last = self.meas_list[-1]
+    z_pred = np.array([last.x, last.y, last.z])
+    if len(self.meas_list) >= 2:
+      prev = self.meas_list[-2]
+      dt = last.time - prev.time
+      if dt > 0:
+        z_pred = z_pred + (z_pred - np.array([prev.x, prev.y, prev.z])) * (time - last.time) / dt
+    return z_pred, np.identity(3) * self.gate_variance
 
   def add_measurement(self, 
-                      meas: measurement_pb2.measurement) -> measurement_pb2.track :
+                      meas: measurement_pb2.measurement, history=True) -> measurement_pb2.track :
     self.print_meas(meas)
     self.meas_list.append(meas)
     pred_vel = np.array([[0],[0],[0]])
@@ -24,11 +40,10 @@ class Inst_Vel_Tracker(ti.trackStrategyInterface):
                             [self.meas_list[-2].z],])
       pred_vel = (finalmeas - initmeas) / dt
 
-    track_msg = measurement_pb2.track(x_velocity=pred_vel[0],
-                                      y_velocity=pred_vel[1],
-                                      z_velocity=pred_vel[2])
-    for i in range(len(self.meas_list)):
-      meas =  self.meas_list[i].SerializeToString()
-      track_msg.measurements.append(meas)
+    track_msg = measurement_pb2.track(x_velocity=pred_vel[0][0],
+                                      y_velocity=pred_vel[1][0],
+                                      z_velocity=pred_vel[2][0])
+    if history:
+      track_msg.measurements.extend(self.meas_list.serialized())
     return track_msg
 
@@ -1,8 +1,240 @@
+import collections
+import functools
 import logging
 import numpy as np
 
 import trackStrategyInterface as ti 
 import measurement_pb2
+import HotLog
+from MeasurementHistory import MeasurementHistory
+
+# Number of distinct dt values whose transition matrices are kept around
+TRANSITION_CACHE_SIZE = 32
+
+# Measurement noise variance of the standard, joseph and sqrt kernels, a
+# proper covariance update with the legacy zero R collapses the innovation
+# covariance to a singular matrix
+DEFAULT_MEAS_VAR = 0.01
+
+# Relative change of the covariance between two consecutive updates at the
+# same dt below which a steady state tracker freezes its gain
+STEADY_STATE_TOL = 1e-3
+
+# Relative difference between two time steps still treated as the same dt,
+# absorbs the rounding error of differencing report times
+STEADY_STATE_DT_TOL = 1e-6
+
+# Seconds an out of sequence measurement may trail the newest state of its
+# track and still be folded in, older measurements are rejected
+DEFAULT_OOSM_WINDOW = 10.0
+
+# Most filter states retained per track for out of sequence measurements,
+# bounds the cost of folding one in
+DEFAULT_OOSM_DEPTH = 16
+
+@functools.lru_cache(maxsize=TRANSITION_CACHE_SIZE)
+def transition_matrices(dt):
+  """
+    Build the state transition and control matrices for a time step.
+    Sensors report at a handful of fixed intervals so the results are
+    memoized by dt, the returned matrices are read only as they are shared
+    between every tracker
+
+    ...
+    Parameters
+    -------
+    dt: float
+        time step the state is predicted across
+    Returns
+    -------
+    A : np matrix
+      state transition matrix
+    B : np matrix
+      control matrix
+    A_T : np matrix
+      transpose of the state transition matrix
+  """
+  A = np.identity(6)
+  A[0][3] = dt
+  A[1][4] = dt
+  A[2][5] = dt
+  B = np.array([[0.5 * dt **2, 0.0          , 0.0         ],
+                [0.0         , 0.5 * dt **2 , 0.0         ],
+                [0.0         , 0.0          , 0.5 * dt **2],
+                [dt          , 0            , 0           ],
+                [0.0         , dt           , 0           ],
+                [0.0         , 0            , dt          ]])
+  A_T = A.T.copy()
+  for matrix in (A, B, A_T):
+    matrix.flags.writeable = False
+  return A, B, A_T
+
+def _gain(new_P, H, R):
+  """
+    Kalman gain K = P H^T S^-1, solved as S K^T = H P^T instead of
+    inverting the innovation covariance S. For the 3x3 S a single LAPACK
+    solve is cheaper than a Cholesky factorization followed by two
+    triangular solves, each numpy call costs more than the arithmetic
+  """
+  S = H @ new_P @ H.T + R
+  return np.linalg.solve(S, H @ new_P.T).T
+
+def update_legacy(new_X, new_P, Y, H, R):
+  """
+    The original update, an explicit inverse of the innovation covariance
+    and the predicted covariance kept without applying the gain
+  """
+  s = H @ new_P @ H.T + R
+  K =  new_P @ H.T @ np.linalg.inv(s) # Kalman gain
+  return new_X + K @ (Y - H @ new_X), new_P
+
+def update_standard(new_X, new_P, Y, H, R):
+  """
+    Solved gain and the standard form covariance P = (I - KH) P
+  """
+  K = _gain(new_P, H, R)
+  return new_X + K @ (Y - H @ new_X), (np.identity(new_P.shape[0]) - K @ H) @ new_P
+
+def update_joseph(new_X, new_P, Y, H, R):
+  """
+    Solved gain and the Joseph form covariance
+    P = (I - KH) P (I - KH)^T + K R K^T, symmetric and positive semi
+    definite whatever the rounding error in K
+  """
+  K = _gain(new_P, H, R)
+  I_KH = np.identity(new_P.shape[0]) - K @ H
+  return new_X + K @ (Y - H @ new_X), I_KH @ new_P @ I_KH.T + K @ R @ K.T
+
+def update_sqrt(new_X, new_S, Y, H, R):
+  """
+    Potter square root update of a factor S of the covariance (P = S S^T),
+    the measurements are processed one axis at a time as rank one updates
+    of the factor and the covariance itself is never formed. Needs R
+    diagonal, returns the updated state and factor
+  """
+  S = new_S
+  X = new_X.astype(float)
+  for j in range(H.shape[0]):
+    h = H[j]
+    r = R[j, j]
+    phi = S.T @ h
+    SPhi = S @ phi
+    a = 1.0 / (phi @ phi + r)
+    gamma = 1.0 / (1.0 + np.sqrt(a * r))
+    X = X + (a * SPhi)[:, None] * (Y[j, 0] - h @ X[:, 0])
+    S = S - (a * gamma) * np.outer(SPhi, phi)
+  return X, S
+
+def predict_sqrt(S, A, Q_half):
+  """
+    Square root time update, the triangular factor of the QR decomposition
+    of [S^T A^T; Q_half^T] is a factor of A S S^T A^T + Q_half Q_half^T
+
+    ...
+    Returns
+    -------
+    new_S : np matrix
+      lower triangular factor of the predicted covariance
+  """
+  return np.linalg.qr(np.vstack((S.T @ A.T, Q_half.T)), mode='r').T
+
+def sqrt_factor(P):
+  """
+    Factor F of a symmetric positive semi definite P with P = F F^T,
+    columns of zero eigenvalues are left out so F may have fewer columns
+  """
+  w, V = np.linalg.eigh(P)
+  keep = w > w.max() * 1e-12
+  return V[:, keep] * np.sqrt(w[keep])
+
+UPDATE_KERNELS = {
+  'legacy': update_legacy,
+  'standard': update_standard,
+  'joseph': update_joseph,
+}
+
+# Kernels of the dense filter plus the square root and decoupled per axis
+# filters, see create_tracker
+KERNELS = tuple(UPDATE_KERNELS) + ('sqrt', 'axis')
+
+def axis_predict(pos, vel, pp, pv, vv, dt, q_pp, q_pv, q_vv, acc=0.0):
+  """
+    Predict the position/velocity filter of one axis across dt, the closed
+    form of A X + B u and A P A^T + Q for A = [[1 dt] [0 1]]. The state and
+    the pos/pos, pos/vel and vel/vel covariance terms are floats for a
+    single axis or broadcastable arrays for many axes and tracks at once
+
+    ...
+    Returns
+    -------
+    pos, vel, pp, pv, vv :
+      predicted state and covariance terms
+  """
+  return (pos + dt * vel + 0.5 * dt * dt * acc, vel + dt * acc,
+          pp + dt * (2.0 * pv + dt * vv) + q_pp, pv + dt * vv + q_pv, vv + q_vv)
+
+def axis_update(pos, vel, pp, pv, vv, y, r):
+  """
+    Update the position/velocity filter of one axis with a measurement y of
+    pos + vel (the axis row h = [1 1] of H), the closed form of the
+    standard kernel with a scalar innovation variance in place of the solve.
+    Floats or broadcastable arrays like axis_predict
+
+    ...
+    Returns
+    -------
+    pos, vel, pp, pv, vv :
+      updated state and covariance terms
+  """
+  ph_p = pp + pv # P h^T
+  ph_v = pv + vv
+  s = ph_p + ph_v + r # h P h^T + r
+  k_p = ph_p / s
+  k_v = ph_v / s
+  e = y - pos - vel
+  return (pos + k_p * e, vel + k_v * e,
+          pp - k_p * ph_p, pv - k_p * ph_v, vv - k_v * ph_v)
+
+def axis_blocks(M):
+  """
+    Pack the per axis 2x2 blocks of a dense 6x6 state matrix as rows of
+    pos/pos, pos/vel and vel/vel terms with one column per axis (3,3)
+  """
+  return np.array([np.diagonal(M)[:3], np.diagonal(M, 3), np.diagonal(M)[3:]])
+
+def axis_dense(P):
+  """
+    Dense 6x6 matrix of per axis blocks packed by axis_blocks, the cross
+    axis terms are zero
+  """
+  M = np.diag(np.concatenate((P[0], P[2])))
+  axes = np.arange(3)
+  M[axes, axes + 3] = P[1]
+  M[axes + 3, axes] = P[1]
+  return M
+
+def _pack(axes):
+  """
+    (6,1) state and packed covariance of the per axis filter results
+  """
+  X = np.array([[axis[0]] for axis in axes] + [[axis[1]] for axis in axes])
+  P = np.array([[axis[term] for axis in axes] for term in (2, 3, 4)])
+  return X, P
+
+def create_tracker(retention='last-k', capacity=100, kernel='legacy', steady_state=False,
+                   oosm_window=DEFAULT_OOSM_WINDOW):
+  """
+    Create the Kalman filter tracker of a kernel, the dense filter for the
+    UPDATE_KERNELS, the square root filter for sqrt and the decoupled per
+    axis filter for axis
+  """
+  if kernel == 'axis':
+    if steady_state:
+      raise ValueError("The steady state gain is not supported by the axis kernel")
+    return Decoupled_Kalman_Filter_Tracker(retention, capacity, oosm_window)
+  if kernel == 'sqrt':
+    return SquareRoot_Kalman_Filter_Tracker(retention, capacity, steady_state, oosm_window)
+  return Kalman_Filter_Tracker(retention, capacity, kernel, steady_state, oosm_window)
 
 class Kalman_Filter_Tracker(ti.trackStrategyInterface):
   """
@@ -28,7 +260,8 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
         Kalman Gain (weight factor) based on comparing error in estimate from
         error in the measurement
     R : np matrix
-        Sensor Noise cov Matrix (error in the measurement)
+        Sensor Noise cov Matrix (error in the measurement), zero with the
+        legacy kernel and DEFAULT_MEAS_VAR on the diagonal otherwise
     I : np matrix
         Identity matrix
     u : np matrix
@@ -37,8 +270,31 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
         pred state noise matrix
     Q : np matrix
         process noise cov matrix (keeps P from going to 0)
+    H : np matrix
+        measurement matrix, built once per tracker
+    z : float
+        measurement noise added to each input measurement
     time : float
         Time of the current state
+    meas_list : MeasurementHistory
+        Most recent measurements of the track, bounded by the retention policy
+    kernel : str
+        name of the update kernel in UPDATE_KERNELS
+          legacy = explicit inverse, covariance not updated (default)
+          standard = solved gain, (I - KH) P covariance
+          joseph = solved gain, Joseph form covariance
+    steady_state : bool
+        freeze the gain once the covariance stops changing between updates
+        at a fixed dt and run the constant gain (alpha-beta style) update,
+        the full filter resumes when dt changes or a report is missed
+    gain : np matrix
+        frozen steady state gain, None while the full filter runs
+    oosm_window : float
+        seconds an out of sequence measurement may trail the current state
+        and still be folded in, 0 rejects every late measurement
+    states : collections.deque
+        (time, X, P, Y) after each update, oldest first, bounded by
+        oosm_depth and pruned to the oosm_window
     Methods
     -------
     predict()
@@ -47,8 +303,35 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
         takes an external measurement, that can be used to update stored state
     update()
         takes a new measurement, and a state prediction and update the stored state
+    update_steady_state()
+        constant gain update used once the gain has been frozen
+    measurement_late()
+        folds in an out of sequence measurement
+    predict_measurement()
+        expected measurement and its covariance at a given time
+    covariance()
+        state covariance, or that of a retained P, as a dense 6x6 matrix
+    track_message()
+        record a measurement and build the track message of the state
+    cache_info()
+        hit/miss counters of the shared transition matrix cache
   """
-  def __init__(self) -> None:
+  def __init__(self, retention='last-k', capacity=100, kernel='legacy',
+               steady_state=False, oosm_window=DEFAULT_OOSM_WINDOW,
+               oosm_depth=DEFAULT_OOSM_DEPTH) -> None:
+    if kernel not in UPDATE_KERNELS:
+      raise ValueError(f"Invalid update kernel {kernel}")
+    if steady_state and kernel == 'legacy':
+      # the legacy kernel never applies the gain to the covariance, P
+      # grows without bound and there is no steady state to settle on
+      raise ValueError("The steady state gain needs a kernel that updates the covariance")
+    self.kernel = kernel
+    self._update = UPDATE_KERNELS[kernel]
+    self.steady_state = steady_state
+    self.gain = None
+    self._dt = None # time step of the previous update
+    self.oosm_window = oosm_window
+    self.states = collections.deque(maxlen=max(oosm_depth, 1))
     self.X = None # State matrix (pos/vel)
 
     # TODO find better way to initialize P
@@ -56,6 +339,8 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
 
     # TODO figure out how to use R value
     self.R =  np.zeros((3,3)) #np.array([]) # Sensor Noise cov Matrix
+    if kernel != 'legacy':
+      self.R = np.identity(3) * DEFAULT_MEAS_VAR
     self.I = np.array([]) # identity Matrix
     self.u = np.zeros((3,1)) # control var matrix (Acceleration)
 
@@ -70,7 +355,29 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
     self.Q = np.zeros((6,6)) # np.array([]) # process noise cov matrix
     self.Q = np.ones((6,6)) # np.array([]) # process noise cov matrix
     self.time = 0 # state update time 
-    self.meas_list = []
+    self.meas_list = MeasurementHistory(retention, capacity)
+    self.z = 1.0 # measurement noise added to each input
+
+    self.H = np.zeros((3,6)) # measurement matrix
+    self.H[0][0] = 1
+    self.H[1][1] = 1
+    self.H[2][2] = 1
+    self.H[0][3] = 1
+    self.H[1][4] = 1
+    self.H[2][5] = 1
+
+  @staticmethod
+  def cache_info():
+    """
+      Hit/miss counters of the transition matrix cache shared by all trackers
+
+      ...
+      Returns
+      -------
+      info : functools._CacheInfo
+        named tuple of hits, misses, maxsize and currsize
+    """
+    return transition_matrices.cache_info()
 
 
   def predict(self, time):
@@ -90,24 +397,12 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
         The current stored Proc cov matrix predicted forward
     """
     dt = time - self.time
-    logging.debug(f"dt: {dt}")
-    A = np.identity(6)
-    A[0][3] = dt
-    A[1][4] = dt
-    A[2][5] = dt
-    B = np.array([[0.5 * dt **2, 0.0          , 0.0         ],
-                  [0.0         , 0.5 * dt **2 , 0.0         ],
-                  [0.0         , 0.0          , 0.5 * dt **2],
-                  [dt          , 0            , 0           ],
-                  [0.0         , dt           , 0           ],
-                  [0.0         , 0            , dt          ]])
+    A, B, A_T = transition_matrices(float(dt))
 
     new_x = A @ self.X + B @ self.u + self.w
-    logging.debug(f"new measurement prediction: \n{new_x}")
-    new_P = A @ self.P @ A.T + self.Q
-    logging.debug(f"A: \n{A}")
-    logging.debug(f"old P: \n{self.P}")
-    logging.debug(f"new P: \n{new_P}")
+    new_P = A @ self.P @ A_T + self.Q
+    HotLog.debug("dt: %s new measurement prediction: \n%s\nA: \n%s\nold P: \n%s\nnew P: \n%s",
+                 dt, new_x, A, self.P, new_P)
 
     return new_x, new_P
 
@@ -129,14 +424,129 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
           measurement noise (uncertainty)
       Returns
       -------
-      None: 
-          none
+      accepted: bool
+          False when the measurement was rejected as too late to fold in
     """
     C = np.identity(3)
     Y = C @ X + z
-    logging.debug(f"new measured value: {Y}")
+    HotLog.debug("new measured value: %s", Y)
+    if time < self.time:
+      return self.measurement_late(Y, time)
+    self._filter(Y, time)
+    self._remember(Y)
+    return True
+
+  def _filter(self, Y, time):
+    """
+      Predict the current state to time and update it with Y, through the
+      constant gain update while the track is in steady state
+    """
+    dt = float(time - self.time)
+    if self.gain is not None:
+      if abs(dt - self._dt) <= STEADY_STATE_DT_TOL * self._dt:
+        self.update_steady_state(dt, time, Y)
+        return
+      # The report interval changed or a report was missed, P is still the
+      # covariance the gain was frozen at so the full filter resumes from it
+      HotLog.debug("dt %s left steady state dt %s, resuming the full filter", dt, self._dt)
+      self.gain = None
+    old_P = self.P
     new_X, new_P = self.predict(time)
     self.update(new_X, new_P, time, Y)
+    if self.steady_state:
+      self._check_steady_state(dt, old_P, new_P)
+
+  def _remember(self, Y):
+    """
+      Retain the current state, keeping one state at or before the start of
+      the oosm window so a measurement anywhere in the window can be folded in
+    """
+    states = self.states
+    states.append((self.time, self.X, self.P, Y))
+    cutoff = self.time - self.oosm_window
+    while len(states) > 1 and states[1][0] <= cutoff:
+      states.popleft()
+
+  def measurement_late(self, Y, time):
+    """
+      Fold in an out of sequence measurement, one older than the current
+      state. The filter is rewound to the newest retained state at or before
+      the measurement, updated with it and the measurements after it are
+      filtered again, so the cost grows with the number of states the
+      measurement trails (at most oosm_depth) rather than the track length.
+      Measurements trailing the current state by more than oosm_window, or
+      older than every retained state, are rejected
+
+      ...
+      Parameters
+      -------
+      Y: np matrix
+          late measurement, including the measurement noise term
+      time: float
+          time of the late measurement
+      Returns
+      -------
+      accepted: bool
+          False when the measurement was rejected
+    """
+    states = self.states
+    i = len(states)
+    while i > 0 and states[i - 1][0] > time:
+      i -= 1
+    if self.time - time > self.oosm_window or i == 0:
+      HotLog.sampled(logging.INFO, "rejected out of sequence measurement %.3f s behind its track",
+                     self.time - time)
+      return False
+    later = [states.pop() for _ in range(len(states) - i)]
+    self.time, self.X, self.P, _ = states[-1]
+    # the replayed dt sequence is irregular, steady state is detected again
+    self.gain = None
+    self._dt = None
+    self._filter(Y, time)
+    self._remember(Y)
+    for later_time, _, _, later_Y in reversed(later):
+      self._filter(later_Y, later_time)
+      self._remember(later_Y)
+    HotLog.debug("folded in measurement at %s, replayed %d later states", time, len(later))
+    return True
+
+  def _check_steady_state(self, dt, old_P, new_P):
+    """
+      Freeze the gain of the last update once the covariance has stopped
+      changing across two consecutive updates at the same dt
+    """
+    if (self._dt is not None and dt > 0.0
+        and abs(dt - self._dt) <= STEADY_STATE_DT_TOL * dt
+        and np.abs(self.covariance() - self.covariance(old_P)).max() <=
+            STEADY_STATE_TOL * np.abs(self.covariance()).max()):
+      self.gain = _gain(self.covariance(new_P), self.H, self.R)
+      HotLog.debug("steady state reached at dt %s gain: \n%s", dt, self.gain)
+    self._dt = dt
+
+  def update_steady_state(self, dt, time, Y):
+    """
+      Constant gain update, predicts the state and applies the frozen gain
+      without propagating the covariance, P stays at its steady state value
+
+      ...
+      Parameters
+      -------
+      dt: float
+          time step since the current state
+      time: float
+          time of the new measurement
+      Y: np matrix
+          New measurement to be used for updating current state
+      Returns
+      -------
+      None:
+          none
+    """
+    A, B, A_T = transition_matrices(dt)
+    new_X = A @ self.X + B @ self.u + self.w
+    self.X = new_X + self.gain @ (Y - self.H @ new_X)
+    self.time = time
+    HotLog.debug("Steady state update X: \n %s\ntime: %s", self.X, self.time)
 
   def update(self, new_X, new_P, time, Y):
     """
@@ -156,28 +566,45 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
       None: 
           none
     """
-    H = np.zeros((3,6))
-    H[0][0] = 1
-    H[1][1] = 1
-    H[2][2] = 1
-    H[0][3] = 1
-    H[1][4] = 1
-    H[2][5] = 1
-    s = H @ new_P @ H.T + self.R
-    K =  new_P @ H.T @ np.linalg.inv(s) # Kalman gain
-    self.X = new_X + K @ (Y - H @ new_X)
-    logging.debug(f"Updating filter X: \n {self.X}")
-
-    self.P = new_P
-    logging.debug(f"Updating filter P: \n {self.P}")
-
+    self.X, self.P = self._update(new_X, new_P, Y, self.H, self.R)
     self.time = time
-    logging.debug(f"Updating filter time: \n {self.time}")
+    HotLog.debug("Updating filter X: \n %s\nP: \n %s\ntime: %s", self.X, self.P, self.time)
+
+
 
+  def covariance(self, P=None):
+    """
+      State covariance as a dense 6x6 matrix, of the current state or of a
+      P retained in states
+    """
+    return self.P if P is None else P
 
+  def predict_measurement(self, time):
+    """
+      Expected measurement and its covariance at a given time
+
+      ...
+      Parameters
+      -------
+      time: float
+          time of the new measurements
+      Returns
+      -------
+      z_pred : np array
+        expected measured position (3,)
+      S : np matrix
+        innovation covariance (3,3)
+    """
+    if self.X is None:
+      return np.zeros(3), np.identity(3)
+    new_X, new_P = self.predict(time)
+    # The filter compares H @ X against the input plus the noise term z
+    z_pred = (self.H @ new_X).ravel() - self.z
+    S = self.H @ new_P @ self.H.T + self.R
+    return z_pred, S
 
   def add_measurement(self, 
-                      meas: measurement_pb2.measurement) -> measurement_pb2.track:
+                      meas: measurement_pb2.measurement, history=True) -> measurement_pb2.track:
     X = np.array([[meas.x],
                   [meas.y],
                   [meas.z]])
@@ -189,17 +616,244 @@ class Kalman_Filter_Tracker(ti.trackStrategyInterface):
                          [0],
                          [0]])
       self.time = meas.time
-    else:
-      self.measurement_input( X, meas.time, z=1.0)
-    self.meas_list.append(meas)
-    track_msg = measurement_pb2.track(x_pred_pos=self.X[0],
-                                      y_pred_pos=self.X[1],
-                                      z_pred_pos=self.X[2],
-                                      x_velocity=self.X[3],
-                                      y_velocity=self.X[4],
-                                      z_velocity=self.X[5])
-    for i in range(len(self.meas_list)):
-      measurement =  self.meas_list[i].SerializeToString()
-      track_msg.measurements.append(measurement)
+      self.states.append((self.time, self.X, self.P, None))
+    elif not self.measurement_input( X, meas.time, z=self.z):
+      return self.track_message(None, history)
+    return self.track_message(meas, history)
+
+  def track_message(self, meas, history=True):
+    """
+      Record a measurement in the track history and build the track message
+      of the current state
+
+      ...
+      Parameters
+      -------
+      meas: measurement_pb2.measurement
+          measurement the state was last updated with, None when the
+          measurement was rejected and is not recorded
+      history: bool
+          attach the serialized measurement history to the message
+      Returns
+      -------
+      track_msg : measurement_pb2.track
+        current state of the track
+    """
+    if meas is not None:
+      self.meas_list.append(meas)
+    track_msg = measurement_pb2.track(x_pred_pos=self.X[0][0],
+                                      y_pred_pos=self.X[1][0],
+                                      z_pred_pos=self.X[2][0],
+                                      x_velocity=self.X[3][0],
+                                      y_velocity=self.X[4][0],
+                                      z_velocity=self.X[5][0])
+    if history:
+      track_msg.measurements.extend(self.meas_list.serialized())
     return track_msg
 
+
+
+class Decoupled_Kalman_Filter_Tracker(Kalman_Filter_Tracker):
+  """
+    The constant velocity Kalman filter run as three independent
+    position/velocity filters, one per axis. With Q and R free of cross
+    axis terms the 6 state filter is block diagonal, and this is the same
+    filter as the standard kernel computed with scalar algebra instead of
+    dense 6x6 products and a 3x3 solve. Q keeps the per axis blocks of the
+    dense tracker's Q and drops its cross axis terms. predict_batch() and
+    update_batch() run the same algebra vectorized across many trackers
+
+    ...
+
+    Attributes
+    ----------
+    P : np matrix
+        state covariance packed per axis (3,3), rows of pos/pos, pos/vel
+        and vel/vel terms with one column per axis
+    Q : np matrix
+        dense process noise, block diagonal per axis
+    q : np matrix
+        process noise packed like P
+    r : np array
+        measurement noise variance of each axis
+    Methods
+    -------
+    predict_batch()
+        expected measurements and their covariances of many trackers
+    update_batch()
+        filter one measurement into each of many trackers
+  """
+  def __init__(self, retention='last-k', capacity=100,
+               oosm_window=DEFAULT_OOSM_WINDOW, oosm_depth=DEFAULT_OOSM_DEPTH) -> None:
+    super().__init__(retention, capacity, 'standard', False, oosm_window, oosm_depth)
+    self.kernel = 'axis'
+    self._update = None
+    self.Q = np.kron(np.ones((2, 2)), np.identity(3))
+    self.q = axis_blocks(self.Q)
+    self.r = np.diagonal(self.R).copy()
+    self.P = axis_blocks(self.P)
+
+  def predict(self, time):
+    """
+      Predict the stored filter state forward, new_P is packed per axis
+    """
+    dt = float(time - self.time)
+    X = self.X.ravel().tolist()
+    P = self.P.tolist()
+    q = self.q.tolist()
+    acc = self.u.ravel().tolist()
+    new_X, new_P = _pack([axis_predict(X[i], X[i + 3], P[0][i], P[1][i], P[2][i], dt,
+                                       q[0][i], q[1][i], q[2][i], acc[i])
+                          for i in range(3)])
+    HotLog.debug("dt: %s new measurement prediction: \n%s\nnew P: \n%s", dt, new_X, new_P)
+    return new_X, new_P
+
+  def update(self, new_X, new_P, time, Y):
+    """
+      Update the current filter state, new_P is packed per axis
+    """
+    X = new_X.ravel().tolist()
+    P = new_P.tolist()
+    y = Y.ravel().tolist()
+    r = self.r.tolist()
+    self.X, self.P = _pack([axis_update(X[i], X[i + 3], P[0][i], P[1][i], P[2][i], y[i], r[i])
+                            for i in range(3)])
+    self.time = time
+    HotLog.debug("Updating filter X: \n %s\nP: \n %s\ntime: %s", self.X, self.P, self.time)
+
+  def covariance(self, P=None):
+    return axis_dense(self.P if P is None else P)
+
+  def predict_measurement(self, time):
+    if self.X is None:
+      return np.zeros(3), np.identity(3)
+    new_X, new_P = self.predict(time)
+    z_pred = new_X[:3, 0] + new_X[3:, 0] - self.z
+    return z_pred, np.diag(new_P[0] + 2.0 * new_P[1] + new_P[2] + self.r)
+
+  @staticmethod
+  def _predict_stacked(trackers, time):
+    """
+      Stack the state of trackers sharing a noise model and predict it to
+      time, a float or one time per tracker
+    """
+    X = np.array([tracker.X for tracker in trackers]).reshape(-1, 2, 3)
+    P = np.array([tracker.P for tracker in trackers])
+    dt = (np.asarray(time, dtype=float) -
+          np.array([tracker.time for tracker in trackers], dtype=float))[:, None]
+    q = trackers[0].q
+    return axis_predict(X[:, 0], X[:, 1], P[:, 0], P[:, 1], P[:, 2], dt,
+                        q[0], q[1], q[2], trackers[0].u[:, 0])
+
+  @staticmethod
+  def predict_batch(trackers, time):
+    """
+      Expected measurement and its covariance of many trackers sharing a
+      noise model, vectorized across the trackers and axes
+
+      ...
+      Parameters
+      -------
+      trackers: list
+          Decoupled_Kalman_Filter_Tracker with a state
+      time: float
+          time of the new measurements
+      Returns
+      -------
+      z_pred : np array
+        expected measured position of each tracker (N,3)
+      S : np array
+        innovation covariance of each tracker (N,3,3)
+    """
+    pos, vel, pp, pv, vv = Decoupled_Kalman_Filter_Tracker._predict_stacked(trackers, time)
+    S = np.zeros((len(trackers), 3, 3))
+    axes = np.arange(3)
+    S[:, axes, axes] = pp + 2.0 * pv + vv + trackers[0].r
+    return pos + vel - trackers[0].z, S
+
+  @staticmethod
+  def update_batch(trackers, Y, times):
+    """
+      Filter one measurement into each of many trackers sharing a noise
+      model, vectorized across the trackers and axes. Only the filter state
+      is updated, track_message() records the measurements. The
+      measurements must not be older than the state of their tracker, out
+      of sequence measurements go through add_measurement()
+
+      ...
+      Parameters
+      -------
+      trackers: list
+          Decoupled_Kalman_Filter_Tracker with a state
+      Y: np array
+          measured position for each tracker (N,3)
+      times: list
+          time of each measurement
+      Returns
+      -------
+      None:
+          none
+    """
+    Y = Y + trackers[0].z
+    pos, vel, pp, pv, vv = axis_update(
+      *Decoupled_Kalman_Filter_Tracker._predict_stacked(trackers, times), Y, trackers[0].r)
+    X = np.concatenate((pos, vel), axis=1)[:, :, None]
+    P = np.stack((pp, pv, vv), axis=1)
+    Y = Y[:, :, None]
+    for i, tracker in enumerate(trackers):
+      tracker.X = X[i]
+      tracker.P = P[i]
+      tracker.time = times[i]
+      tracker._remember(Y[i])
+
+
+class SquareRoot_Kalman_Filter_Tracker(Kalman_Filter_Tracker):
+  """
+    The dense Kalman filter run on a square root S of the covariance
+    (P = S S^T) instead of the covariance. The time update is the QR
+    decomposition of predict_sqrt and the measurement update the Potter
+    update of update_sqrt, the covariance is only formed by covariance()
+    so it stays symmetric positive semi definite whatever the rounding
+    error, with half the dynamic range of P in the factor
+
+    ...
+
+    Attributes
+    ----------
+    P : np matrix
+        factor S of the state covariance (6,6), P = S S^T
+    Q_half : np matrix
+        factor of the process noise, Q = Q_half Q_half^T
+  """
+  def __init__(self, retention='last-k', capacity=100, steady_state=False,
+               oosm_window=DEFAULT_OOSM_WINDOW, oosm_depth=DEFAULT_OOSM_DEPTH) -> None:
+    super().__init__(retention, capacity, 'standard', steady_state, oosm_window, oosm_depth)
+    self.kernel = 'sqrt'
+    self._update = update_sqrt
+    self.Q_half = sqrt_factor(self.Q)
+    # the identity is its own factor
+    self.P = np.identity(6)
+
+  def predict(self, time):
+    """
+      Predict the stored filter state forward, new_P is the factor of the
+      predicted covariance
+    """
+    dt = time - self.time
+    A, B, A_T = transition_matrices(float(dt))
+    new_X = A @ self.X + B @ self.u + self.w
+    new_S = predict_sqrt(self.P, A, self.Q_half)
+    HotLog.debug("dt: %s new measurement prediction: \n%s\nnew S: \n%s", dt, new_X, new_S)
+    return new_X, new_S
+
+  def covariance(self, P=None):
+    S = self.P if P is None else P
+    return S @ S.T
+
+  def predict_measurement(self, time):
+    if self.X is None:
+      return np.zeros(3), np.identity(3)
+    new_X, new_S = self.predict(time)
+    z_pred = (self.H @ new_X).ravel() - self.z
+    HS = self.H @ new_S
+    return z_pred, HS @ HS.T + self.R
@@ -0,0 +1,165 @@
+import bisect
+import numpy as np
+
+import measurement_pb2
+from ColumnarCodec import MEASUREMENT_FIELDS
+
+# Supported measurement retention policies
+#   none   - no measurements are published with the track
+#   last-k - the k most recent measurements are published with the track
+#   all    - every measurement is kept and published with the track
+RETENTION_POLICIES = ('none', 'last-k', 'all')
+
+# Tracking strategies look back at the previous measurement, so even with
+# the 'none' policy a couple of measurements are always retained
+MIN_CAPACITY = 2
+_TIME = MEASUREMENT_FIELDS.index('time')
+# Rows first allocated for the unbounded 'all' policy, doubled when full
+INITIAL_ROWS = 16
+
+class MeasurementHistory:
+  """
+    A fixed capacity ring buffer holding the most recent measurements of a
+    track along with their serialized bytes and a float64 row of their
+    MEASUREMENT_FIELDS, so publishing a track never has to serialize or
+    unpack the same measurement twice. Columnar measurements are only
+    serialized once a v1 track message asks for them
+
+    Attributes
+    ---------
+    retention: str
+      measurement retention policy, one of RETENTION_POLICIES
+    capacity: int
+      number of measurements held in the ring buffer, unbounded with
+      the 'all' policy
+    count: int
+      total number of measurements ever added to the history
+
+    Methods
+    --------
+    append()
+      add a new measurement to the history, in time order
+    serialized()
+      the serialized measurements to publish with the track, oldest first
+    columns()
+      the measurements to publish with the track as columnar arrays
+  """
+  def __init__(self, retention='last-k', capacity=100) -> None:
+    if retention not in RETENTION_POLICIES:
+      raise ValueError(f"Invalid retention policy {retention}, " +
+                       f"expected one of {RETENTION_POLICIES}")
+    self.retention = retention
+    self.capacity = None if retention == 'all' else max(capacity, MIN_CAPACITY)
+    self.count = 0
+    self._meas = []
+    self._bytes = []
+    self._rows = np.zeros((self.capacity or INITIAL_ROWS, len(MEASUREMENT_FIELDS)))
+    self._next = 0
+    self._newest = float('-inf')
+
+  def __len__(self):
+    return len(self._meas)
+
+  def __getitem__(self, i):
+    return self._meas[self._index(i)]
+
+  def _index(self, i):
+    size = len(self._meas)
+    if i < -size or i >= size:
+      raise IndexError("measurement history index out of range")
+    if self.capacity is None or size < self.capacity:
+      return i % size
+    return (self._next + i) % size
+
+  def append(self, meas: measurement_pb2.measurement) -> None:
+    """
+      Add a new measurement to the history, overwriting the oldest
+      measurement once the ring buffer is full. An out of sequence
+      measurement, older than the newest one held, is inserted in time order
+
+      Parameters
+      ---------
+      meas: measurement_pb2.measurement
+        new measurement for the track, or a ColumnarCodec.MeasurementRow
+    """
+    data = meas.SerializeToString() if isinstance(meas, measurement_pb2.measurement) else None
+    # in MEASUREMENT_FIELDS order
+    row = (meas.x, meas.y, meas.z, meas.time, meas.true_x, meas.true_y, meas.true_z)
+    self.count += 1
+    if meas.time < self._newest:
+      self._insert(meas, data, row)
+      return
+    self._newest = meas.time
+    size = len(self._meas)
+    if self.capacity is None or size < self.capacity:
+      if size == self._rows.shape[0]:
+        self._rows = np.concatenate((self._rows, np.zeros_like(self._rows)))
+      self._rows[size] = row
+      self._meas.append(meas)
+      self._bytes.append(data)
+    else:
+      self._rows[self._next] = row
+      self._meas[self._next] = meas
+      self._bytes[self._next] = data
+      self._next = (self._next + 1) % self.capacity
+
+  def _insert(self, meas, data, row) -> None:
+    """
+      Insert a measurement in time order, unrolling the ring buffer. The
+      oldest measurement is dropped when full, which may be the late one
+    """
+    meas_list = self._meas[self._next:] + self._meas[:self._next]
+    bytes_list = self._bytes[self._next:] + self._bytes[:self._next]
+    rows = self._ordered_rows().T
+    i = bisect.bisect_right(rows[:, _TIME].tolist(), meas.time)
+    meas_list.insert(i, meas)
+    bytes_list.insert(i, data)
+    rows = np.insert(rows, i, row, axis=0)
+    if self.capacity is not None and len(meas_list) > self.capacity:
+      del meas_list[0]
+      del bytes_list[0]
+      rows = rows[1:]
+    if rows.shape[0] > self._rows.shape[0]:
+      self._rows = np.concatenate((self._rows, np.zeros_like(self._rows)))
+    self._rows[:rows.shape[0]] = rows
+    self._meas = meas_list
+    self._bytes = bytes_list
+    self._next = 0
+
+  def _ordered_rows(self):
+    # oldest first, transposed to one contiguous row per field and copied
+    # so later appends never change the result
+    size = len(self._meas)
+    if self._next == 0:
+      return self._rows[:size].T.copy()
+    return np.concatenate((self._rows[self._next:size].T, self._rows[:self._next].T), axis=1)
+
+  def serialized(self):
+    """
+      The already serialized measurements to publish with the track
+
+      Returns
+      ---------
+      measurements: list
+        serialized measurement_pb2.measurement bytes, oldest first
+    """
+    if self.retention == 'none':
+      return []
+    for i, data in enumerate(self._bytes):
+      if data is None:
+        self._bytes[i] = measurement_pb2.measurement(**self._meas[i]._asdict()).SerializeToString()
+    return self._bytes[self._next:] + self._bytes[:self._next]
+
+  def columns(self):
+    """
+      The measurements to publish with the track as columnar arrays
+
+      Returns
+      ---------
+      columns: dict
+        maps each name in MEASUREMENT_FIELDS to a float64 array, oldest
+        first, rows of one copy of the retained measurements
+    """
+    if self.retention == 'none':
+      return dict(zip(MEASUREMENT_FIELDS, np.zeros((len(MEASUREMENT_FIELDS), 0))))
+    return dict(zip(MEASUREMENT_FIELDS, self._ordered_rows()))
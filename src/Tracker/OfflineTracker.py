@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import numpy as np
+import os
+import sys
+import time
+
+from concurrent import futures
+
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+src_dir = os.path.dirname(script_path)
+for name in ("auto_generated", "Common", "Simulator"):
+  sys.path.insert(1, os.path.join(src_dir, name))
+import Association
+import Metrics
+import SimFileLoader
+from Kalman_Filter_Tracker import KERNELS, DEFAULT_OOSM_WINDOW
+from TrackStrategyFactory import TrackStrategyFactory
+
+# Chi-square bound for 6 degrees of freedom at 95% probability, a
+# consistent filter has 5% of its NEES values above it
+NEES_BOUND = 12.592
+
+# Covariances with a larger condition number are treated as singular, their
+# NEES is left undefined
+MAX_CONDITION = 1e12
+
+def input_args():
+  """
+    Input argument parser
+    ...
+  """
+  parser = argparse.ArgumentParser(description='Run the tracker offline over recorded ' +
+                                               'scenarios and report its accuracy')
+  parser.add_argument('files', nargs='+',
+                    help='SimFileCreator CSV/npz files, each file is run as its own scenario')
+  parser.add_argument('-f', '--filter', default="kft", choices=['kft', 'ivt'],
+                    help='Select tracker filter type' +
+                          '  option - description' +
+                          '  kft = kalman filter tracker' +
+                          '  ivt = instantaneous velocity tracker')
+  parser.add_argument('--kernel', default="legacy", choices=list(KERNELS),
+                    help='Kalman filter update kernel, see tracker.py --kernel')
+  parser.add_argument('--steadystate', action='store_true',
+                    help='Switch Kalman filter tracks to a constant gain update once ' +
+                          'their gain converges, see tracker.py --steadystate')
+  parser.add_argument('--oosmwindow', type=float, default=DEFAULT_OOSM_WINDOW,
+                    help='Seconds an out of sequence measurement may trail its track ' +
+                          f'(default: {DEFAULT_OOSM_WINDOW:g})')
+  parser.add_argument('-g', '--gate', type=float, default=Association.DEFAULT_GATE,
+                    help='Chi-square association gate on the squared Mahalanobis ' +
+                          f'distance (default: {Association.DEFAULT_GATE})')
+  parser.add_argument('-m', '--maxmisses', type=int, default=3,
+                    help='Scans a track may go without a measurement before it is ' +
+                          'dropped (default: 3)')
+  parser.add_argument('-c', '--cellsize', type=float, default=None,
+                    help='Cell size of the spatial grid used to find candidate ' +
+                          'track/measurement pairs, by default the pairs are bounded by the gate')
+  parser.add_argument('-s', '--settle', type=int, default=2,
+                    help='Updates of each track left out of the accuracy summary ' +
+                          'while its velocity settles (default: 2)')
+  parser.add_argument('-w', '--workers', type=int, default=None,
+                    help='Number of worker processes the files are split across ' +
+                          '(default: number of cpus)')
+  parser.add_argument('-o', '--output', default=None,
+                    help='Write the per file and overall report as JSON to this file')
+  parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Verbose logging')
+  args = parser.parse_args()
+  if args.steadystate and args.kernel in ('legacy', 'axis'):
+    parser.error(f"--steadystate is not supported by the {args.kernel} kernel")
+
+  logLevel = logging.INFO
+  if args.verbose:
+    logLevel = logging.DEBUG
+  logging.basicConfig(
+    format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+          '[%(filename)s:%(lineno)d] %(message)s',
+    datefmt='%Y-%m-%d:%H:%M:%S',
+    level=logLevel)
+  return args
+
+def scans(tracks):
+  """
+    Split padded tracks into the measurement groups of each scan, every
+    measurement taken at the same time is one group
+
+    Parameters
+    ---------
+    tracks: dict
+      padded tracks, see SimFileLoader.load_sim_files
+
+    Returns
+    ---------
+    groups: list
+      measurement columns of each scan in time order, see
+      ColumnarCodec.MEASUREMENT_FIELDS
+    truth: np array
+      true position and velocity of each measurement in scan order (M,6)
+  """
+  valid = ~np.isnan(tracks['time'])
+  time = tracks['time'][valid]
+  order = np.argsort(time, kind='stable')
+  time = time[order]
+  meas = tracks['meas'][valid][order]
+  position = tracks['truth'][valid][order]
+  velocity = tracks['truth_velocity'][valid][order]
+  columns = {'x': meas[:, 0], 'y': meas[:, 1], 'z': meas[:, 2], 'time': time,
+             'true_x': position[:, 0], 'true_y': position[:, 1], 'true_z': position[:, 2]}
+  bounds = np.nonzero(np.diff(time))[0] + 1
+  groups = [dict(zip(columns, split))
+            for split in zip(*(np.split(column, bounds) for column in columns.values()))]
+  return groups, np.concatenate((position, velocity), axis=1)
+
+def track_errors(truth, track_id, X, P, settle=0):
+  """
+    Estimation errors of every track update, vectorized over the updates
+
+    Parameters
+    ---------
+    truth: np array
+      true position and velocity of the measurement of each update (M,6)
+    track_id, X, P: np array
+      track, state (M,6) and covariance (M,6,6) after each update, see
+      TrackStrategyFactory.process_states
+    settle: int
+      leading updates of each track left out
+
+    Returns
+    ---------
+    errors: dict
+      'position' and 'velocity' errors (K,3) and 'nees' (K,) of the kept
+      updates, the NEES is NaN without a covariance or with a singular one
+  """
+  # number of earlier updates of the same track
+  order = np.argsort(track_id, kind='stable')
+  _, start, count = np.unique(track_id[order], return_index=True, return_counts=True)
+  rank = np.empty(track_id.size, dtype=np.int64)
+  rank[order] = np.arange(track_id.size) - np.repeat(start, count)
+  keep = rank >= settle
+  error = X[keep] - truth[keep]
+  nees = np.full(error.shape[0], np.nan)
+  P = P[keep]
+  covariance = np.flatnonzero(~np.isnan(P).any(axis=(1, 2)))
+  # only the updates with a singular covariance are left undefined
+  covariance = covariance[np.linalg.cond(P[covariance]) < MAX_CONDITION]
+  if covariance.size:
+    e = error[covariance]
+    nees[covariance] = np.einsum('mi,mi->m', e,
+                                 np.linalg.solve(P[covariance], e[..., None])[..., 0])
+  return {'position': error[:, :3], 'velocity': error[:, 3:], 'nees': nees}
+
+def summarize(errors):
+  """
+    Accuracy summary of a set of track errors, see track_errors
+  """
+  nees = errors['nees'][~np.isnan(errors['nees'])]
+  count = errors['position'].shape[0]
+  return {'updates': count,
+          'position_rmse': float(np.sqrt(np.sum(errors['position'] ** 2) / count)) if count else None,
+          'velocity_rmse': float(np.sqrt(np.sum(errors['velocity'] ** 2) / count)) if count else None,
+          'nees_mean': float(np.mean(nees)) if nees.size else None,
+          'nees_above_bound': float(np.mean(nees > NEES_BOUND)) if nees.size else None}
+
+def run_file(path, factory_args, settle=2):
+  """
+    Run a TrackStrategyFactory over the scans of one SimFileCreator file,
+    with no gRPC and no pacing between scans
+
+    Returns
+    ---------
+    result: dict
+      the file, its number of true targets and of started tracks, the
+      processing seconds and the errors of every kept update
+  """
+  starttime = time.perf_counter()
+  tracks = SimFileLoader.load_sim_files([path])
+  groups, truth = scans(tracks)
+  factory = TrackStrategyFactory(metrics=Metrics.MetricsRegistry(), **factory_args)
+  states = [factory.process_states(group) for group in groups]
+  track_id = np.concatenate([state[0] for state in states])
+  X = np.concatenate([state[1] for state in states])
+  P = np.concatenate([state[2] for state in states])
+  if factory.filter == 'kft' and factory.kernel == 'legacy':
+    # the legacy kernel never applies the gain, its P is not the error
+    # covariance of its state and the NEES is undefined
+    P[:] = np.nan
+  errors = track_errors(truth, track_id, X, P, settle)
+  elapsed = time.perf_counter() - starttime
+  logging.debug(f"ran {path} {truth.shape[0]} measurements in {elapsed:.3f} s")
+  return {'file': path, 'targets': int(tracks['track_id'].size),
+          'tracks': int(np.unique(track_id).size), 'seconds': elapsed, 'errors': errors}
+
+def _init_worker(level):
+  # the per scan tracker logging of every file would flood the log
+  logging.getLogger().setLevel(level)
+
+def main(args):
+  starttime = time.time()
+  factory_args = dict(filter_type=args.filter, retention='none', gate=args.gate,
+                      max_misses=args.maxmisses, cell_size=args.cellsize,
+                      kernel=args.kernel, steady_state=args.steadystate,
+                      oosm_window=args.oosmwindow)
+  worker_level = logging.DEBUG if args.verbose else logging.WARNING
+  with futures.ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                   initargs=(worker_level,)) as executor:
+    results = list(executor.map(run_file, args.files, [factory_args] * len(args.files),
+                                [args.settle] * len(args.files)))
+  report = {'files': []}
+  for result in results:
+    row = {name: result[name] for name in ('file', 'targets', 'tracks', 'seconds')}
+    row.update(summarize(result['errors']))
+    report['files'].append(row)
+    logging.debug(f"{row}")
+  errors = {name: np.concatenate([result['errors'][name] for result in results])
+            for name in ('position', 'velocity', 'nees')}
+  report['total'] = summarize(errors)
+  report['total'].update(files=len(results), seconds=time.time() - starttime,
+                         targets=sum(result['targets'] for result in results),
+                         tracks=sum(result['tracks'] for result in results))
+  total = report['total']
+  logging.info(f"ran {total['files']} files ({total['updates']} updates) in " +
+               f"{total['seconds']:.2f} s, {total['tracks']} tracks for {total['targets']} targets, " +
+               f"position RMSE {total['position_rmse']} velocity RMSE {total['velocity_rmse']} " +
+               f"mean NEES {total['nees_mean']} ({total['nees_above_bound']} above {NEES_BOUND})")
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  return report
+
+if __name__ == "__main__":
+  args = input_args()
+  main(args)
@@ -0,0 +1,183 @@
+import logging
+import multiprocessing
+import numpy as np
+import threading
+
+import measurement_pb2
+import HotLog
+from ColumnarCodec import MEASUREMENT_FIELDS, TRACK_FIELDS
+from TrackStrategyFactory import TrackStrategyFactory
+
+# Large primes used to hash the integer cell coordinates
+_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+def _worker(conn, shard, shards, factory_args):
+  """
+    Worker process loop, runs an independent TrackStrategyFactory over the
+    measurements routed to its shard
+  """
+  track_int = TrackStrategyFactory(**factory_args)
+  # interleave the track ids so no two shards hand out the same id
+  track_int.track_id = shard + 1
+  track_int.track_id_step = shards
+  while True:
+    request = conn.recv()
+    if request is None:
+      break
+    kind, payload = request
+    if kind == 'v1':
+      group = measurement_pb2.measurement_group(measurements=payload)
+      conn.send(list(track_int.process_measurement(group).tracks))
+    else:
+      conn.send(track_int.process_columns(payload))
+  conn.close()
+
+class ShardedTrackStrategyFactory:
+  """
+    A class used to spread the tracking of a measurement group over several
+    worker processes so filtering is no longer limited to one core by the
+    GIL. Measurements are routed to a shard by hashing the spatial cell
+    they fall in, each worker runs its own TrackStrategyFactory and the
+    resulting track groups are merged before they are published. It can be
+    used anywhere a TrackStrategyFactory is
+
+    A target that crosses into a cell owned by another shard is picked up
+    as a new track by that shard, so shard_cell_size should be large compared
+    to the distance targets travel over their lifetime
+
+    Attributes
+    ---------
+    shards: int
+      number of worker processes
+    shard_cell_size: float
+      edge length of the spatial cells used to route measurements
+    routed: np array
+      number of measurements routed to each shard so far
+
+    Methods
+    --------
+    process_measurement()
+      process a measurement group across the shards
+    process_columns()
+      process a columnar (v2) measurement group across the shards
+    close()
+      stop the worker processes
+  """
+  def __init__(self, shards, shard_cell_size, **factory_args) -> None:
+    self.shards = shards
+    self.shard_cell_size = shard_cell_size
+    self.routed = np.zeros(shards, dtype=np.int64)
+    # a single scan is in flight across the workers at a time
+    self._lock = threading.Lock()
+    self._conns = []
+    self._workers = []
+    for shard in range(shards):
+      parent_conn, child_conn = multiprocessing.Pipe()
+      worker = multiprocessing.Process(target=_worker, daemon=True,
+                                       args=(child_conn, shard, shards, factory_args))
+      worker.start()
+      child_conn.close()
+      self._conns.append(parent_conn)
+      self._workers.append(worker)
+    logging.info(f"Running tracker across {shards} shards")
+
+  def route(self, positions):
+    """
+      Shard of each measured position
+
+      Parameters
+      ---------
+      positions: np array
+        measured positions (M,3)
+
+      Returns
+      ---------
+      shard: np array
+        shard index of each position (M,)
+    """
+    cells = np.floor(np.asarray(positions, dtype=float).reshape(-1, 3) /
+                     self.shard_cell_size).astype(np.int64)
+    keys = np.bitwise_xor.reduce(cells * _PRIMES, axis=-1)
+    return keys % self.shards
+
+  def _check_worker(self, shard):
+    worker = self._workers[shard]
+    if not worker.is_alive():
+      raise RuntimeError(f"shard {shard} worker process exited with code {worker.exitcode}")
+
+  def _scatter(self, kind, payloads):
+    """
+      Send every shard its part of the scan, empty where no measurement was
+      routed to it so its tracks still coast and are dropped, and gather
+      the track groups of all the shards
+    """
+    with self._lock:
+      for shard in range(self.shards):
+        self._check_worker(shard)
+        self._conns[shard].send((kind, payloads[shard]))
+      results = []
+      for shard in range(self.shards):
+        try:
+          results.append(self._conns[shard].recv())
+        except EOFError:
+          self._workers[shard].join(timeout=1.0)
+          self._check_worker(shard)
+          raise RuntimeError(f"shard {shard} worker process closed its pipe")
+      return results
+
+  def process_measurement(self, request):
+    measurements = [measurement_pb2.measurement.FromString(data)
+                    for data in request.measurements]
+    Y = np.array([[meas.x, meas.y, meas.z] for meas in measurements]).reshape(-1, 3)
+    shard = self.route(Y)
+    self.routed += np.bincount(shard, minlength=self.shards)
+    payloads = []
+    for i in range(self.shards):
+      # forward the measurements as received, no re-serialization
+      payloads.append([request.measurements[j] for j in np.nonzero(shard == i)[0]])
+    tracks = []
+    for shard_tracks in self._scatter('v1', payloads):
+      tracks.extend(shard_tracks)
+    HotLog.sampled(logging.INFO, "merged track group with %d track messages", len(tracks))
+    return measurement_pb2.track_group(tracks=tracks)
+
+  def process_columns(self, columns):
+    positions = np.column_stack((columns['x'], columns['y'], columns['z']))
+    shard = self.route(positions)
+    self.routed += np.bincount(shard, minlength=self.shards)
+    payloads = [{name: np.asarray(columns[name])[shard == i] for name in MEASUREMENT_FIELDS}
+                for i in range(self.shards)]
+    results = self._scatter('v2', payloads)
+    merged = {name: np.concatenate([np.zeros(0)] + [result[name] for result in results])
+              for name in TRACK_FIELDS}
+    merged['measurements'] = [history for result in results
+                              for history in result['measurements']]
+    HotLog.sampled(logging.INFO, "merged columnar track group with %d tracks",
+                   len(merged['measurements']))
+    return merged
+
+  def close(self):
+    """
+      Stop the worker processes
+    """
+    with self._lock:
+      for conn, worker in zip(self._conns, self._workers):
+        if worker.is_alive():
+          conn.send(None)
+      for worker in self._workers:
+        worker.join()
+
+def create_track_int(args):
+  """
+    Create the track manager selected by the tracker command line arguments,
+    a ShardedTrackStrategyFactory when more than one shard is requested and
+    a TrackStrategyFactory otherwise
+  """
+  factory_args = dict(filter_type=args.filter, retention=args.retention,
+                      history=args.history, gate=args.gate,
+                      max_misses=args.maxmisses, cell_size=args.cellsize,
+                      kernel=args.kernel, steady_state=args.steadystate,
+                      oosm_window=args.oosmwindow)
+  if args.shards > 1:
+    return ShardedTrackStrategyFactory(args.shards, args.shardcell, **factory_args)
+  return TrackStrategyFactory(**factory_args)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import numpy as np
+import os
+import sys
+import time
+
+script_path = os.path.dirname(os.path.abspath( __file__ ))
+src_dir = os.path.dirname(script_path)
+for name in ("auto_generated", "Common", "Simulator", "TrackPlot", "TrackConsumer"):
+  sys.path.insert(1, os.path.join(src_dir, name))
+import Kalman_Filter_Tracker as kft
+import SimFileLoader
+import TrackLoader
+
+# Kernels whose filter the smoother can run, the legacy kernel never
+# applies the gain to the covariance so there is nothing to smooth with
+SMOOTHER_KERNELS = ('standard', 'axis')
+
+def input_args():
+  """
+    Input argument parser
+    ...
+  """
+  parser = argparse.ArgumentParser(description='Rauch-Tung-Striebel smoothing of ' +
+                                               'recorded tracks')
+  parser.add_argument('files', nargs='+',
+                    help='SimFileCreator CSV/npz files or TrackConsumer track files')
+  parser.add_argument('-k', '--kernel', default='standard', choices=SMOOTHER_KERNELS,
+                    help='Kalman filter model smoothed' +
+                          '  option - description' +
+                          '  standard = dense model of the standard kernel' +
+                          '  axis = per axis model of the axis kernel')
+  parser.add_argument('-p', '--period', type=float, default=2.0,
+                    help='Seconds between the measurements of text track files, ' +
+                          'which do not record measurement times (default: 2)')
+  parser.add_argument('-o', '--output', default='smoothed.npz',
+                    help='npz file the filtered and smoothed states are written to')
+  parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Verbose logging')
+  args = parser.parse_args()
+
+  logLevel = logging.INFO
+  if args.verbose:
+    logLevel = logging.DEBUG
+  logging.basicConfig(
+    format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+          '[%(filename)s:%(lineno)d] %(message)s',
+    datefmt='%Y-%m-%d:%H:%M:%S',
+    level=logLevel)
+  return args
+
+def load_track_file(path, period=2.0):
+  """
+    Load the measurements of a TrackConsumer track file as padded tracks.
+    Each track update carries the measurement history of its track, the
+    newest measurement of every update is the one the update was made with
+
+    Parameters
+    ---------
+    path: str
+      text track file or binary TrackStore
+    period: float
+      seconds between consecutive measurements of a track, used for text
+      files which do not record measurement times
+
+    Returns
+    ---------
+    tracks: dict
+      see SimFileLoader.pad_tracks, with 'meas' and 'truth' positions (N,T,3)
+  """
+  _, meas = TrackLoader.load_tracks(path)
+  last = TrackLoader.last_measurements(meas)
+  track_id = meas['track_id'][last]
+  times = meas['time'][last]
+  if np.isnan(times).any():
+    # the n-th update of a track is taken to be its n-th measurement
+    order = np.argsort(track_id, kind='stable')
+    _, start, count = np.unique(track_id[order], return_index=True, return_counts=True)
+    times = np.empty(track_id.size)
+    times[order] = period * (np.arange(order.size) - np.repeat(start, count))
+  else:
+    # an update publishing a late measurement repeats the newest one
+    _, unique = np.unique(np.stack((track_id, times)), axis=1, return_index=True)
+    last, track_id, times = last[unique], track_id[unique], times[unique]
+  position = np.stack([meas[name][last] for name in ('x', 'y', 'z')], axis=1)
+  truth = np.stack([meas[name][last] for name in ('true_x', 'true_y', 'true_z')], axis=1)
+  return SimFileLoader.pad_tracks(track_id, times, meas=position, truth=truth)
+
+def load_tracks(paths, period=2.0):
+  """
+    Load SimFileCreator output or TrackConsumer track files as padded
+    tracks, see SimFileLoader.load_sim_files and load_track_file
+  """
+  sim = [path for path in paths if path.endswith(('.csv', '.npz'))]
+  track_files = [path for path in paths if path not in sim]
+  if sim and track_files:
+    raise ValueError("Smooth SimFileCreator files and track files separately")
+  if track_files:
+    if len(track_files) > 1:
+      raise ValueError("Smooth one track file at a time")
+    return load_track_file(track_files[0], period)
+  return SimFileLoader.load_sim_files(sim)
+
+def _model(kernel):
+  if kernel not in SMOOTHER_KERNELS:
+    raise ValueError(f"Invalid smoother kernel {kernel}, expected one of {SMOOTHER_KERNELS}")
+  return kft.create_tracker(kernel=kernel)
+
+def _transitions(dt):
+  """
+    Stacked state transition matrices of a time step per track (N,6,6)
+  """
+  A = np.broadcast_to(np.identity(6), dt.shape + (6, 6)).copy()
+  for axis in range(3):
+    A[..., axis, axis + 3] = dt
+  return A
+
+def rts_backward(X_filter, P_filter, X_pred, P_pred, A):
+  """
+    Rauch-Tung-Striebel backward pass, vectorized across tracks
+
+    Parameters
+    ---------
+    X_filter, P_filter: np array
+      filtered states (N,T,6,1) and covariances (N,T,6,6)
+    X_pred, P_pred: np array
+      states and covariances predicted to each step from the step before
+      it, step 0 is unused
+    A: np array
+      state transition matrix into each step (N,T,6,6)
+
+    Returns
+    ---------
+    X, P: np array
+      smoothed states (N,T,6,1) and covariances (N,T,6,6)
+  """
+  X = X_filter.copy()
+  P = P_filter.copy()
+  for k in range(X.shape[1] - 2, -1, -1):
+    # C = P_k A^T P_pred^-1, solved as P_pred C^T = A P_k
+    C = np.linalg.solve(P_pred[:, k + 1], A[:, k + 1] @ P_filter[:, k]).transpose(0, 2, 1)
+    X[:, k] = X_filter[:, k] + C @ (X[:, k + 1] - X_pred[:, k + 1])
+    P[:, k] = P_filter[:, k] + C @ (P[:, k + 1] - P_pred[:, k + 1]) @ C.transpose(0, 2, 1)
+  return X, P
+
+def rts_smooth(time, Y, length=None, kernel='standard'):
+  """
+    Forward Kalman filter and Rauch-Tung-Striebel smoother over whole
+    tracks, with the motion and noise model of a Kalman_Filter_Tracker
+    kernel. Every step runs as stacked numpy operations across all the
+    tracks, the forward filter gives the same states as feeding the
+    measurements to a tracker one at a time
+
+    Parameters
+    ---------
+    time: np array
+      measurement times of each track (N,T)
+    Y: np array
+      measured positions of each track (N,T,3)
+    length: np array
+      number of measurements of each track (N,), tracks are left aligned
+      and padded after their last measurement. None when every track has T
+    kernel: str
+      tracker kernel whose model is used, one of SMOOTHER_KERNELS
+
+    Returns
+    ---------
+    result: dict
+      'X_filter' and 'X' the filtered and smoothed states (N,T,6),
+      'P_filter' and 'P' their covariances (N,T,6,6). The padding after a
+      track repeats its last state
+  """
+  model = _model(kernel)
+  time = np.asarray(time, dtype=float)
+  Y = np.asarray(Y, dtype=float)[..., None] + model.z
+  num_tracks, num_steps = time.shape
+  if length is None:
+    length = np.full(num_tracks, num_steps)
+  H = model.H
+  I = np.identity(6)
+
+  X_filter = np.zeros((num_tracks, num_steps, 6, 1))
+  P_filter = np.zeros((num_tracks, num_steps, 6, 6))
+  X_pred = np.zeros_like(X_filter)
+  P_pred = np.zeros_like(P_filter)
+  A = np.broadcast_to(I, P_filter.shape).copy()
+  if num_steps:
+    # a tracker starts from its first measurement, without the noise term
+    X_filter[:, 0, :3] = Y[:, 0] - model.z
+    P_filter[:, 0] = I
+  for k in range(1, num_steps):
+    valid = (k < length)[:, None, None]
+    dt = np.where(valid[:, 0, 0], time[:, k] - time[:, k - 1], 0.0)
+    A_k = _transitions(dt)
+    X_k = A_k @ X_filter[:, k - 1]
+    P_k = A_k @ P_filter[:, k - 1] @ A_k.transpose(0, 2, 1) + model.Q
+    K = np.linalg.solve(H @ P_k @ H.T + model.R, H @ P_k.transpose(0, 2, 1)).transpose(0, 2, 1)
+    Y_k = np.where(valid, Y[:, k], 0.0)
+    # padding steps hold the last state, predicted and filtered alike
+    X_filter[:, k] = np.where(valid, X_k + K @ (Y_k - H @ X_k), X_filter[:, k - 1])
+    P_filter[:, k] = np.where(valid, (I - K @ H) @ P_k, P_filter[:, k - 1])
+    X_pred[:, k] = np.where(valid, X_k, X_filter[:, k - 1])
+    P_pred[:, k] = np.where(valid, P_k, P_filter[:, k - 1])
+    A[:, k] = np.where(valid, A_k, I)
+  X, P = rts_backward(X_filter, P_filter, X_pred, P_pred, A)
+  return {'X_filter': X_filter[..., 0], 'P_filter': P_filter, 'X': X[..., 0], 'P': P}
+
+def fixed_lag(tracker, lag):
+  """
+    Fixed lag smoothed state of a live Kalman_Filter_Tracker, the state
+    lag updates behind the newest one smoothed with the updates after it.
+    Runs the backward pass over the states the tracker retains for out of
+    sequence measurements, so the lag is bounded by oosm_depth and the
+    oosm_window (a shorter lag is used when fewer states are retained)
+
+    Parameters
+    ---------
+    tracker: Kalman_Filter_Tracker
+      tracker with at least one update
+    lag: int
+      number of updates to smooth back over
+
+    Returns
+    ---------
+    time: float
+      time of the smoothed state
+    X: np matrix
+      smoothed state (6,1)
+    P: np matrix
+      smoothed covariance (6,6)
+  """
+  if tracker.kernel not in SMOOTHER_KERNELS + ('joseph', 'sqrt'):
+    raise ValueError(f"The {tracker.kernel} kernel does not update the covariance, " +
+                     "its states cannot be smoothed")
+  states = list(tracker.states)[-(lag + 1):]
+  times = np.array([state[0] for state in states])
+  X_filter = np.array([state[1] for state in states], dtype=float)[None]
+  P_filter = np.array([tracker.covariance(state[2]) for state in states])[None]
+  A = _transitions(np.diff(times, prepend=times[0]))[None]
+  X_pred = A @ np.roll(X_filter, 1, axis=1)
+  P_pred = A @ np.roll(P_filter, 1, axis=1) @ A.transpose(0, 1, 3, 2) + tracker.Q
+  X, P = rts_backward(X_filter, P_filter, X_pred, P_pred, A)
+  return times[0], X[0, 0], P[0, 0]
+
+def main(args):
+  starttime = time.time()
+  tracks = load_tracks(args.files, args.period)
+  result = rts_smooth(tracks['time'], tracks['meas'], tracks['length'], args.kernel)
+  np.savez(args.output, **tracks, **result)
+  logging.info(f"smoothed {tracks['track_id'].size} tracks of up to {tracks['time'].shape[1]} " +
+               f"measurements in {time.time() - starttime:.2f} s, written to {args.output}")
+  if 'truth' in tracks:
+    valid = ~np.isnan(tracks['time'])
+    for name in ('X_filter', 'X'):
+      error = np.linalg.norm(result[name][..., :3] - tracks['truth'], axis=-1)[valid]
+      logging.info(f"{name} position RMSE {np.sqrt(np.mean(error ** 2)):.4f}")
+  return result
+
+if __name__ == "__main__":
+  args = input_args()
+  main(args)
@@ -0,0 +1,110 @@
+import numpy as np
+import time
+
+import HotLog
+
+# Offsets of a cell and its 26 neighbours
+_NEIGHBOURS = np.array([(x, y, z) for x in (-1, 0, 1)
+                                  for y in (-1, 0, 1)
+                                  for z in (-1, 0, 1)], dtype=np.int64)
+# Large primes used to hash the integer cell coordinates
+_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+class SpatialGrid:
+  """
+    A spatial hash grid over predicted track positions. It is used to find
+    the track/measurement pairs that are close enough to be worth gating,
+    so association no longer compares every measurement against every track
+
+    Every measurement is paired with the tracks in its own cell and the 26
+    neighbouring cells, so any track within cell_size of a measurement along
+    every axis is a candidate. Hash collisions can only add candidates, they
+    are removed by the gate
+
+    Attributes
+    ---------
+    cell_size: float
+      edge length of a grid cell, should be at least the largest expected
+      distance between a predicted track position and its measurement
+    stats: dict
+      counters from the last build/query, the number of tracks and
+      measurements, candidate pairs, and the build and query times in seconds
+
+    Methods
+    --------
+    build()
+      index a set of predicted track positions
+    candidates()
+      find the candidate track/measurement pairs for a set of measurements
+  """
+  def __init__(self, cell_size) -> None:
+    if cell_size <= 0:
+      raise ValueError(f"cell size must be positive, got {cell_size}")
+    self.cell_size = cell_size
+    self.stats = {'tracks': 0, 'measurements': 0, 'candidates': 0,
+                  'build_time': 0.0, 'query_time': 0.0}
+    self._keys = np.zeros(0, dtype=np.int64)
+    self._order = np.zeros(0, dtype=np.int64)
+
+  def _cells(self, positions):
+    return np.floor(np.asarray(positions, dtype=float) / self.cell_size).astype(np.int64)
+
+  @staticmethod
+  def _hash(cells):
+    return np.bitwise_xor.reduce(cells * _PRIMES, axis=-1)
+
+  def build(self, positions) -> None:
+    """
+      Index a set of predicted track positions, replacing the previous index
+
+      Parameters
+      ---------
+      positions: np array
+        predicted position of each track (T,3)
+    """
+    start = time.perf_counter()
+    keys = self._hash(self._cells(positions).reshape(-1, 3))
+    self._order = np.argsort(keys, kind='stable')
+    self._keys = keys[self._order]
+    self.stats['tracks'] = keys.size
+    self.stats['build_time'] = time.perf_counter() - start
+
+  def candidates(self, points):
+    """
+      Find the candidate track/measurement pairs for a set of measurements
+
+      Parameters
+      ---------
+      points: np array
+        measured positions (M,3)
+
+      Returns
+      ---------
+      track_idx: np array
+        track index of each candidate pair (P,)
+      meas_idx: np array
+        measurement index of each candidate pair (P,)
+    """
+    start = time.perf_counter()
+    cells = self._cells(points).reshape(-1, 3)
+    num_points = cells.shape[0]
+    # hash of every (measurement, neighbouring cell) combination (M,27)
+    keys = self._hash(cells[:, None, :] + _NEIGHBOURS[None, :, :]).ravel()
+    lo = np.searchsorted(self._keys, keys, side='left')
+    hi = np.searchsorted(self._keys, keys, side='right')
+    counts = hi - lo
+    total = int(counts.sum())
+    # expand each [lo, hi) range of the sorted index into individual pairs
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    track_idx = self._order[np.repeat(lo, counts) + offsets]
+    meas_idx = np.repeat(np.arange(keys.size) // _NEIGHBOURS.shape[0], counts)
+    # neighbouring cells can hash to the same bucket, keep each pair once
+    pairs = np.unique(track_idx * max(num_points, 1) + meas_idx)
+    track_idx = pairs // max(num_points, 1)
+    meas_idx = pairs % max(num_points, 1)
+
+    self.stats['measurements'] = num_points
+    self.stats['candidates'] = pairs.size
+    self.stats['query_time'] = time.perf_counter() - start
+    HotLog.debug("spatial grid %s", self.stats)
+    return track_idx, meas_idx
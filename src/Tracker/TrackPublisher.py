@@ -0,0 +1,206 @@
+import collections
+import grpc
+import logging
+import threading
+import time
+
+import measurement_pb2
+import ColumnarCodec
+import HotLog
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+# What publish() does when the outbound queue is full
+#   block        - wait for the publisher thread to make room
+#   drop-oldest  - discard the oldest queued track group
+#   merge-latest - fold the new group into the newest queued group keeping
+#                  only the latest update of each track
+OVERFLOW_POLICIES = ('block', 'drop-oldest', 'merge-latest')
+
+# gRPC status codes worth retrying a publish on
+RETRY_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+def _passthrough(data):
+  return data
+
+class TrackPublisher:
+  """
+    A class used to publish track groups to the track consumer from a
+    dedicated thread, so filtering never waits on the consumer. Track groups
+    are queued in a bounded outbound queue and sent over one reused channel.
+    When the publisher falls behind, the queued groups are coalesced into a
+    single send. Serialized protobuf messages merge by concatenation, so a
+    coalesced group is simply the joined bytes
+
+    Attributes
+    ---------
+    max_queue: int
+      maximum number of track groups waiting to be sent
+    overflow: str
+      overflow policy, one of OVERFLOW_POLICIES
+    max_batch: int
+      maximum number of queued track groups coalesced into one send
+    deadline: float
+      deadline in seconds of each send, None waits forever
+    retries: int
+      number of times a send is retried when the consumer is unavailable
+
+    Methods
+    --------
+    publish()
+      queue a serialized track group for publication
+    stats()
+      queue depth, counters and publish latency
+    close()
+      send the queued track groups and stop the publisher thread
+  """
+  def __init__(self, channel, max_queue=64, overflow='block', max_batch=8,
+               deadline=5.0, retries=2, stream=None) -> None:
+    if overflow not in OVERFLOW_POLICIES:
+      raise ValueError(f"Invalid overflow policy {overflow}, " +
+                       f"expected one of {OVERFLOW_POLICIES}")
+    self.max_queue = max_queue
+    self.overflow = overflow
+    self.max_batch = max_batch
+    self.deadline = deadline
+    self.retries = retries
+    self._stream = stream
+    self._senders = {
+      'v1': channel.unary_unary(
+        '/TrackProducer/ProcessTrack',
+        request_serializer=_passthrough,
+        response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString),
+      'v2': ColumnarCodec.TrackProducerV2Stub(channel).ProcessTrack,
+    }
+    self._queue = collections.deque()
+    self._cond = threading.Condition()
+    self._closed = False
+    self._counters = {'published': 0, 'sends': 0, 'dropped': 0, 'merged': 0,
+                      'failed': 0}
+    self._latency = {'last': 0.0, 'max': 0.0, 'total': 0.0}
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def publish(self, kind, data) -> None:
+    """
+      Queue a serialized track group for publication
+
+      Parameters
+      ---------
+      kind: str
+        'v1' for a measurement_pb2.track_group, 'v2' for an encoded
+        measurement_v2.track_group
+      data: bytes
+        serialized track group
+    """
+    with self._cond:
+      if len(self._queue) >= self.max_queue:
+        if self.overflow == 'block':
+          self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed)
+        elif self.overflow == 'drop-oldest':
+          self._queue.popleft()
+          self._counters['dropped'] += 1
+        elif self._queue[-1][0] == kind:
+          newest_kind, newest, queued_time = self._queue.pop()
+          self._queue.append((kind, _merge_latest(kind, [newest, data]), queued_time))
+          self._counters['merged'] += 1
+          return
+        else:
+          self._queue.popleft()
+          self._counters['dropped'] += 1
+      self._queue.append((kind, data, time.monotonic()))
+      self._cond.notify_all()
+
+  def _next_batch(self):
+    with self._cond:
+      self._cond.wait_for(lambda: self._queue or self._closed)
+      if not self._queue:
+        return None
+      kind, data, queued_time = self._queue.popleft()
+      batch = [data]
+      while (self._queue and len(batch) < self.max_batch and
+             self._queue[0][0] == kind):
+        batch.append(self._queue.popleft()[1])
+      self._cond.notify_all()
+      return kind, batch, queued_time
+
+  def _send(self, kind, data):
+    if kind == 'v1' and self._stream:
+      # a stream closed by the consumer is reopened by the window
+      self._stream.send(measurement_pb2.track_group.FromString(data), timeout=self.deadline)
+      return
+    for attempt in range(self.retries + 1):
+      try:
+        self._senders[kind](data, timeout=self.deadline)
+        return
+      except grpc.RpcError as rpc_error:
+        if rpc_error.code() not in RETRY_CODES or attempt == self.retries:
+          raise
+        time.sleep(0.1 * 2 ** attempt)
+
+  def _run(self):
+    while True:
+      batch = self._next_batch()
+      if batch is None:
+        return
+      kind, groups, queued_time = batch
+      try:
+        self._send(kind, b''.join(groups))
+        latency = time.monotonic() - queued_time
+        self._counters['published'] += len(groups)
+        self._counters['sends'] += 1
+        self._latency['last'] = latency
+        self._latency['max'] = max(self._latency['max'], latency)
+        self._latency['total'] += latency
+        HotLog.debug("published %d track groups in %.3f ms", len(groups), latency * 1e3)
+      except (grpc.RpcError, RuntimeError, TimeoutError) as rpc_error:
+        self._counters['failed'] += len(groups)
+        logging.warning(f"failed to publish {len(groups)} track groups {rpc_error}")
+
+  def stats(self):
+    """
+      Queue depth, counters and publish latency
+
+      Returns
+      ---------
+      stats: dict
+        queue_depth, published, sends, dropped, merged, failed and the
+        last, max and mean latency in seconds from queueing to sent
+    """
+    with self._cond:
+      stats = dict(self._counters, queue_depth=len(self._queue))
+    stats['latency_last'] = self._latency['last']
+    stats['latency_max'] = self._latency['max']
+    stats['latency_mean'] = self._latency['total'] / max(stats['sends'], 1)
+    return stats
+
+  def close(self, timeout=None) -> None:
+    """
+      Send the queued track groups and stop the publisher thread
+    """
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    self._thread.join(timeout)
+
+def _merge_latest(kind, groups):
+  """
+    Merge serialized track groups keeping only the latest update of each track
+  """
+  if kind == 'v2':
+    tracks = ColumnarCodec.decode_track_group(b''.join(groups))
+    latest = {}
+    for i, track_id in enumerate(tracks['track_id'].tolist()):
+      latest[track_id] = i
+    keep = sorted(latest.values())
+    merged = {name: tracks[name][keep] for name in ColumnarCodec.TRACK_FIELDS}
+    if tracks['measurements']:
+      merged['measurements'] = [tracks['measurements'][i] for i in keep]
+    return ColumnarCodec.encode_track_group(merged)
+
+  latest = {}
+  for data in groups:
+    for track_data in measurement_pb2.track_group.FromString(data).tracks:
+      track_id = measurement_pb2.track.FromString(track_data).track_id
+      latest.pop(track_id, None)
+      latest[track_id] = track_data
+  return measurement_pb2.track_group(tracks=list(latest.values())).SerializeToString()
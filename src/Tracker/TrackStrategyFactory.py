@@ -1,56 +1,309 @@
 import logging
+import numpy as np
+import threading
 
+import Association
+import HotLog
+import Metrics
+import TrackerMetrics
 import Inst_Vel_Tracker as ivt
 import Kalman_Filter_Tracker as kft
 import measurement_pb2
+from SpatialGrid import SpatialGrid
+from ColumnarCodec import MEASUREMENT_FIELDS, TRACK_FIELDS, MeasurementRow
 
 class TrackStrategyFactory:
   """
     A class used a configurable interface that can implement
-    various tracking strategies to be performed on groups of measurements
+    various tracking strategies to be performed on groups of measurements.
+    Every track runs its own instance of the tracking strategy, and each
+    measurement group is associated to the tracks with a gated global
+    nearest neighbour assignment
 
     Attributes
     ---------
     track_id: int
       static attribute that can be used to provide unique identifications
       to independant tracks
-    track_strategy: trackStrategyInterface()
-      an instance of a track strategy implementation. This is used as
-      the common interface between various tracking strategies
+    track_id_step: int
+      increment between consecutive track ids, factories running side by
+      side use interleaved ids so they never collide
+    Tracks: list
+      one trackStrategyInterface() instance per active track. Each instance
+      also carries the track_id of the track and the number of consecutive
+      scans it has gone without a measurement (misses)
+    retention: str
+      measurement retention policy used for the track messages
+      (none, last-k, all)
+    history: int
+      number of measurements retained per track with the last-k policy
+    gate: float
+      chi-square gate on the squared Mahalanobis distance between a track
+      and a measurement
+    max_misses: int
+      number of consecutive scans a track may go without a measurement
+      before it is dropped
+    grid: SpatialGrid
+      spatial index over the predicted track positions limiting gating to
+      nearby track/measurement pairs, None bounds the pairs by the gate
+      itself, see Association.candidate_pairs
+    metrics: Metrics.MetricsRegistry
+      registry the parse/associate/update/build stage timers and the track
+      counters are recorded to
+    kernel: str
+      Kalman filter update kernel (legacy, standard, joseph, sqrt, axis),
+      see Kalman_Filter_Tracker.KERNELS. The tracks of the decoupled axis
+      kernel are predicted and updated as one batch per scan
+    steady_state: bool
+      switch Kalman filter tracks to a constant gain update once their gain
+      has converged at a fixed report interval
+    oosm_window: float
+      seconds an out of sequence measurement may trail its Kalman filter
+      track and still be folded in, older measurements are rejected
     
     Methods
     --------
     process_measurement()
       process a measurement group using the configured tracking strategy
+    process_columns()
+      process a columnar (v2) measurement group using the configured
+      tracking strategy
+    process_states()
+      process a columnar measurement group and return the track states,
+      for offline evaluation
   """
   # static track id shared by all instances
   track_id = 1
-  def __init__(self, filter_type='kft') -> None:
+  track_id_step = 1
+  def __init__(self, filter_type='kft', retention='last-k', history=100,
+               gate=Association.DEFAULT_GATE, max_misses=3, cell_size=None,
+               metrics=Metrics.REGISTRY, kernel='legacy', steady_state=False,
+               oosm_window=kft.DEFAULT_OOSM_WINDOW) -> None:
     if filter_type == 'kft':
-      self.track_strategy =  kft.Kalman_Filter_Tracker()
       logging.info(f"Running tracker as Kalman filter")
     elif filter_type == 'ivt':
-      self.track_strategy =  ivt.Inst_Vel_Tracker()
       logging.info(f"Running tracker as instant velocity tracker")
     else:
       logging.error(f"Invalid tracker filter type selction {filter_type}")
+      raise ValueError(f"Invalid tracker filter type {filter_type}")
 
+    if kernel not in kft.KERNELS:
+      raise ValueError(f"Invalid update kernel {kernel}")
+    if steady_state and kernel in ('legacy', 'axis'):
+      raise ValueError(f"The steady state gain is not supported by the {kernel} kernel")
     self.filter = filter_type
+    self.kernel = kernel
+    self.steady_state = steady_state
+    self.oosm_window = oosm_window
+    self._batched = filter_type == 'kft' and kernel == 'axis'
+    self.retention = retention
+    self.history = history
+    self.gate = gate
+    self.max_misses = max_misses
+    self.grid = SpatialGrid(cell_size) if cell_size else None
     self.Tracks = []
-    
+    # the servicers call in from several server threads, one measurement
+    # group is associated and updated at a time
+    self._lock = threading.Lock()
+    self.metrics = metrics
+    self._stages = TrackerMetrics.stage_timers(metrics, ('parse', 'associate', 'update', 'build'))
+    self._started = metrics.counter('tracker_tracks_started_total', 'Tracks started')
+    self._dropped = metrics.counter('tracker_tracks_dropped_total',
+                                    'Tracks dropped after coasting too long')
+    metrics.gauge('tracker_active_tracks', 'Tracks currently maintained',
+                  func=lambda: len(self.Tracks))
+
+  def _new_track(self):
+    if self.filter == 'kft':
+      track_strategy = kft.create_tracker(self.retention, self.history, self.kernel,
+                                          self.steady_state, self.oosm_window)
+    else:
+      track_strategy = ivt.Inst_Vel_Tracker(self.retention, self.history)
+    # New track give it a unique ID
+    track_strategy.track_id = self.track_id
+    track_strategy.misses = 0
+    self.track_id += self.track_id_step
+    HotLog.debug("next available track_id %d", self.track_id)
+    return track_strategy
+
+  def _associate(self, Y, time):
+    """
+      Assign each measurement to at most one track, -1 marks a measurement
+      that falls outside the gate of every track
+    """
+    assignment = np.full(Y.shape[0], -1)
+    if not self.Tracks or Y.shape[0] == 0:
+      return assignment
+    if self._batched:
+      z_pred, S = kft.Decoupled_Kalman_Filter_Tracker.predict_batch(self.Tracks, time)
+    else:
+      predictions = [track.predict_measurement(time) for track in self.Tracks]
+      z_pred = np.array([prediction[0] for prediction in predictions])
+      S = np.array([prediction[1] for prediction in predictions])
+    if self.grid:
+      # only nearby pairs reach the gate
+      self.grid.build(z_pred)
+      track_idx, meas_idx = self.grid.candidates(Y)
+      cost, gated = Association.pair_cost(z_pred, S, Y, track_idx, meas_idx, self.gate)
+      track_idx, meas_idx, cost = track_idx[gated], meas_idx[gated], cost[gated]
+      HotLog.sampled(logging.INFO, "spatial grid %d candidate pairs, build %.3f ms, query %.3f ms",
+                     self.grid.stats['candidates'], self.grid.stats['build_time'] * 1e3,
+                     self.grid.stats['query_time'] * 1e3)
+    else:
+      track_idx, meas_idx = Association.candidate_pairs(z_pred, S, Y, self.gate)
+      cost, gated = Association.pair_cost(z_pred, S, Y, track_idx, meas_idx, self.gate)
+      track_idx, meas_idx, cost = track_idx[gated], meas_idx[gated], cost[gated]
+    tracks, meas = Association.assign(track_idx, meas_idx, cost, len(self.Tracks))
+    assignment[meas] = tracks
+    return assignment
+
+  def _process(self, measurements, Y, history=True):
+    """
+      Associate a group of measurements with the tracks, update the assigned
+      tracks, start new tracks for the unassigned measurements and drop
+      tracks that have coasted too long
+
+      Parameters
+      ---------
+      measurements: list
+        measurement_pb2.measurement or ColumnarCodec.MeasurementRow
+      Y: np array
+        measured positions (M,3)
+      history: bool
+        attach the serialized measurement history to the track messages,
+        the columnar paths read it from the history columns instead
+
+      Returns
+      ---------
+      updated: list
+        (track strategy, measurement_pb2.track) of every updated track
+    """
+    time = max((meas.time for meas in measurements), default=0.0)
+    with self._stages['associate'].time():
+      assignment = self._associate(Y, time)
+    hit = np.zeros(len(self.Tracks), dtype=bool)
+    hit[assignment[assignment >= 0]] = True
+    new_tracks = []
+    updated = []
+    with self._stages['update'].time():
+      batched = np.zeros(len(measurements), dtype=bool)
+      if self._batched:
+        # out of sequence measurements are folded in by their tracker
+        batch = [i for i in np.nonzero(assignment >= 0)[0]
+                 if measurements[i].time >= self.Tracks[assignment[i]].time]
+        if batch:
+          kft.Decoupled_Kalman_Filter_Tracker.update_batch(
+            [self.Tracks[assignment[i]] for i in batch], Y[batch],
+            [measurements[i].time for i in batch])
+          batched[batch] = True
+      for i in range(len(measurements)):
+        if assignment[i] >= 0:
+          track_strategy = self.Tracks[assignment[i]]
+        else:
+          track_strategy = self._new_track()
+          new_tracks.append(track_strategy)
+        if batched[i]:
+          track = track_strategy.track_message(measurements[i], history)
+        else:
+          track = track_strategy.add_measurement(measurements[i], history)
+        track.track_id = track_strategy.track_id
+        track_strategy.misses = 0
+        updated.append((track_strategy, track))
+
+    for i in np.nonzero(~hit)[0]:
+      self.Tracks[i].misses += 1
+    active = len(self.Tracks)
+    self.Tracks = [track for track in self.Tracks
+                   if track.misses <= self.max_misses]
+    self._dropped.inc(active - len(self.Tracks))
+    self._started.inc(len(new_tracks))
+    self.Tracks += new_tracks
+    HotLog.sampled(logging.INFO, "updated %d tracks, started %d tracks, %d active",
+                   len(updated) - len(new_tracks), len(new_tracks), len(self.Tracks))
+    return updated
+
   def process_measurement(self, request):
-    tracks = []
-    for i in range(len(request.measurements)):
-      # For each new measurement in the current measurement group process for new/updated tracks
-      measurement = measurement_pb2.measurement()
-      measurement.ParseFromString(request.measurements[i])
-      track = self.track_strategy.add_measurement(measurement)
-      if len(track.measurements) == 1:
-        # New track give it a unique ID
-        track.track_id = self.track_id
-        self.track_id += 1
-      print(f"next available track_id {self.track_id}")
-      tracks.append(track.SerializeToString())
-    logging.info(f"creating track group with {len(tracks)} track messages")
-    track_grp =  measurement_pb2.track_group(tracks=tracks)
-    return track_grp
\ No newline at end of file
+    with self._stages['parse'].time():
+      measurements = []
+      for i in range(len(request.measurements)):
+        # For each new measurement in the current measurement group process for new/updated tracks
+        measurement = measurement_pb2.measurement()
+        measurement.ParseFromString(request.measurements[i])
+        measurements.append(measurement)
+      Y = np.array([[meas.x, meas.y, meas.z] for meas in measurements]).reshape(-1, 3)
+    with self._lock:
+      updated = self._process(measurements, Y)
+      with self._stages['build'].time():
+        tracks = [track.SerializeToString() for _, track in updated]
+        HotLog.sampled(logging.INFO, "creating track group with %d track messages", len(tracks))
+        track_grp =  measurement_pb2.track_group(tracks=tracks)
+    return track_grp
+
+  def process_columns(self, columns):
+    """
+      process a columnar (v2) measurement group using the configured
+      tracking strategy
+
+      Parameters
+      ---------
+      columns: dict
+        measurement columns as returned by
+        ColumnarCodec.decode_measurement_group
+
+      Returns
+      ---------
+      tracks: dict
+        track columns, and the measurement history of each track, ready for
+        ColumnarCodec.encode_track_group
+    """
+    with self._stages['parse'].time():
+      rows = np.column_stack([columns[name] for name in MEASUREMENT_FIELDS])
+      measurements = list(map(MeasurementRow._make, rows.tolist()))
+    with self._lock:
+      updated = self._process(measurements, rows[:, :3], history=False)
+      with self._stages['build'].time():
+        tracks = np.zeros((len(updated), len(TRACK_FIELDS)))
+        histories = []
+        for i, (track_strategy, track) in enumerate(updated):
+          tracks[i] = [getattr(track, name) for name in TRACK_FIELDS]
+          histories.append(track_strategy.meas_list.columns())
+        HotLog.sampled(logging.INFO, "creating columnar track group with %d tracks", len(histories))
+        track_columns = dict(zip(TRACK_FIELDS, tracks.T))
+        track_columns['measurements'] = histories
+    return track_columns
+
+  def process_states(self, columns):
+    """
+      process a columnar measurement group using the configured tracking
+      strategy and return the state of the track each measurement updated,
+      in measurement order, instead of track messages
+
+      Parameters
+      ---------
+      columns: dict
+        measurement columns, see ColumnarCodec.MEASUREMENT_FIELDS
+
+      Returns
+      ---------
+      track_id: np array
+        track each measurement updated (M,)
+      X: np array
+        published position and velocity of each track (M,6)
+      P: np array
+        state covariance of each track (M,6,6), NaN for filters that do
+        not carry one
+    """
+    with self._stages['parse'].time():
+      rows = np.column_stack([columns[name] for name in MEASUREMENT_FIELDS])
+      measurements = list(map(MeasurementRow._make, rows.tolist()))
+    with self._lock:
+      updated = self._process(measurements, rows[:, :3], history=False)
+      with self._stages['build'].time():
+        track_id = np.array([track_strategy.track_id for track_strategy, _ in updated], dtype=np.int64)
+        X = np.array([[getattr(track, name) for name in TRACK_FIELDS[1:]]
+                      for _, track in updated]).reshape(-1, 6)
+        P = np.full((len(updated), 6, 6), np.nan)
+        for i, (track_strategy, _) in enumerate(updated):
+          if hasattr(track_strategy, 'covariance'):
+            P[i] = track_strategy.covariance()
+    return track_id, X, P
@@ -0,0 +1,71 @@
+# Stages timed by the tracker servicers, the TrackStrategyFactory adds its
+# own parse/associate/update/build stages under the same metric
+STAGES = ('capture', 'filter', 'publish')
+
+class RequestMetrics:
+  """
+    A class holding the counters and stage timers of the measurement groups
+    received by a tracker servicer, shared by the v1, v2 and asyncio
+    servicers so every schema reports the same metrics
+
+    Attributes
+    ---------
+    groups: Metrics.Counter
+      measurement groups received
+    measurements: Metrics.Counter
+      measurements received
+    received_bytes: Metrics.Counter
+      serialized size of the measurement groups received
+    tracks: Metrics.Counter
+      track messages published
+    published_bytes: Metrics.Counter
+      serialized size of the track groups published
+    request: Metrics.Histogram
+      time from receiving a measurement group to handing its track group
+      to the publisher
+    stages: dict
+      maps each name in STAGES to its Metrics.Histogram
+  """
+  def __init__(self, metrics, schema) -> None:
+    labels = {'schema': schema}
+    self.groups = metrics.counter('tracker_measurement_groups_total',
+                                  'Measurement groups received', labels)
+    self.measurements = metrics.counter('tracker_measurements_total',
+                                        'Measurements received', labels)
+    self.received_bytes = metrics.counter('tracker_received_bytes_total',
+                                          'Serialized size of the measurement groups received',
+                                          labels)
+    self.tracks = metrics.counter('tracker_tracks_published_total',
+                                  'Track messages published', labels)
+    self.published_bytes = metrics.counter('tracker_published_bytes_total',
+                                           'Serialized size of the track groups published',
+                                           labels)
+    self.request = metrics.histogram('tracker_request_seconds',
+                                     'Time to process a measurement group', labels)
+    self.stages = stage_timers(metrics, STAGES)
+
+  def received(self, num_measurements, num_bytes) -> None:
+    self.groups.inc()
+    self.measurements.inc(num_measurements)
+    self.received_bytes.inc(num_bytes)
+
+  def published(self, num_tracks, num_bytes) -> None:
+    self.tracks.inc(num_tracks)
+    self.published_bytes.inc(num_bytes)
+
+def stage_timers(metrics, stages):
+  """
+    Histograms of the tracker_stage_seconds metric for each stage
+  """
+  return {stage: metrics.histogram('tracker_stage_seconds',
+                                   'Time spent in each stage of the tracker pipeline',
+                                   {'stage': stage})
+          for stage in stages}
+
+def register_publisher(metrics, publisher):
+  """
+    Expose the TrackPublisher.stats() of a publisher as gauges
+  """
+  for key in publisher.stats():
+    metrics.gauge(f'tracker_publisher_{key}', f'TrackPublisher {key} statistic',
+                  func=lambda key=key: publisher.stats()[key])
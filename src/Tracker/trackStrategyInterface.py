@@ -4,6 +4,7 @@ from abc import ABCMeta, abstractmethod
 from google.protobuf import text_format
 
 import measurement_pb2
+import HotLog
 
 class trackStrategyInterface:
   __metaclass__ = ABCMeta
@@ -13,10 +14,47 @@ class trackStrategyInterface:
 
   @abstractmethod
   def add_measurement(self, 
-                      meas: measurement_pb2.measurement): 
+                      meas: measurement_pb2.measurement, history=True):
+    """
+      Update the track with a new measurement
+
+      Parameters
+      ---------
+      meas: measurement_pb2.measurement
+        new measurement, or a ColumnarCodec.MeasurementRow
+      history: bool
+        attach the serialized measurement history to the track message
+
+      Returns
+      ---------
+      track_msg: measurement_pb2.track
+        current state of the track
+    """
+    raise NotImplementedError
+
+  @abstractmethod
+  def predict_measurement(self, time):
+    """
+      Predict where the next measurement of the track is expected, used to
+      associate new measurements with the track
+
+      Parameters
+      ---------
+      time: float
+        time of the new measurements
+
+      Returns
+      ---------
+      z_pred: np array
+        expected measured position (3,)
+      S: np array
+        covariance of the expected measurement (3,3)
+    """
     raise NotImplementedError
   
   def print_meas(self, meas: measurement_pb2.measurement):
-    text_proto = text_format.MessageToString(meas)
-    output_str = text_format.Parse(text_proto, measurement_pb2.measurement())
-    logging.info(f"meas: {output_str}")
+    # called for every measurement, only format it when debugging
+    if HotLog.enabled(logging.DEBUG):
+      if isinstance(meas, measurement_pb2.measurement):
+        meas = text_format.MessageToString(meas, as_one_line=True)
+      logging.debug(f"meas: {meas}")
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import grpc
 import logging
 import os
 import sys
+import time
 
 from concurrent import futures
 
@@ -11,10 +13,26 @@ script_path = os.path.dirname(os.path.abspath( __file__ ))
 src_dir = os.path.dirname(script_path)
 autogen_dir = os.path.join(src_dir,"auto_generated")
 sys.path.insert(1, autogen_dir)
+common_dir = os.path.join(src_dir,"Common")
+sys.path.insert(1, common_dir)
+import measurement_pb2
 import measurement_pb2_grpc
+import ColumnarCodec
+from StreamWindow import StreamWindow
+import CaptureLog
+import HotLog
+from Profiler import WindowProfiler
+import Metrics
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
 from TrackStrategyFactory import TrackStrategyFactory
+from Kalman_Filter_Tracker import KERNELS, DEFAULT_OOSM_WINDOW
+from MeasurementHistory import RETENTION_POLICIES
+import Association
+import AsyncTracker
+import ShardedTracker
+from TrackPublisher import TrackPublisher, OVERFLOW_POLICIES
+import TrackerMetrics
 
 def input_args():
   """
@@ -31,9 +49,96 @@ def input_args():
                           '  option - description' +
                           '  kft = kalman filter tracker' +
                           '  ivt = instantaneous velocity tracker')
+  parser.add_argument('--kernel', default="legacy",
+                    choices=list(KERNELS),
+                    help='Kalman filter update kernel' +
+                          '  option - description' +
+                          '  legacy = explicit inverse, covariance not updated' +
+                          '  standard = solved gain, (I - KH) P covariance' +
+                          '  joseph = solved gain, Joseph form covariance' +
+                          '  sqrt = square root filter, QR time update and Potter ' +
+                          'measurement update of a covariance factor' +
+                          '  axis = three decoupled per axis filters, batched across tracks')
+  parser.add_argument('--steadystate', action='store_true',
+                    help='Switch Kalman filter tracks to a constant gain update once ' +
+                          'their gain converges at a fixed report interval, needs the ' +
+                          'standard, joseph or sqrt --kernel')
+  parser.add_argument('--oosmwindow', type=float, default=DEFAULT_OOSM_WINDOW,
+                    help='Seconds an out of sequence measurement may trail its Kalman ' +
+                          'filter track and still be folded in, older measurements ' +
+                          f'are rejected (default: {DEFAULT_OOSM_WINDOW:g})')
+  parser.add_argument('--retention', default="last-k",
+                    choices=RETENTION_POLICIES,
+                    help='Measurement retention policy for published tracks' +
+                          '  option - description' +
+                          '  none = publish tracks without measurements' +
+                          '  last-k = publish the most recent --history measurements' +
+                          '  all = publish every measurement of the track')
+  parser.add_argument('-k', '--history', type=int, default=100,
+                    help='Number of measurements retained per track ' +
+                          'with the last-k retention policy (default: 100)')
+  parser.add_argument('-g', '--gate', type=float, default=Association.DEFAULT_GATE,
+                    help='Chi-square association gate on the squared Mahalanobis ' +
+                          f'distance (default: {Association.DEFAULT_GATE})')
+  parser.add_argument('-m', '--maxmisses', type=int, default=3,
+                    help='Scans a track may go without a measurement before it is ' +
+                          'dropped (default: 3)')
+  parser.add_argument('-c', '--cellsize', type=float, default=None,
+                    help='Cell size of the spatial grid used to find candidate ' +
+                          'track/measurement pairs, by default the pairs are bounded by the gate')
+  parser.add_argument('-n', '--shards', type=int, default=1,
+                    help='Number of worker processes the filtering is sharded ' +
+                          'across (default: 1, no sharding)')
+  parser.add_argument('--shardcell', type=float, default=10000.0,
+                    help='Cell size of the spatial cells used to route measurements ' +
+                          'to shards (default: 10000)')
+  parser.add_argument('--stream', action='store_true',
+                    help='Publish track groups over the streaming StreamTracks RPC')
+  parser.add_argument('-w', '--window', type=int, default=8,
+                    help='Maximum unacknowledged track groups in flight ' +
+                          'when streaming (default: 8)')
+  parser.add_argument('--aio', action='store_true',
+                    help='Run the asyncio (grpc.aio) server, filtering runs on an ' +
+                          'executor and track groups are published from a queue')
+  parser.add_argument('-q', '--queue', type=int, default=64,
+                    help='Maximum track groups waiting to be published ' +
+                          '(default: 64)')
+  parser.add_argument('--overflow', default="block",
+                    choices=OVERFLOW_POLICIES,
+                    help='What to do when the publish queue is full' +
+                          '  option - description' +
+                          '  block = wait for the publisher to make room' +
+                          '  drop-oldest = discard the oldest queued track group' +
+                          '  merge-latest = keep only the latest update of each queued track')
+  parser.add_argument('-b', '--batch', type=int, default=8,
+                    help='Maximum queued track groups coalesced into one ' +
+                          'publish (default: 8)')
+  parser.add_argument('-d', '--deadline', type=float, default=5.0,
+                    help='Deadline in seconds of each publish (default: 5)')
+  parser.add_argument('--capture', type=str, default=None,
+                    help='Capture every received measurement group with its ' +
+                          'receive time to this log, see Simulator/replay.py')
+  parser.add_argument('--metricsport', type=int, default=None,
+                    help='Serve Prometheus text format metrics on this port')
+  parser.add_argument('--statsinterval', type=float, default=None,
+                    help='Log a line of pipeline statistics every this many seconds')
+  parser.add_argument('--logsample', type=int, default=1,
+                    help='Only log one in every this many of the per measurement ' +
+                          'group log lines (default: 1, log every line)')
+  parser.add_argument('--profile', type=str, default=None,
+                    help='Record cProfile stats of a window of measurement group ' +
+                          'RPCs and dump them to this file')
+  parser.add_argument('--profilewindow', type=int, default=100,
+                    help='Number of RPCs profiled (default: 100)')
+  parser.add_argument('--profileskip', type=int, default=0,
+                    help='Number of RPCs processed before profiling starts (default: 0)')
   parser.add_argument('-v', '--verbose', action='store_true',
                     help='Verbose logging')
   args = parser.parse_args()
+  if args.aio and args.stream:
+    parser.error("--stream is not supported by the asyncio server")
+  if args.steadystate and args.kernel in ('legacy', 'axis'):
+    parser.error(f"--steadystate is not supported by the {args.kernel} kernel")
     # initialize logger format
   logLevel = logging.INFO
   if args.verbose:
@@ -43,6 +148,7 @@ def input_args():
                    '[%(filename)s:%(lineno)d] %(message)s',
     datefmt='%Y-%m-%d:%H:%M:%S',
     level=logLevel)
+  HotLog.configure(args.logsample)
   logging.info(f"logging set to {logging.getLevelName(logLevel)}")
   logging.debug(f"Recving data on port {args.recvport}")
 
@@ -56,20 +162,85 @@ class Tracker(measurement_pb2_grpc.MeasurementProducerServicer):
       Attributes
       --------
       track_int: TrackStrategyFactory
-        The object that manages track state and produces new track group messages
+        The object that manages track state and produces new track group messages,
+        a ShardedTrackStrategyFactory can be provided in its place
       stub: measurement_pb2_grpc.TrackProducerStub
         The object used to allow for connection between the track and track consumers
+      stream: StreamWindow
+        Optional flow controlled StreamTracks stream used to publish track
+        groups instead of the unary ProcessTrack call
+      publisher: TrackPublisher
+        Optional background publisher, when provided track groups are queued
+        and published from its thread instead of the request thread
+      capture: CaptureLog.CaptureWriter
+        Optional log every received measurement group is captured to
+      metrics: TrackerMetrics.RequestMetrics
+        counters and stage timers of the received measurement groups
+      profiler: Profiler.WindowProfiler
+        Optional profiler the processing of measurement groups is run under
       
       Methods
       --------
+      process()
+        filter a measurement group and publish the resulting track group
       ProcessMeasurement()
         implementation of the protobuf defined service method used to process
         measurement group messages that have been created by producers
+      StreamMeasurements()
+        implementation of the protobuf defined streaming service method,
+        acknowledges each measurement group once it has been processed
     """
-    def __init__(self, stub, filter_type = 'kft') -> None:
+    def __init__(self, stub, filter_type = 'kft', 
+                 retention = 'last-k', history = 100, stream = None,
+                 gate = Association.DEFAULT_GATE, max_misses = 3,
+                 cell_size = None, track_int = None, publisher = None,
+                 capture = None, metrics = Metrics.REGISTRY,
+                 profiler = None, kernel = 'legacy',
+                 steady_state = False, oosm_window = DEFAULT_OOSM_WINDOW) -> None:
         super().__init__()
-        self.track_int = TrackStrategyFactory(filter_type)
+        if track_int is None:
+          track_int = TrackStrategyFactory(filter_type, retention, history,
+                                           gate, max_misses, cell_size, metrics,
+                                           kernel, steady_state, oosm_window)
+        self.track_int = track_int
         self.stub = stub
+        self.stream = stream
+        self.publisher = publisher
+        self.capture = capture
+        self.metrics = TrackerMetrics.RequestMetrics(metrics, 'v1')
+        self.profiler = profiler
+
+    def publish(self, track_msg):
+      """
+        Publish a track group to the track consumer
+      """
+      if self.publisher:
+        self.publisher.publish('v1', track_msg.SerializeToString())
+      elif self.stream:
+        HotLog.sampled(logging.INFO, "streaming track group")
+        self.stream.send(track_msg)
+      elif self.stub:
+        HotLog.sampled(logging.INFO, "publishing track group")
+        self.stub.ProcessTrack(track_msg)
+      else:
+        logging.warning(f"invalid stub")
+
+    def process(self, request):
+      """
+        Filter a measurement group and publish the resulting track group
+      """
+      start = time.perf_counter()
+      stages = self.metrics.stages
+      self.metrics.received(len(request.measurements), request.ByteSize())
+      if self.capture:
+        with stages['capture'].time():
+          self.capture.write(CaptureLog.SCHEMA_V1, request.SerializeToString())
+      with stages['filter'].time():
+        track_msg = self.track_int.process_measurement(request)
+      with stages['publish'].time():
+        self.publish(track_msg)
+      self.metrics.published(len(track_msg.tracks), track_msg.ByteSize())
+      self.metrics.request.observe(time.perf_counter() - start)
 
     def ProcessMeasurement(self, request, context):
       """
@@ -81,28 +252,162 @@ class Tracker(measurement_pb2_grpc.MeasurementProducerServicer):
         request : measurement_pb2.measurement_group
           measurement group being provided to the tracker
       """
-      track_msg = self.track_int.process_measurement(request)
-      if self.stub:
-        logging.info(f"publishing track group")
-        self.stub.ProcessTrack(track_msg)
+      if self.profiler:
+        self.profiler.call(self.process, request)
       else:
-        logging.warning(f"invalid stub")
+        self.process(request)
       return google_dot_protobuf_dot_empty__pb2.Empty()
 
+    def StreamMeasurements(self, request_iterator, context):
+      """
+        implementation of the protobuf defined streaming service method,
+        acknowledges each measurement group once it has been processed
+
+        Parameters
+        ---------
+        request_iterator : iterator of measurement_pb2.measurement_group
+          stream of measurement groups being provided to the tracker
+      """
+      for request in request_iterator:
+        if self.profiler:
+          self.profiler.call(self.process, request)
+        else:
+          self.process(request)
+        yield measurement_pb2.ack(sequence=request.sequence)
+
+class TrackerV2:
+    """
+      A Class used for consuming columnar (v2) measurement groups, it shares
+      the track state of a Tracker so both schemas feed the same tracks
+
+      Attributes
+      --------
+      track_int: TrackStrategyFactory
+        The object that manages track state and produces new track groups
+      stub: ColumnarCodec.TrackProducerV2Stub
+        The object used to publish columnar track groups to track consumers
+      publisher: TrackPublisher
+        Optional background publisher used instead of the stub
+      capture: CaptureLog.CaptureWriter
+        Optional log every received measurement group is captured to
+      metrics: TrackerMetrics.RequestMetrics
+        counters and stage timers of the received measurement groups
+      profiler: Profiler.WindowProfiler
+        Optional profiler the processing of measurement groups is run under
+
+      Methods
+      --------
+      process()
+        filter an encoded measurement group and publish the resulting
+        track group
+      ProcessMeasurement()
+        implementation of the v2 service method used to process encoded
+        measurement_v2.measurement_group messages
+    """
+    def __init__(self, track_int, stub, publisher = None, capture = None,
+                 metrics = Metrics.REGISTRY, profiler = None) -> None:
+        self.track_int = track_int
+        self.stub = stub
+        self.publisher = publisher
+        self.capture = capture
+        self.metrics = TrackerMetrics.RequestMetrics(metrics, 'v2')
+        self.profiler = profiler
+
+    def ProcessMeasurement(self, request, context):
+      """
+        implementation of the v2 service method used to process encoded
+        measurement_v2.measurement_group messages
+
+        Parameters
+        ---------
+        request : bytes
+          encoded measurement_v2.measurement_group being provided to the tracker
+      """
+      if self.profiler:
+        self.profiler.call(self.process, request)
+      else:
+        self.process(request)
+      return google_dot_protobuf_dot_empty__pb2.Empty()
+
+    def process(self, request):
+      """
+        Filter an encoded measurement group and publish the resulting track group
+      """
+      start = time.perf_counter()
+      stages = self.metrics.stages
+      if self.capture:
+        with stages['capture'].time():
+          self.capture.write(CaptureLog.SCHEMA_V2, request)
+      with stages['filter'].time():
+        columns = ColumnarCodec.decode_measurement_group(request)
+        self.metrics.received(columns['x'].size, len(request))
+        tracks = self.track_int.process_columns(columns)
+      with stages['publish'].time():
+        data = ColumnarCodec.encode_track_group(tracks)
+        if self.publisher:
+          self.publisher.publish('v2', data)
+        elif self.stub:
+          HotLog.sampled(logging.INFO, "publishing columnar track group")
+          self.stub.ProcessTrack(data)
+        else:
+          logging.warning(f"invalid stub")
+      self.metrics.published(len(tracks['track_id']), len(data))
+      self.metrics.request.observe(time.perf_counter() - start)
+
 def serve(args):
     """
       Create the grpc service server for processing measurement groups
     """
+    # shard workers are forked, so they are started before any gRPC channel
+    # or thread they could inherit a copy of
+    track_int = ShardedTracker.create_track_int(args)
     channel = grpc.insecure_channel(args.sendserver)
     stub = measurement_pb2_grpc.TrackProducerStub(channel)
+    stub_v2 = ColumnarCodec.TrackProducerV2Stub(channel)
+
+    stream = None
+    if args.stream:
+      stream = StreamWindow(stub.StreamTracks, args.window)
+    publisher = TrackPublisher(channel, args.queue, args.overflow, args.batch,
+                               args.deadline, stream=stream)
+    TrackerMetrics.register_publisher(Metrics.REGISTRY, publisher)
+    reporters = Metrics.start(Metrics.REGISTRY, args.metricsport, args.statsinterval)
+
+    capture = None
+    if args.capture:
+      capture = CaptureLog.CaptureWriter(args.capture)
+      logging.info(f"capturing measurement groups to {args.capture}")
+
+    profiler = None
+    if args.profile:
+      profiler = WindowProfiler(args.profile, args.profilewindow, args.profileskip)
+      logging.info(f"profiling {args.profilewindow} RPCs to {args.profile}")
 
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(Tracker(stub, args.filter), 
+    tracker = Tracker(stub, stream=stream, publisher=publisher, capture=capture,
+                      track_int=track_int,
+                      profiler=profiler)
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(tracker, 
                                                         server)
+    ColumnarCodec.add_MeasurementProducerV2_to_server(
+      TrackerV2(tracker.track_int, stub_v2, publisher, capture, profiler=profiler), server)
     server.add_insecure_port('[::]:' + str(args.recvport))
     server.start()
-    server.wait_for_termination()
+    try:
+      server.wait_for_termination()
+    finally:
+      publisher.close()
+      if capture:
+        capture.close()
+      if profiler and not profiler.done:
+        # window cut short by the shutdown, keep what was recorded
+        profiler.dump()
+      for reporter in reporters:
+        reporter.close()
 
 if __name__ == "__main__":
   args = input_args()
-  serve(args)
\ No newline at end of file
+  if args.aio:
+    asyncio.run(AsyncTracker.serve(args))
+  else:
+    serve(args)
\ No newline at end of file
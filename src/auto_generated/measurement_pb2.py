@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: measurement.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'measurement.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11measurement.proto\x1a\x1bgoogle/protobuf/empty.proto\";\n\x11measurement_group\x12\x14\n\x0cmeasurements\x18\x01 \x03(\x0c\x12\x10\n\x08sequence\x18\x02 \x01(\x04\"l\n\x0bmeasurement\x12\t\n\x01x\x18\x01 \x01(\x01\x12\t\n\x01y\x18\x02 \x01(\x01\x12\t\n\x01z\x18\x03 \x01(\x01\x12\x0c\n\x04time\x18\x04 \x01(\x01\x12\x0e\n\x06true_x\x18\x05 \x01(\x01\x12\x0e\n\x06true_y\x18\x06 \x01(\x01\x12\x0e\n\x06true_z\x18\x07 \x01(\x01\"/\n\x0btrack_group\x12\x0e\n\x06tracks\x18\x01 \x03(\x0c\x12\x10\n\x08sequence\x18\x02 \x01(\x04\"\x17\n\x03\x61\x63k\x12\x10\n\x08sequence\x18\x01 \x01(\x04\"\xa7\x01\n\x05track\x12\x10\n\x08track_id\x18\x01 \x01(\x05\x12\x12\n\nx_pred_pos\x18\x02 \x01(\x01\x12\x12\n\ny_pred_pos\x18\x03 \x01(\x01\x12\x12\n\nz_pred_pos\x18\x04 \x01(\x01\x12\x12\n\nx_velocity\x18\x05 \x01(\x01\x12\x12\n\ny_velocity\x18\x06 \x01(\x01\x12\x12\n\nz_velocity\x18\x07 \x01(\x01\x12\x14\n\x0cmeasurements\x18\x08 \x03(\x0c\x32\x8f\x01\n\x13MeasurementProducer\x12\x42\n\x12ProcessMeasurement\x12\x12.measurement_group\x1a\x16.google.protobuf.Empty\"\x00\x12\x34\n\x12StreamMeasurements\x12\x12.measurement_group\x1a\x04.ack\"\x00(\x01\x30\x01\x32q\n\rTrackProducer\x12\x36\n\x0cProcessTrack\x12\x0c.track_group\x1a\x16.google.protobuf.Empty\"\x00\x12(\n\x0cStreamTracks\x12\x0c.track_group\x1a\x04.ack\"\x00(\x01\x30\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'measurement_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_MEASUREMENT_GROUP']._serialized_start=50
+  _globals['_MEASUREMENT_GROUP']._serialized_end=109
+  _globals['_MEASUREMENT']._serialized_start=111
+  _globals['_MEASUREMENT']._serialized_end=219
+  _globals['_TRACK_GROUP']._serialized_start=221
+  _globals['_TRACK_GROUP']._serialized_end=268
+  _globals['_ACK']._serialized_start=270
+  _globals['_ACK']._serialized_end=293
+  _globals['_TRACK']._serialized_start=296
+  _globals['_TRACK']._serialized_end=463
+  _globals['_MEASUREMENTPRODUCER']._serialized_start=466
+  _globals['_MEASUREMENTPRODUCER']._serialized_end=609
+  _globals['_TRACKPRODUCER']._serialized_start=611
+  _globals['_TRACKPRODUCER']._serialized_end=724
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,266 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+import measurement_pb2 as measurement__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in measurement_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class MeasurementProducerStub:
+    """The greeting service definition.
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ProcessMeasurement = channel.unary_unary(
+                '/MeasurementProducer/ProcessMeasurement',
+                request_serializer=measurement__pb2.measurement_group.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.StreamMeasurements = channel.stream_stream(
+                '/MeasurementProducer/StreamMeasurements',
+                request_serializer=measurement__pb2.measurement_group.SerializeToString,
+                response_deserializer=measurement__pb2.ack.FromString,
+                _registered_method=True)
+
+
+class MeasurementProducerServicer:
+    """The greeting service definition.
+    """
+
+    def ProcessMeasurement(self, request, context):
+        """Sends a greeting
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamMeasurements(self, request_iterator, context):
+        """Streams measurement groups, each group is acknowledged once processed
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_MeasurementProducerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ProcessMeasurement': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessMeasurement,
+                    request_deserializer=measurement__pb2.measurement_group.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'StreamMeasurements': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamMeasurements,
+                    request_deserializer=measurement__pb2.measurement_group.FromString,
+                    response_serializer=measurement__pb2.ack.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'MeasurementProducer', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('MeasurementProducer', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class MeasurementProducer:
+    """The greeting service definition.
+    """
+
+    @staticmethod
+    def ProcessMeasurement(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/MeasurementProducer/ProcessMeasurement',
+            measurement__pb2.measurement_group.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamMeasurements(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/MeasurementProducer/StreamMeasurements',
+            measurement__pb2.measurement_group.SerializeToString,
+            measurement__pb2.ack.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class TrackProducerStub:
+    """The greeting service definition.
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ProcessTrack = channel.unary_unary(
+                '/TrackProducer/ProcessTrack',
+                request_serializer=measurement__pb2.track_group.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.StreamTracks = channel.stream_stream(
+                '/TrackProducer/StreamTracks',
+                request_serializer=measurement__pb2.track_group.SerializeToString,
+                response_deserializer=measurement__pb2.ack.FromString,
+                _registered_method=True)
+
+
+class TrackProducerServicer:
+    """The greeting service definition.
+    """
+
+    def ProcessTrack(self, request, context):
+        """Sends a greeting
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamTracks(self, request_iterator, context):
+        """Streams track groups, each group is acknowledged once processed
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_TrackProducerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ProcessTrack': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessTrack,
+                    request_deserializer=measurement__pb2.track_group.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'StreamTracks': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamTracks,
+                    request_deserializer=measurement__pb2.track_group.FromString,
+                    response_serializer=measurement__pb2.ack.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'TrackProducer', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('TrackProducer', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class TrackProducer:
+    """The greeting service definition.
+    """
+
+    @staticmethod
+    def ProcessTrack(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/TrackProducer/ProcessTrack',
+            measurement__pb2.track_group.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamTracks(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/TrackProducer/StreamTracks',
+            measurement__pb2.track_group.SerializeToString,
+            measurement__pb2.ack.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: measurement_v2.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'measurement_v2.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14measurement_v2.proto\x12\x0bkalmanpy.v2\x1a\x1bgoogle/protobuf/empty.proto\"r\n\x11measurement_group\x12\t\n\x01x\x18\x01 \x03(\x01\x12\t\n\x01y\x18\x02 \x03(\x01\x12\t\n\x01z\x18\x03 \x03(\x01\x12\x0c\n\x04time\x18\x04 \x03(\x01\x12\x0e\n\x06true_x\x18\x05 \x03(\x01\x12\x0e\n\x06true_y\x18\x06 \x03(\x01\x12\x0e\n\x06true_z\x18\x07 \x03(\x01\"\xcd\x01\n\x0btrack_group\x12\x10\n\x08track_id\x18\x01 \x03(\x0f\x12\x12\n\nx_pred_pos\x18\x02 \x03(\x01\x12\x12\n\ny_pred_pos\x18\x03 \x03(\x01\x12\x12\n\nz_pred_pos\x18\x04 \x03(\x01\x12\x12\n\nx_velocity\x18\x05 \x03(\x01\x12\x12\n\ny_velocity\x18\x06 \x03(\x01\x12\x12\n\nz_velocity\x18\x07 \x03(\x01\x12\x34\n\x0cmeasurements\x18\x08 \x03(\x0b\x32\x1e.kalmanpy.v2.measurement_group2e\n\x13MeasurementProducer\x12N\n\x12ProcessMeasurement\x12\x1e.kalmanpy.v2.measurement_group\x1a\x16.google.protobuf.Empty\"\x00\x32S\n\rTrackProducer\x12\x42\n\x0cProcessTrack\x12\x18.kalmanpy.v2.track_group\x1a\x16.google.protobuf.Empty\"\x00\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'measurement_v2_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_MEASUREMENT_GROUP']._serialized_start=66
+  _globals['_MEASUREMENT_GROUP']._serialized_end=180
+  _globals['_TRACK_GROUP']._serialized_start=183
+  _globals['_TRACK_GROUP']._serialized_end=388
+  _globals['_MEASUREMENTPRODUCER']._serialized_start=390
+  _globals['_MEASUREMENTPRODUCER']._serialized_end=491
+  _globals['_TRACKPRODUCER']._serialized_start=493
+  _globals['_TRACKPRODUCER']._serialized_end=576
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,176 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+import measurement_v2_pb2 as measurement__v2__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in measurement_v2_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class MeasurementProducerStub:
+    """Columnar measurement service, sends a whole scan as packed arrays
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ProcessMeasurement = channel.unary_unary(
+                '/kalmanpy.v2.MeasurementProducer/ProcessMeasurement',
+                request_serializer=measurement__v2__pb2.measurement_group.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+
+
+class MeasurementProducerServicer:
+    """Columnar measurement service, sends a whole scan as packed arrays
+    """
+
+    def ProcessMeasurement(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_MeasurementProducerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ProcessMeasurement': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessMeasurement,
+                    request_deserializer=measurement__v2__pb2.measurement_group.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'kalmanpy.v2.MeasurementProducer', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('kalmanpy.v2.MeasurementProducer', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class MeasurementProducer:
+    """Columnar measurement service, sends a whole scan as packed arrays
+    """
+
+    @staticmethod
+    def ProcessMeasurement(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/kalmanpy.v2.MeasurementProducer/ProcessMeasurement',
+            measurement__v2__pb2.measurement_group.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class TrackProducerStub:
+    """Columnar track service, sends every track of a scan as packed arrays
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ProcessTrack = channel.unary_unary(
+                '/kalmanpy.v2.TrackProducer/ProcessTrack',
+                request_serializer=measurement__v2__pb2.track_group.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+
+
+class TrackProducerServicer:
+    """Columnar track service, sends every track of a scan as packed arrays
+    """
+
+    def ProcessTrack(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_TrackProducerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ProcessTrack': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessTrack,
+                    request_deserializer=measurement__v2__pb2.track_group.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'kalmanpy.v2.TrackProducer', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('kalmanpy.v2.TrackProducer', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class TrackProducer:
+    """Columnar track service, sends every track of a scan as packed arrays
+    """
+
+    @staticmethod
+    def ProcessTrack(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/kalmanpy.v2.TrackProducer/ProcessTrack',
+            measurement__v2__pb2.track_group.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
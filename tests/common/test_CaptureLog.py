@@ -0,0 +1,59 @@
+import logging
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+import CaptureLog
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_CaptureLog(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmpdir.name, "capture.log")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_roundTripTest(self):
+    capture = CaptureLog.CaptureWriter(self.path)
+    capture.write(CaptureLog.SCHEMA_V1, b'\x0a\x00', timestamp=10.5)
+    capture.write(CaptureLog.SCHEMA_V2, b'', timestamp=11.0)
+    capture.write(CaptureLog.SCHEMA_V1, b'abc' * 1000)
+    self.assertEqual(capture.records, 3)
+    capture.close()
+    records = list(CaptureLog.read_capture(self.path))
+    self.assertEqual(records[:2], [(CaptureLog.SCHEMA_V1, 10.5, b'\x0a\x00'),
+                                   (CaptureLog.SCHEMA_V2, 11.0, b'')])
+    self.assertEqual(records[2][2], b'abc' * 1000)
+    self.assertGreater(records[2][1], 11.0)
+    logging.debug(f"round trip pass!")
+
+  def test_truncatedTest(self):
+    capture = CaptureLog.CaptureWriter(self.path)
+    capture.write(CaptureLog.SCHEMA_V1, b'first', timestamp=1.0)
+    capture.write(CaptureLog.SCHEMA_V1, b'second', timestamp=2.0)
+    capture.close()
+    with open(self.path, 'r+b') as f:
+      f.truncate(os.path.getsize(self.path) - 2)
+    self.assertEqual(list(CaptureLog.read_capture(self.path)),
+                     [(CaptureLog.SCHEMA_V1, 1.0, b'first')])
+    with open(self.path, 'wb') as f:
+      f.write(b'# Measurement time\n')
+    with self.assertRaises(ValueError):
+      list(CaptureLog.read_capture(self.path))
+    logging.debug(f"truncated pass!")
+
+if __name__ == '__main__':
+    unittest.main()
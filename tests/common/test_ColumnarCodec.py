@@ -0,0 +1,223 @@
+import logging
+import numpy as np
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+import ColumnarCodec
+import measurement_pb2
+import measurement_v2_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+# wire type of the unpacked values of each column dtype
+WIRE_TYPES = {'<f8': 1, '<i4': 5}
+
+def key(field, wire_type):
+  return ColumnarCodec._write_varint(field << 3 | wire_type)
+
+def unknown_field(rng, num_fields):
+  """
+    An encoded field protobuf skips, either an unknown field number or a
+    known one sent with a wire type that does not match its column
+  """
+  wire_type = int(rng.choice([0, 1, 2, 5]))
+  if rng.random() < 0.5:
+    field = int(rng.integers(20, 30))
+  else:
+    field = int(rng.integers(1, num_fields + 1))
+    wire_type = int(rng.choice([0, 1, 5]))
+  if wire_type == 0:
+    return key(field, 0) + ColumnarCodec._write_varint(int(rng.integers(0, 1 << 40)))
+  if wire_type == 2:
+    data = rng.bytes(int(rng.integers(0, 10)))
+    return key(field, 2) + ColumnarCodec._write_varint(len(data)) + data
+  return key(field, wire_type) + rng.bytes(8 if wire_type == 1 else 4)
+
+def fuzz_encode(rng, columns, dtypes, nested=()):
+  """
+    Encode columns as a v2 message the way any protobuf writer may: every
+    column split into packed and unpacked runs, the fields interleaved in a
+    random order, each keeping its own order, and unknown fields mixed in.
+    nested holds already encoded messages of field len(dtypes) + 1
+  """
+  pieces = []
+  for field, (values, dtype) in enumerate(zip(columns, dtypes), start=1):
+    values = np.asarray(values, dtype=dtype)
+    cuts = np.sort(rng.integers(0, len(values) + 1, size=int(rng.integers(0, 3))))
+    field_pieces = []
+    for chunk in np.split(values, cuts):
+      if rng.random() < 0.5:
+        data = chunk.tobytes()
+        field_pieces.append(key(field, 2) + ColumnarCodec._write_varint(len(data)) + data)
+      else:
+        field_pieces.extend(key(field, WIRE_TYPES[dtype]) + value.tobytes() for value in chunk)
+    pieces.append(field_pieces)
+  pieces.append([key(len(dtypes) + 1, 2) + ColumnarCodec._write_varint(len(data)) + data
+                 for data in nested])
+  pieces.append([unknown_field(rng, len(dtypes)) for _ in range(int(rng.integers(0, 4)))])
+  order = np.concatenate([np.full(len(field_pieces), i) for i, field_pieces in enumerate(pieces)])
+  rng.shuffle(order)
+  iters = [iter(field_pieces) for field_pieces in pieces]
+  return b''.join(next(iters[i]) for i in order.astype(int))
+
+def random_columns(rng, names, count):
+  # some columns are left out, which decodes as zeros
+  return [rng.normal(size=count) if rng.random() < 0.8 else np.zeros(0) for _ in names]
+
+def expected_columns(msg, names):
+  columns = {name: np.array(getattr(msg, name)) for name in names}
+  count = max(len(values) for values in columns.values())
+  return {name: values if len(values) else np.zeros(count) for name, values in columns.items()}
+
+class test_ColumnarCodec(unittest.TestCase):
+  def test_measurement_groupTest(self):
+    rng = np.random.default_rng(3)
+    columns = {name: rng.normal(size=10) for name in ColumnarCodec.MEASUREMENT_FIELDS}
+    data = ColumnarCodec.encode_measurement_group(columns)
+
+    # The encoding is a valid measurement_v2.measurement_group
+    group = measurement_v2_pb2.measurement_group.FromString(data)
+    self.assertEqual(list(group.x), columns['x'].tolist())
+    self.assertEqual(list(group.true_z), columns['true_z'].tolist())
+
+    decoded = ColumnarCodec.decode_measurement_group(group.SerializeToString())
+    for name in ColumnarCodec.MEASUREMENT_FIELDS:
+      self.assertTrue(np.array_equal(decoded[name], columns[name]))
+    logging.debug(f"test_measurement_groupTest pass!")
+
+  def test_track_groupTest(self):
+    group = measurement_v2_pb2.track_group(track_id=[1, 2, -3],
+                                           x_pred_pos=[1.0, 2.0, 3.0],
+                                           z_velocity=[0.5, 0.25, 0.125])
+    group.measurements.add(x=[1.0, 1.5], time=[0.0, 2.0])
+    group.measurements.add()
+    group.measurements.add(y=[4.0])
+
+    decoded = ColumnarCodec.decode_track_group(group.SerializeToString())
+    self.assertEqual(decoded['track_id'].tolist(), [1, 2, -3])
+    self.assertEqual(decoded['x_pred_pos'].tolist(), [1.0, 2.0, 3.0])
+    self.assertEqual(decoded['y_velocity'].tolist(), [0.0, 0.0, 0.0])
+    self.assertEqual(len(decoded['measurements']), 3)
+    self.assertEqual(decoded['measurements'][0]['time'].tolist(), [0.0, 2.0])
+    self.assertEqual(decoded['measurements'][0]['y'].tolist(), [0.0, 0.0])
+    self.assertEqual(decoded['measurements'][1]['x'].size, 0)
+    self.assertEqual(decoded['measurements'][2]['y'].tolist(), [4.0])
+
+    encoded = measurement_v2_pb2.track_group.FromString(
+      ColumnarCodec.encode_track_group(decoded))
+    self.assertEqual(list(encoded.track_id), [1, 2, -3])
+    self.assertEqual(list(encoded.y_velocity), [0.0, 0.0, 0.0])
+    self.assertEqual(list(encoded.measurements[0].x), [1.0, 1.5])
+    self.assertEqual(len(encoded.measurements), 3)
+    logging.debug(f"test_track_groupTest pass!")
+
+  def test_nested_historiesTest(self):
+    rng = np.random.default_rng(5)
+    # runs of equal length histories, empty ones and one and two byte lengths
+    lengths = [3, 3, 0, 20, 20, 20, 1, 0, 0, 400, 2]
+    columns = {name: np.arange(len(lengths), dtype=float)
+               for name in ColumnarCodec.TRACK_FIELDS}
+    columns['measurements'] = [{name: rng.normal(size=length)
+                                for name in ColumnarCodec.MEASUREMENT_FIELDS}
+                               for length in lengths]
+    decoded = ColumnarCodec.decode_track_group(ColumnarCodec.encode_track_group(columns))
+    self.assertEqual(len(decoded['measurements']), len(lengths))
+    for meas_columns, expected in zip(decoded['measurements'], columns['measurements']):
+      for name in ColumnarCodec.MEASUREMENT_FIELDS:
+        np.testing.assert_array_equal(meas_columns[name], expected[name])
+    logging.debug(f"test_nested_historiesTest pass!")
+
+  def test_v1_conversionTest(self):
+    group = measurement_pb2.measurement_group()
+    for i in range(3):
+      meas = measurement_pb2.measurement(x=float(i), y=2.0 * i, time=i, true_z=-1.0)
+      group.measurements.append(meas.SerializeToString())
+    columns = ColumnarCodec.measurement_group_v1_to_columns(group, measurement_pb2.measurement)
+    self.assertEqual(columns['x'].tolist(), [0.0, 1.0, 2.0])
+    self.assertEqual(columns['y'].tolist(), [0.0, 2.0, 4.0])
+    self.assertEqual(columns['true_z'].tolist(), [-1.0, -1.0, -1.0])
+    logging.debug(f"test_v1_conversionTest pass!")
+
+  def test_v1_encodeTest(self):
+    columns = {name: np.arange(4, dtype=float) + i
+               for i, name in enumerate(ColumnarCodec.MEASUREMENT_FIELDS)}
+    columns['y'][2] = 0.0
+    measurements = ColumnarCodec.encode_measurements_v1(columns)
+    self.assertEqual(len(measurements), 4)
+    group = measurement_pb2.measurement_group(measurements=measurements)
+    group = measurement_pb2.measurement_group.FromString(group.SerializeToString())
+    decoded = ColumnarCodec.measurement_group_v1_to_columns(group, measurement_pb2.measurement)
+    for name in ColumnarCodec.MEASUREMENT_FIELDS:
+      np.testing.assert_array_equal(decoded[name], columns[name])
+    logging.debug(f"test_v1_encodeTest pass!")
+
+  def test_fuzz_measurement_groupTest(self):
+    rng = np.random.default_rng(11)
+    dtypes = ('<f8',) * len(ColumnarCodec.MEASUREMENT_FIELDS)
+    for _ in range(200):
+      columns = random_columns(rng, ColumnarCodec.MEASUREMENT_FIELDS, int(rng.integers(0, 6)))
+      data = fuzz_encode(rng, columns, dtypes)
+      expected = expected_columns(measurement_v2_pb2.measurement_group.FromString(data),
+                                  ColumnarCodec.MEASUREMENT_FIELDS)
+      decoded = ColumnarCodec.decode_measurement_group(data)
+      for name in ColumnarCodec.MEASUREMENT_FIELDS:
+        np.testing.assert_array_equal(decoded[name], expected[name])
+    logging.debug(f"test_fuzz_measurement_groupTest pass!")
+
+  def test_fuzz_track_groupTest(self):
+    rng = np.random.default_rng(13)
+    meas_dtypes = ('<f8',) * len(ColumnarCodec.MEASUREMENT_FIELDS)
+    dtypes = ('<i4',) + ('<f8',) * (len(ColumnarCodec.TRACK_FIELDS) - 1)
+    for _ in range(200):
+      count = int(rng.integers(0, 5))
+      columns = random_columns(rng, ColumnarCodec.TRACK_FIELDS, count)
+      if len(columns[0]):
+        columns[0] = rng.integers(-1000, 1000, size=count)
+      # histories are either written the way encode_measurement_group
+      # does, which takes the bulk decode, or fuzzed
+      canonical = rng.random() < 0.5
+      nested = []
+      for _ in range(count):
+        history = [rng.normal(size=int(rng.integers(0, 4)))] * len(meas_dtypes)
+        if canonical:
+          nested.append(ColumnarCodec.encode_measurement_group(
+            dict(zip(ColumnarCodec.MEASUREMENT_FIELDS, history))))
+        else:
+          history = random_columns(rng, ColumnarCodec.MEASUREMENT_FIELDS, int(rng.integers(0, 4)))
+          nested.append(fuzz_encode(rng, history, meas_dtypes))
+      data = fuzz_encode(rng, columns, dtypes, nested)
+
+      group = measurement_v2_pb2.track_group.FromString(data)
+      expected = expected_columns(group, ColumnarCodec.TRACK_FIELDS)
+      decoded = ColumnarCodec.decode_track_group(data)
+      for name in ColumnarCodec.TRACK_FIELDS:
+        np.testing.assert_array_equal(decoded[name], expected[name])
+      self.assertEqual(len(decoded['measurements']), len(group.measurements))
+      for meas_columns, msg in zip(decoded['measurements'], group.measurements):
+        expected = expected_columns(msg, ColumnarCodec.MEASUREMENT_FIELDS)
+        for name in ColumnarCodec.MEASUREMENT_FIELDS:
+          np.testing.assert_array_equal(meas_columns[name], expected[name])
+
+      # and the decoded columns round trip
+      decoded_again = ColumnarCodec.decode_track_group(ColumnarCodec.encode_track_group(decoded))
+      for name in ColumnarCodec.TRACK_FIELDS:
+        np.testing.assert_array_equal(decoded_again[name], decoded[name])
+      for meas_columns, expected in zip(decoded_again['measurements'], decoded['measurements']):
+        for name in ColumnarCodec.MEASUREMENT_FIELDS:
+          np.testing.assert_array_equal(meas_columns[name], expected[name])
+    logging.debug(f"test_fuzz_track_groupTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,59 @@
+import logging
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+import HotLog
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class Formatted:
+  """
+    Argument counting how often it is formatted
+  """
+  def __init__(self):
+    self.count = 0
+
+  def __str__(self):
+    self.count += 1
+    return "formatted"
+
+class test_HotLog(unittest.TestCase):
+  def tearDown(self):
+    HotLog.configure()
+
+  def test_disabledTest(self):
+    HotLog.configure(name='test_HotLog.disabled')
+    logger = logging.getLogger('test_HotLog.disabled')
+    logger.setLevel(logging.INFO)
+    arg = Formatted()
+    with self.assertLogs(logger, logging.INFO):
+      HotLog.debug("not formatted %s", arg)
+      HotLog.info("formatted %s", arg)
+    self.assertEqual(arg.count, 1)
+    self.assertFalse(HotLog.enabled(logging.DEBUG))
+    logging.debug(f"disabled pass!")
+
+  def test_sampledTest(self):
+    HotLog.configure(sample_every=4, name='test_HotLog.sampled')
+    with self.assertLogs('test_HotLog.sampled', logging.INFO) as logs:
+      for i in range(10):
+        HotLog.sampled(logging.INFO, "scan %d", i)
+    self.assertEqual([record.getMessage() for record in logs.records],
+                     [f"scan {i} [sampled 1/4]" for i in (0, 4, 8)])
+    # the caller is reported, not HotLog
+    self.assertEqual(logs.records[0].filename, "test_HotLog.py")
+    logging.debug(f"sampled pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import logging
+import unittest
+import urllib.request
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+import Metrics
+import measurement_pb2
+from TrackStrategyFactory import TrackStrategyFactory
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_Metrics(unittest.TestCase):
+  def test_histogramTest(self):
+    registry = Metrics.MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+      histogram.observe(value)
+    self.assertEqual(histogram.counts, [1, 2, 1])
+    self.assertEqual(histogram.count, 4)
+    self.assertAlmostEqual(histogram.sum, 6.05)
+    self.assertEqual(histogram.quantile(0.5), 1.0)
+    self.assertEqual(histogram.quantile(1.0), float('inf'))
+    with histogram.time():
+      pass
+    self.assertEqual(histogram.counts[0], 2)
+    # the same name and labels return the same metric
+    self.assertIs(registry.histogram('latency_seconds'), histogram)
+    with self.assertRaises(ValueError):
+      registry.counter('latency_seconds')
+    logging.debug(f"histogram pass!")
+
+  def test_renderTest(self):
+    registry = Metrics.MetricsRegistry()
+    registry.counter('groups_total', 'groups', {'schema': 'v1'}).inc(3)
+    registry.gauge('depth', 'queue depth', func=lambda: 7)
+    registry.histogram('latency_seconds', 'latency', buckets=(0.1,)).observe(0.05)
+    text = registry.render()
+    self.assertIn('# TYPE groups_total counter', text)
+    self.assertIn('groups_total{schema="v1"} 3', text)
+    self.assertIn('depth 7', text)
+    self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+    self.assertIn('latency_seconds_bucket{le="+Inf"} 1', text)
+    self.assertIn('latency_seconds_count 1', text)
+    summary = registry.summary()
+    self.assertIn('groups_total{schema="v1"}=3', summary)
+    self.assertIn('latency_seconds n=1', summary)
+    logging.debug(f"render pass!")
+
+  def test_serverTest(self):
+    registry = Metrics.MetricsRegistry()
+    registry.counter('groups_total', 'groups').inc()
+    server, = Metrics.start(registry, port=0)
+    try:
+      with urllib.request.urlopen(f'http://localhost:{server.port}/metrics') as response:
+        text = response.read().decode()
+    finally:
+      server.close()
+    self.assertIn('groups_total 1', text)
+    logging.debug(f"server pass!")
+
+  def test_factoryStagesTest(self):
+    registry = Metrics.MetricsRegistry()
+    factory = TrackStrategyFactory('kft', gate=1e6, metrics=registry)
+    for time in (1.0, 2.0):
+      meas = [measurement_pb2.measurement(x=100.0 * i + time, y=0.0, z=0.0, time=time)
+              for i in range(3)]
+      factory.process_measurement(measurement_pb2.measurement_group(
+        measurements=[m.SerializeToString() for m in meas]))
+    for stage in ('parse', 'associate', 'update', 'build'):
+      self.assertEqual(registry.histogram('tracker_stage_seconds',
+                                          labels={'stage': stage}).count, 2)
+    self.assertEqual(registry.counter('tracker_tracks_started_total').value, 3)
+    self.assertEqual(registry.gauge('tracker_active_tracks').value, 3)
+    logging.debug(f"factory stages pass!")
+
+if __name__ == '__main__':
+    unittest.main()
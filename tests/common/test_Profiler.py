@@ -0,0 +1,42 @@
+import logging
+import pstats
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+from Profiler import WindowProfiler
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+def profiled_function(x):
+  return sum(range(x))
+
+class test_Profiler(unittest.TestCase):
+  def test_windowTest(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = os.path.join(tmpdir, "tracker.prof")
+      profiler = WindowProfiler(path, window=3, skip=2)
+      for i in range(10):
+        self.assertEqual(profiler.call(profiled_function, 10), 45)
+        # the stats are dumped as soon as the window is complete
+        self.assertEqual(profiler.done, i >= 4)
+      self.assertEqual(profiler.calls, 5)
+      stats = pstats.Stats(path)
+      calls = [stat[1] for func, stat in stats.stats.items()
+               if func[2] == 'profiled_function']
+      self.assertEqual(calls, [3])
+    logging.debug(f"window pass!")
+
+if __name__ == '__main__':
+    unittest.main()
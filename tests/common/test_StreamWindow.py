@@ -0,0 +1,115 @@
+import grpc
+import logging
+import threading
+import unittest
+import os
+import sys
+
+from concurrent import futures
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+from StreamWindow import StreamWindow
+import measurement_pb2
+import measurement_pb2_grpc
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class GateServicer(measurement_pb2_grpc.MeasurementProducerServicer):
+  """
+    Acknowledges streamed groups only while the gate is open
+  """
+  def __init__(self):
+    self.gate = threading.Event()
+    self.received = []
+
+  def StreamMeasurements(self, request_iterator, context):
+    for request in request_iterator:
+      self.gate.wait()
+      self.received.append(request.sequence)
+      yield measurement_pb2.ack(sequence=request.sequence)
+
+class RestartServicer(measurement_pb2_grpc.MeasurementProducerServicer):
+  """
+    Closes the first stream after one group, as a restarting consumer would
+  """
+  def __init__(self):
+    self.calls = 0
+    self.received = []
+
+  def StreamMeasurements(self, request_iterator, context):
+    self.calls += 1
+    call = self.calls
+    for request in request_iterator:
+      self.received.append(request.sequence)
+      yield measurement_pb2.ack(sequence=request.sequence)
+      if call == 1:
+        context.abort(grpc.StatusCode.UNAVAILABLE, "consumer restarting")
+
+class test_StreamWindow(unittest.TestCase):
+  def test_StreamWindowTest(self):
+    servicer = GateServicer()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(servicer, server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    channel = grpc.insecure_channel(f'localhost:{port}')
+    stub = measurement_pb2_grpc.MeasurementProducerStub(channel)
+    stream = StreamWindow(stub.StreamMeasurements, window=2)
+
+    # The window fills while the server holds back acknowledgements
+    self.assertEqual(stream.send(measurement_pb2.measurement_group()), 1)
+    self.assertEqual(stream.send(measurement_pb2.measurement_group()), 2)
+    with self.assertRaises(TimeoutError):
+      stream.send(measurement_pb2.measurement_group(), timeout=0.2)
+
+    servicer.gate.set()
+    self.assertEqual(stream.send(measurement_pb2.measurement_group(), timeout=5), 3)
+    stream.close(timeout=5)
+    self.assertEqual(servicer.received, [1, 2, 3])
+    self.assertEqual(stream.acked, 3)
+
+    channel.close()
+    server.stop(None)
+    logging.debug(f"test_StreamWindowTest pass!")
+
+  def test_reconnectTest(self):
+    servicer = RestartServicer()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(servicer, server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    channel = grpc.insecure_channel(f'localhost:{port}')
+    stub = measurement_pb2_grpc.MeasurementProducerStub(channel)
+    stream = StreamWindow(stub.StreamMeasurements, window=2)
+
+    self.assertEqual(stream.send(measurement_pb2.measurement_group(), timeout=5), 1)
+    stream._ack_thread.join(5)
+    self.assertEqual(stream.error.code(), grpc.StatusCode.UNAVAILABLE)
+    # the next sends go out on a new stream
+    self.assertEqual(stream.send(measurement_pb2.measurement_group(), timeout=5), 2)
+    self.assertEqual(stream.send(measurement_pb2.measurement_group(), timeout=5), 3)
+    stream.close(timeout=5)
+    self.assertEqual(stream.reconnects, 1)
+    self.assertIsNone(stream.error)
+    self.assertEqual(servicer.calls, 2)
+    self.assertEqual(servicer.received, [1, 2, 3])
+    self.assertEqual(stream.acked, 3)
+    with self.assertRaises(RuntimeError):
+      stream.send(measurement_pb2.measurement_group(), timeout=5)
+
+    channel.close()
+    server.stop(None)
+    logging.debug(f"test_reconnectTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
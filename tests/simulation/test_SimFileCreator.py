@@ -0,0 +1,92 @@
+import argparse
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+import SimFileCreator
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_SimFileCreator(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.basename = os.path.join(self.tmpdir.name, "track")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def bulk_args(self, fmt, seed=5):
+    return argparse.Namespace(numtrack=7, time=20, period=2.0, shards=3, workers=2,
+                              seed=seed, filepath=self.basename, format=fmt,
+                              nocompress=False)
+
+  def test_fractionalPeriodTest(self):
+    args = argparse.Namespace(numtrack=2, time=3, period=0.25, filepath=self.basename)
+    SimFileCreator.run(args)
+    times = np.arange(0, args.time, args.period)
+    for i in range(args.numtrack):
+      rows = np.loadtxt(f"{self.basename}{i}.csv", delimiter=',')
+      # one row per period at the times run_bulk uses, none rounded or repeated
+      self.assertEqual(rows[:, 0].tolist(), times.tolist())
+      # velocity at each time from the constant acceleration
+      np.testing.assert_allclose(rows[:, 7:10] - rows[0, 7:10],
+                                 times[:, None] * rows[:, 10:13], atol=1e-9)
+    logging.debug(f"fractional period pass!")
+
+  def test_generateTracksTest(self):
+    times = np.arange(0, 10, 2.0)
+    tracks = SimFileCreator.generate_tracks(4, times, np.random.default_rng(0))
+    self.assertEqual(tracks['meas'].shape, (4, 5, 3))
+    self.assertEqual(tracks['truth'].shape, (4, 5, 3))
+    # constant velocity truth
+    np.testing.assert_allclose(tracks['truth'][:, 1] - tracks['truth'][:, 0],
+                               2.0 * tracks['velocity'], atol=1e-3)
+    np.testing.assert_allclose(tracks['meas'], tracks['truth'], atol=1.0)
+    logging.debug(f"generate tracks pass!")
+
+  def test_bulkNpzTest(self):
+    SimFileCreator.run_bulk(self.bulk_args('npz'))
+    shards = [np.load(f"{self.basename}_shard{shard}.npz") for shard in range(3)]
+    self.assertEqual(np.concatenate([shard['track_id'] for shard in shards]).tolist(),
+                     list(range(7)))
+    self.assertEqual(shards[0]['meas'].shape, (3, 10, 3))
+    self.assertEqual(shards[0]['time'].tolist(), list(range(0, 20, 2)))
+    # independent seeds per shard
+    self.assertFalse(np.allclose(shards[0]['truth'][0], shards[1]['truth'][0]))
+    first = shards[1]['meas'].copy()
+    SimFileCreator.run_bulk(self.bulk_args('npz'))
+    np.testing.assert_array_equal(np.load(f"{self.basename}_shard1.npz")['meas'], first)
+    logging.debug(f"bulk npz pass!")
+
+  def test_bulkCsvTest(self):
+    SimFileCreator.run_bulk(self.bulk_args('npz'))
+    npz = np.load(f"{self.basename}_shard2.npz")
+    SimFileCreator.run_bulk(self.bulk_args('csv'))
+    path = f"{self.basename}_shard2.csv"
+    with open(path) as f:
+      self.assertEqual(f.readline(), SimFileCreator.BULK_CSV_HEADER)
+    rows = np.loadtxt(path, delimiter=',')
+    self.assertEqual(rows.shape, (2 * 10, 14))
+    self.assertEqual(rows[:, 0].tolist(), [5] * 10 + [6] * 10)
+    np.testing.assert_array_equal(rows[:, 2:5], npz['meas'].reshape(-1, 3))
+    np.testing.assert_array_equal(rows[:, 5:8], npz['truth'].reshape(-1, 3))
+    np.testing.assert_array_equal(rows[:10, 8:11], np.repeat(npz['velocity'][:1], 10, axis=0))
+    logging.debug(f"bulk csv pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+import SimFileCreator
+import SimFileLoader
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_SimFileLoader(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.basename = os.path.join(self.tmpdir.name, "track")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_bulkTest(self):
+    times = np.arange(0, 10, 2.0)
+    expected = SimFileCreator.generate_tracks(4, times, np.random.default_rng(3))
+    for fmt in ('npz', 'csv'):
+      path = SimFileCreator.write_shard(0, 10, 4, times, 3, self.basename, fmt)
+      tracks = SimFileLoader.load_sim_files([path])
+      self.assertEqual(tracks['track_id'].tolist(), [10, 11, 12, 13])
+      self.assertEqual(tracks['length'].tolist(), [5] * 4)
+      self.assertTrue(np.allclose(tracks['time'], times))
+      self.assertTrue(np.allclose(tracks['meas'], expected['meas']))
+      self.assertTrue(np.allclose(tracks['truth'], expected['truth']))
+      self.assertTrue(np.allclose(tracks['truth_velocity'][:, 0], expected['velocity']))
+    logging.debug(f"bulk pass!")
+
+  def test_padTest(self):
+    # rows out of order, track 7 shorter than track 3
+    tracks = SimFileLoader.pad_tracks(np.array([7, 3, 3, 7, 3]),
+                                      np.array([2.0, 4.0, 0.0, 0.0, 2.0]),
+                                      meas=np.arange(15.0).reshape(5, 3))
+    self.assertEqual(tracks['track_id'].tolist(), [3, 7])
+    self.assertEqual(tracks['length'].tolist(), [3, 2])
+    self.assertEqual(tracks['time'][0].tolist(), [0.0, 2.0, 4.0])
+    self.assertEqual(tracks['meas'][1, 1].tolist(), [0.0, 1.0, 2.0])
+    self.assertTrue(np.isnan(tracks['meas'][1, 2]).all())
+    logging.debug(f"pad pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import logging
+import numpy as np
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+from simulator import Simulator, initialize_track_creation
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_Simulator(unittest.TestCase):
+  def test_predictColumnsTest(self):
+    sim = Simulator([[0.0, 0.0, 0.0], [10.0, 20.0, 30.0]],
+                    velocities=[[1.0, 2.0, 3.0], [0.0, 0.0, 0.0]],
+                    accelerations=[[0.0, 0.0, 0.0], [2.0, 0.0, -2.0]],
+                    time=0.0, sigma=0.0, seed=1)
+    columns = sim.predict_columns(2.0)
+    self.assertEqual(columns['true_x'].tolist(), [2.0, 14.0])
+    self.assertEqual(columns['true_y'].tolist(), [4.0, 20.0])
+    self.assertEqual(columns['true_z'].tolist(), [6.0, 26.0])
+    self.assertEqual(columns['x'].tolist(), columns['true_x'].tolist())
+    self.assertEqual(columns['time'].tolist(), [2.0, 2.0])
+    self.assertEqual(sim.velocities[1].tolist(), [4.0, 0.0, -4.0])
+    # the state carries forward from the last scan
+    columns = sim.predict_columns(3.0)
+    self.assertEqual(columns['true_x'].tolist(), [3.0, 19.0])
+    # going back in time leaves the targets in place
+    columns = sim.predict_columns(1.0)
+    self.assertEqual(columns['true_x'].tolist(), [3.0, 19.0])
+    logging.debug(f"predict columns pass!")
+
+  def test_seededTest(self):
+    scans = []
+    for _ in range(2):
+      rng = np.random.default_rng(7)
+      positions, velocities, accelerations = initialize_track_creation(1000, rng)
+      sim = Simulator(positions, velocities, accelerations, time=0.0, seed=rng)
+      scans.append(sim.predict_columns(2.0))
+    for name in scans[0]:
+      np.testing.assert_array_equal(scans[0][name], scans[1][name])
+    speed = np.linalg.norm(velocities, axis=1) * 60 * 60
+    self.assertTrue(((speed > 399) & (speed < 601)).all())
+    noise = scans[0]['x'] - scans[0]['true_x']
+    self.assertAlmostEqual(noise.std(), 0.1, 1)
+    logging.debug(f"seeded pass!")
+
+  def test_predictAtTimeTest(self):
+    positions, velocities, accelerations = initialize_track_creation(5)
+    sim = Simulator(positions, velocities, accelerations, time=0.0, seed=3)
+    group = sim.predict_at_time(4.0)
+    self.assertEqual(len(group.measurements), 5)
+    expected = Simulator(positions, velocities, accelerations, time=0.0,
+                         seed=3).predict_columns(4.0)
+    for i in range(5):
+      meas = measurement_pb2.measurement.FromString(group.measurements[i])
+      self.assertEqual(meas.time, 4.0)
+      self.assertEqual(meas.x, expected['x'][i])
+      self.assertEqual(meas.true_z, expected['true_z'][i])
+    logging.debug(f"predict at time pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import logging
+import tempfile
+import time
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+import replay
+import CaptureLog
+import ColumnarCodec
+import measurement_pb2
+import numpy as np
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_replay(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmpdir.name, "capture.log")
+    capture = CaptureLog.CaptureWriter(self.path)
+    for i in range(5):
+      group = measurement_pb2.measurement_group(
+        measurements=[measurement_pb2.measurement(x=i).SerializeToString()] * (i + 1))
+      capture.write(CaptureLog.SCHEMA_V1, group.SerializeToString(), timestamp=100.0 + 0.05 * i)
+    columns = {name: np.zeros(3) for name in ColumnarCodec.MEASUREMENT_FIELDS}
+    capture.write(CaptureLog.SCHEMA_V2, ColumnarCodec.encode_measurement_group(columns),
+                  timestamp=100.25)
+    capture.close()
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_replayTest(self):
+    records = replay.load_capture(self.path)
+    self.assertEqual([count for _, _, _, count in records], [1, 2, 3, 4, 5, 3])
+    sent = []
+    senders = {CaptureLog.SCHEMA_V1: lambda data: sent.append((1, time.perf_counter())),
+               CaptureLog.SCHEMA_V2: lambda data: sent.append((2, time.perf_counter()))}
+
+    report = replay.replay(records, senders, speed=0)
+    self.assertEqual([schema for schema, _ in sent], [1, 1, 1, 1, 1, 2])
+    self.assertEqual((report['groups'], report['measurements']), (6, 18))
+    self.assertLess(report['elapsed'], 0.2)
+    self.assertGreaterEqual(report['latency_p100_ms'], report['latency_p50_ms'])
+
+    # original pace spans the 0.25 s of the capture, 5x speed up a fifth of it
+    report = replay.replay(records, senders, speed=1.0)
+    self.assertGreaterEqual(report['elapsed'], 0.25)
+    report = replay.replay(records, senders, speed=5.0)
+    self.assertGreaterEqual(report['elapsed'], 0.05)
+    self.assertLess(report['elapsed'], 0.25)
+    logging.debug(f"replay pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import logging
+import tempfile
+import threading
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackConsumer'))
+from TrackFileWriter import TrackFileWriter
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_TrackFileWriter(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.trackfile = os.path.join(self.tmpdir.name, "track.track")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_bufferedWriteTest(self):
+    with open(self.trackfile, "w") as myfile:
+      writer = TrackFileWriter(myfile, flush_interval=60.0, flush_size=1 << 20)
+      writer.write("trk 1\nmeas 1\n")
+      writer.write("trk 2\n")
+      # nothing reaches the file until the buffer is flushed
+      with open(self.trackfile) as reader:
+        self.assertEqual(reader.read(), "")
+      writer.flush()
+      with open(self.trackfile) as reader:
+        self.assertEqual(reader.read(), "trk 1\nmeas 1\ntrk 2\n")
+      writer.write("trk 3\n")
+      writer.close()
+    with open(self.trackfile) as reader:
+      self.assertEqual(reader.read(), "trk 1\nmeas 1\ntrk 2\ntrk 3\n")
+    logging.debug(f"buffered write pass!")
+
+  def test_flushSizeTest(self):
+    with open(self.trackfile, "wb") as myfile:
+      writer = TrackFileWriter(myfile, flush_interval=60.0, flush_size=8)
+      writer.write(b"0123")
+      writer.write(b"4567")
+      writer.write(b"89")
+      writer.flush()
+      writer.close()
+    with open(self.trackfile, "rb") as reader:
+      self.assertEqual(reader.read(), b"0123456789")
+    logging.debug(f"flush size pass!")
+
+  def test_wholeBlocksTest(self):
+    with open(self.trackfile, "w") as myfile:
+      writer = TrackFileWriter(myfile, flush_interval=0.01, flush_size=256)
+      def producer(name):
+        for i in range(50):
+          writer.write("".join(f"{name} {i} {j}\n" for j in range(10)))
+      threads = [threading.Thread(target=producer, args=(name,)) for name in "abcd"]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+      writer.close()
+    with open(self.trackfile) as reader:
+      lines = reader.read().splitlines()
+    self.assertEqual(len(lines), 4 * 50 * 10)
+    # every block of 10 lines comes from the same group
+    for start in range(0, len(lines), 10):
+      block = [line.split() for line in lines[start:start + 10]]
+      self.assertEqual({(name, i) for name, i, _ in block}, {tuple(block[0][:2])})
+      self.assertEqual([int(j) for _, _, j in block], list(range(10)))
+    logging.debug(f"whole blocks pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackConsumer'))
+import TrackStore
+import ColumnarCodec
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+def track_group(track_ids, time):
+  """
+    v1 track group, track i carries i measurements ending at time
+  """
+  tracks = []
+  for i, track_id in enumerate(track_ids):
+    measurements = [measurement_pb2.measurement(x=track_id, y=j, z=0.0, time=time - j,
+                                                true_x=track_id, true_y=j, true_z=1.0)
+                    .SerializeToString() for j in range(i)]
+    tracks.append(measurement_pb2.track(track_id=track_id, x_pred_pos=track_id,
+                                        y_pred_pos=time, x_velocity=1.0,
+                                        measurements=measurements).SerializeToString())
+  return measurement_pb2.track_group(tracks=tracks)
+
+class test_TrackStore(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmpdir.name, "track.bin")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_recordsTest(self):
+    tracks = ColumnarCodec.track_group_v1_to_columns(track_group([4, 5, 6], 10.0),
+                                                     measurement_pb2.track,
+                                                     measurement_pb2.measurement)
+    rows = TrackStore.records(tracks)
+    self.assertEqual(rows['kind'].tolist(), [0, 0, 1, 0, 1, 1])
+    self.assertEqual(rows['track_id'].tolist(), [4, 5, 5, 6, 6, 6])
+    self.assertTrue(np.isnan(rows['time'][0]))
+    self.assertEqual(rows['time'][1:].tolist(), [10.0, 10.0, 10.0, 10.0, 9.0])
+    self.assertEqual(rows['x'][rows['kind'] == 0].tolist(), [4.0, 5.0, 6.0])
+    self.assertEqual(rows['u'][rows['kind'] == 0].tolist(), [1.0, 1.0, 1.0])
+    self.assertEqual(rows['w'][rows['kind'] == 1].tolist(), [1.0, 1.0, 1.0])
+    entries = TrackStore.index(rows, 7)
+    self.assertEqual(entries['row'].tolist(), [7, 8, 10])
+    self.assertEqual(entries['count'].tolist(), [1, 2, 3])
+    logging.debug(f"records pass!")
+
+  def test_readTrackTest(self):
+    store = TrackStore.TrackStore(self.path)
+    for time in (10.0, 11.0, 12.0):
+      tracks = ColumnarCodec.decode_track_group(ColumnarCodec.encode_track_group(
+        ColumnarCodec.track_group_v1_to_columns(track_group([1, 2, 3], time),
+                                                measurement_pb2.track,
+                                                measurement_pb2.measurement)))
+      store.write(TrackStore.records(tracks).tobytes())
+    store.close()
+
+    reader = TrackStore.TrackStoreReader(self.path)
+    self.assertIsInstance(reader.records, np.memmap)
+    self.assertEqual(reader.records.size, 3 * 6)
+    self.assertEqual(reader.track_ids().tolist(), [1, 2, 3])
+    track_rows, meas_rows = reader.track(3)
+    self.assertEqual(track_rows['y'].tolist(), [10.0, 11.0, 12.0])
+    self.assertEqual(meas_rows.size, 6)
+    self.assertTrue((meas_rows['track_id'] == 3).all())
+    self.assertEqual(meas_rows['time'].tolist(), [10.0, 9.0, 11.0, 10.0, 12.0, 11.0])
+    track_rows, meas_rows = reader.track(2, start=11.0, end=12.0)
+    self.assertEqual(track_rows['time'].tolist(), [11.0, 12.0])
+    self.assertEqual(meas_rows['x'].tolist(), [2.0, 2.0])
+    track_rows, meas_rows = reader.track(9)
+    self.assertEqual((track_rows.size, meas_rows.size), (0, 0))
+    logging.debug(f"read track pass!")
+
+  def test_invalidFileTest(self):
+    with open(self.path, "w") as myfile:
+      myfile.write("#trk x_pred_pos y_pred_pos z_pred_pos vel_x vel_y vel_z track_id\n")
+    with open(self.path + TrackStore.INDEX_SUFFIX, "w") as myfile:
+      myfile.write("")
+    with self.assertRaises(ValueError):
+      TrackStore.TrackStoreReader(self.path)
+    logging.debug(f"invalid file pass!")
+
+if __name__ == '__main__':
+    unittest.main()
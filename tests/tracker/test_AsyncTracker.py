@@ -0,0 +1,170 @@
+import asyncio
+import grpc
+import logging
+import unittest
+import os
+import sys
+
+from concurrent import futures
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+import AsyncTracker
+import ColumnarCodec
+import Metrics
+import measurement_pb2
+import measurement_pb2_grpc
+from TrackStrategyFactory import TrackStrategyFactory
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class TrackConsumer(measurement_pb2_grpc.TrackProducerServicer):
+  """
+    grpc.aio track consumer keeping every v1 and v2 track group it
+    receives, the first hang v1 calls never return
+  """
+  def __init__(self):
+    self.v1 = []
+    self.v2 = []
+    self.calls = 0
+    self.hang = 0
+
+  async def ProcessTrack(self, request, context):
+    self.calls += 1
+    if self.calls <= self.hang:
+      await asyncio.Event().wait()
+    self.v1.append(request)
+    return google_dot_protobuf_dot_empty__pb2.Empty()
+
+class ColumnarConsumer:
+  def __init__(self, consumer):
+    self.consumer = consumer
+
+  async def ProcessTrack(self, request, context):
+    self.consumer.v2.append(ColumnarCodec.decode_track_group(request))
+    return google_dot_protobuf_dot_empty__pb2.Empty()
+
+def measurement_group(time, sequence=0):
+  # two targets moving apart along x
+  group = measurement_pb2.measurement_group(sequence=sequence)
+  for x in (-time, 100.0 + time):
+    meas = measurement_pb2.measurement(x=x, y=1.0, z=2.0, time=time)
+    group.measurements.append(meas.SerializeToString())
+  return group
+
+class test_AsyncTracker(unittest.IsolatedAsyncioTestCase):
+  async def asyncSetUp(self):
+    self.consumer = TrackConsumer()
+    self.consumer_server = grpc.aio.server()
+    measurement_pb2_grpc.add_TrackProducerServicer_to_server(self.consumer,
+                                                             self.consumer_server)
+    ColumnarCodec.add_TrackProducerV2_to_server(ColumnarConsumer(self.consumer),
+                                                self.consumer_server)
+    port = self.consumer_server.add_insecure_port('localhost:0')
+    await self.consumer_server.start()
+    self.send_channel = grpc.aio.insecure_channel(f'localhost:{port}')
+
+    self.executor = futures.ThreadPoolExecutor(max_workers=1)
+    metrics = Metrics.MetricsRegistry()
+    self.tracker = AsyncTracker.AsyncTracker(
+      TrackStrategyFactory('kft', max_misses=1, metrics=metrics),
+      measurement_pb2_grpc.TrackProducerStub(self.send_channel),
+      ColumnarCodec.TrackProducerV2Stub(self.send_channel),
+      self.executor, queue_size=2, metrics=metrics)
+    self.server = grpc.aio.server()
+    measurement_pb2_grpc.add_MeasurementProducerServicer_to_server(self.tracker, self.server)
+    ColumnarCodec.add_MeasurementProducerV2_to_server(
+      AsyncTracker._ColumnarServicer(self.tracker), self.server)
+    port = self.server.add_insecure_port('localhost:0')
+    await self.server.start()
+    self.channel = grpc.aio.insecure_channel(f'localhost:{port}')
+    self.publisher = asyncio.create_task(self.tracker.publish_loop())
+
+  async def asyncTearDown(self):
+    self.publisher.cancel()
+    await self.channel.close()
+    await self.server.stop(None)
+    await self.send_channel.close()
+    await self.consumer_server.stop(None)
+    self.executor.shutdown()
+
+  async def test_round_tripTest(self):
+    stub = measurement_pb2_grpc.MeasurementProducerStub(self.channel)
+    await stub.ProcessMeasurement(measurement_group(0.0))
+    # more groups are streamed than the publish queue holds
+    call = stub.StreamMeasurements(iter([measurement_group(float(time), sequence=time)
+                                         for time in range(1, 5)]))
+    acks = [ack.sequence async for ack in call]
+    self.assertEqual(acks, [1, 2, 3, 4])
+
+    columns = {name: [] for name in ColumnarCodec.MEASUREMENT_FIELDS}
+    for data in measurement_group(5.0).measurements:
+      meas = measurement_pb2.measurement.FromString(data)
+      for name in columns:
+        columns[name].append(getattr(meas, name))
+    stub_v2 = ColumnarCodec.MeasurementProducerV2Stub(self.channel)
+    await stub_v2.ProcessMeasurement(ColumnarCodec.encode_measurement_group(columns))
+    await asyncio.wait_for(self.tracker.drain(), 5)
+
+    # every v1 group is published in order with both tracks
+    self.assertEqual(len(self.consumer.v1), 5)
+    for time, group in enumerate(self.consumer.v1):
+      tracks = sorted((measurement_pb2.track.FromString(data) for data in group.tracks),
+                      key=lambda track: track.track_id)
+      self.assertEqual([track.track_id for track in tracks], [1, 2])
+      last = measurement_pb2.measurement.FromString(tracks[1].measurements[-1])
+      self.assertEqual(last.time, time)
+      self.assertAlmostEqual(last.x, 100.0 + time)
+
+    # the v2 group carries the same tracks and their whole history
+    self.assertEqual(len(self.consumer.v2), 1)
+    tracks = self.consumer.v2[0]
+    self.assertEqual(sorted(tracks['track_id'].tolist()), [1, 2])
+    for track_id, meas_columns in zip(tracks['track_id'], tracks['measurements']):
+      self.assertEqual(meas_columns['time'].tolist(), [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+      sign = 1.0 if track_id == 2 else -1.0
+      self.assertAlmostEqual(meas_columns['x'][-1] - meas_columns['x'][0], sign * 5.0)
+
+    self.assertEqual(self.tracker.metrics['v1'].groups.value, 5)
+    self.assertEqual(self.tracker.metrics['v1'].tracks.value, 10)
+    self.assertEqual(self.tracker.metrics['v2'].measurements.value, 2)
+    self.assertEqual(self.tracker.metrics['v2'].tracks.value, 2)
+    logging.debug(f"test_round_tripTest pass!")
+
+  async def test_hung_consumerTest(self):
+    self.tracker.deadline = 0.2
+    self.tracker.retries = 1
+    # the first group and its retry hang, the later groups are published
+    self.consumer.hang = 2
+    stub = measurement_pb2_grpc.MeasurementProducerStub(self.channel)
+    for time in range(4):
+      await asyncio.wait_for(stub.ProcessMeasurement(measurement_group(float(time))), 5)
+    await asyncio.wait_for(self.tracker.drain(), 5)
+    self.assertEqual(self.consumer.calls, 5)
+    times = [measurement_pb2.measurement.FromString(
+               measurement_pb2.track.FromString(group.tracks[0]).measurements[-1]).time
+             for group in self.consumer.v1]
+    self.assertEqual(times, [1.0, 2.0, 3.0])
+
+    # queued groups are published before the loop stops
+    self.consumer.hang = 0
+    for time in range(4, 6):
+      await self.tracker._process(measurement_group(float(time)))
+    await self.tracker.drain()
+    self.publisher.cancel()
+    self.assertEqual(len(self.consumer.v1), 5)
+    logging.debug(f"test_hung_consumerTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 import unittest
 import os
 import sys
@@ -9,6 +10,7 @@ SOURCE_PATH = os.path.join(
 )
 sys.path.append(SOURCE_PATH)
 sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
 sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
 import Kalman_Filter_Tracker as kft
 import measurement_pb2
@@ -40,9 +42,15 @@ class test_Kalman_Filter_Tracker(unittest.TestCase):
                                         time=1)
     new_track = tracker.add_measurement(new_meas)
     logging.debug(f"x_velocity {new_track.x_velocity} y_velocity {new_track.y_velocity} z_velocity {new_track.z_velocity}")
-    self.assertAlmostEqual(new_track.x_velocity, 0.80, 2)
-    self.assertAlmostEqual(new_track.y_velocity, 1.20, 2)
-    self.assertAlmostEqual(new_track.z_velocity, 0.60, 2)
+    # Legacy kernel: P0 = I, Q = ones((6,6)), R = 0, H = [I I] and the
+    # noise term z = 1 added to each measurement. At dt = 1, A A^T has the
+    # per axis block [[2 1] [1 1]] so the predicted P = A A^T + J (J all
+    # ones), S = H P H^T = 5 I + 4 J and the velocity rows of P H^T are
+    # 2 I + 2 J. The velocity gain works out to 2/5 (I + J / 17), applied to
+    # the innovations e = (2, 3, 1.5) that is 2/5 (e + 6.5 / 17)
+    self.assertAlmostEqual(new_track.x_velocity, 0.4 * (2.0 + 6.5 / 17), 6)
+    self.assertAlmostEqual(new_track.y_velocity, 0.4 * (3.0 + 6.5 / 17), 6)
+    self.assertAlmostEqual(new_track.z_velocity, 0.4 * (1.5 + 6.5 / 17), 6)
     self.assertAlmostEqual(len(new_track.measurements) , 2)
 
     new_meas = measurement_pb2.measurement(x=2.0,
@@ -51,12 +59,178 @@ class test_Kalman_Filter_Tracker(unittest.TestCase):
                                         time=2)
     new_track = tracker.add_measurement(new_meas)
     logging.debug(f"x_velocity {new_track.x_velocity} y_velocity {new_track.y_velocity} z_velocity {new_track.z_velocity}")
-    self.assertAlmostEqual(new_track.x_velocity, 0.860, 2)
-    self.assertAlmostEqual(new_track.y_velocity, 1.440, 2)
-    self.assertAlmostEqual(new_track.z_velocity, 0.570, 2)
+    # The legacy kernel keeps the predicted covariance, so this update
+    # uses P = A (A A^T + J) A^T + J with the gain P H^T (H P H^T)^-1
+    self.assertAlmostEqual(new_track.x_velocity, 0.97696, 4)
+    self.assertAlmostEqual(new_track.y_velocity, 1.55696, 4)
+    self.assertAlmostEqual(new_track.z_velocity, 0.68696, 4)
     self.assertEqual(len(new_track.measurements) , 3)
 
     logging.debug(f"test_Kalman_Filter_TrackerTest pass!")
 
+  def test_transition_cacheTest(self):
+    kft.transition_matrices.cache_clear()
+    tracker = kft.Kalman_Filter_Tracker()
+    tracker.X = np.zeros((6,1))
+    tracker.time = 0.0
+    for time in (2.0, 4.0, 6.0):
+      new_X, new_P = tracker.predict(time)
+      tracker.time = time
+    info = kft.Kalman_Filter_Tracker.cache_info()
+    self.assertEqual(info.misses, 1)
+    self.assertEqual(info.hits, 2)
+
+    A, B, A_T = kft.transition_matrices(2.0)
+    self.assertAlmostEqual(A[0][3], 2.0)
+    self.assertAlmostEqual(B[0][0], 2.0)
+    self.assertTrue(np.array_equal(A.T, A_T))
+    self.assertFalse(A.flags.writeable)
+    logging.debug(f"test_transition_cacheTest pass!")
+
+  def test_update_kernelsTest(self):
+    rng = np.random.default_rng(0)
+    trackers = {kernel: kft.create_tracker(kernel=kernel)
+                for kernel in ('standard', 'joseph', 'sqrt')}
+    for i in range(200):
+      time = 2.0 * i
+      truth = np.array([0.1, 0.2, 0.05]) * time
+      x, y, z = truth + rng.normal(0, 0.1, 3)
+      meas = measurement_pb2.measurement(x=x, y=y, z=z, time=time)
+      for tracker in trackers.values():
+        tracker.add_measurement(meas)
+    # the kernels are algebraically the same update
+    for kernel in ('joseph', 'sqrt'):
+      self.assertTrue(np.allclose(trackers[kernel].X, trackers['standard'].X, atol=1e-6))
+      self.assertTrue(np.allclose(trackers[kernel].covariance(), trackers['standard'].P,
+                                  atol=1e-6))
+    # the covariance shrinks once the gain is applied
+    self.assertLess(np.trace(trackers['standard'].P), 6.0)
+    # joseph and sqrt keep the covariance symmetric positive semi definite
+    for kernel in ('joseph', 'sqrt'):
+      P = trackers[kernel].covariance()
+      self.assertLess(np.abs(P - P.T).max(), 1e-8)
+      self.assertGreater(np.linalg.eigvalsh(P).min(), -1e-9)
+
+    # the square root filter carries a factor of P, triangular after the
+    # QR time update
+    _, S = trackers['sqrt'].predict(402.0)
+    self.assertTrue(np.array_equal(S, np.tril(S)))
+    _, P = trackers['standard'].predict(402.0)
+    self.assertTrue(np.allclose(S @ S.T, P, atol=1e-6))
+    for expected, actual in zip(trackers['standard'].predict_measurement(402.0),
+                                trackers['sqrt'].predict_measurement(402.0)):
+      self.assertTrue(np.allclose(expected, actual, atol=1e-6))
+
+    with self.assertRaises(ValueError):
+      kft.Kalman_Filter_Tracker(kernel='inverse')
+    with self.assertRaises(ValueError):
+      kft.Kalman_Filter_Tracker(kernel='sqrt')
+    logging.debug(f"test_update_kernelsTest pass!")
+
+  def test_steady_stateTest(self):
+    rng = np.random.default_rng(0)
+    steady = kft.Kalman_Filter_Tracker(kernel='standard', steady_state=True)
+    full = kft.Kalman_Filter_Tracker(kernel='standard')
+    def feed(time):
+      truth = np.array([0.1, 0.2, 0.05]) * time
+      x, y, z = truth + rng.normal(0, 0.1, 3)
+      meas = measurement_pb2.measurement(x=x, y=y, z=z, time=time)
+      steady.add_measurement(meas)
+      full.add_measurement(meas)
+    for i in range(300):
+      feed(2.0 * i)
+    # the gain has been frozen and tracks the full filter within the noise
+    self.assertIsNotNone(steady.gain)
+    P = steady.P
+    self.assertTrue(np.allclose(steady.X, full.X, atol=0.05))
+    # constant gain updates leave the covariance alone
+    feed(600.0)
+    self.assertIs(steady.P, P)
+    # a missed report falls back to the full filter
+    feed(604.0)
+    self.assertIsNone(steady.gain)
+    self.assertIsNot(steady.P, P)
+    self.assertTrue(np.allclose(steady.X, full.X, atol=0.05))
+
+    with self.assertRaises(ValueError):
+      kft.Kalman_Filter_Tracker(kernel='legacy', steady_state=True)
+    logging.debug(f"test_steady_stateTest pass!")
+
+  def test_axis_kernelTest(self):
+    rng = np.random.default_rng(0)
+    axis = kft.create_tracker(kernel='axis')
+    dense = kft.Kalman_Filter_Tracker(kernel='standard')
+    # the dense filter with the same block diagonal noise model
+    dense.Q = axis.Q.copy()
+    batch = [kft.create_tracker(kernel='axis') for _ in range(4)]
+    singles = [kft.create_tracker(kernel='axis') for _ in range(4)]
+    for i in range(50):
+      time = 2.0 * i + rng.random()
+      truth = np.array([0.1, 0.2, 0.05]) * time
+      x, y, z = truth + rng.normal(0, 0.1, 3)
+      meas = measurement_pb2.measurement(x=x, y=y, z=z, time=time)
+      axis.add_measurement(meas)
+      dense.add_measurement(meas)
+      Y = truth + rng.normal(0, 0.1, (4, 3))
+      times = [time + 0.1 * j for j in range(4)]
+      group = [measurement_pb2.measurement(x=Y[j][0], y=Y[j][1], z=Y[j][2], time=times[j])
+               for j in range(4)]
+      if i == 0:
+        for tracker, meas in zip(batch, group):
+          tracker.add_measurement(meas)
+      else:
+        kft.Decoupled_Kalman_Filter_Tracker.update_batch(batch, Y, times)
+      for tracker, meas in zip(singles, group):
+        tracker.add_measurement(meas)
+    self.assertTrue(np.allclose(axis.X, dense.X, rtol=1e-9, atol=1e-9))
+    self.assertTrue(np.allclose(axis.covariance(), dense.P, rtol=1e-9, atol=1e-9))
+    for expected, actual in zip(dense.predict_measurement(110.0), axis.predict_measurement(110.0)):
+      self.assertTrue(np.allclose(expected, actual, rtol=1e-9, atol=1e-9))
+
+    # the batch runs the same filter as the individual trackers
+    for tracker, single in zip(batch, singles):
+      self.assertTrue(np.allclose(tracker.X, single.X, rtol=1e-9, atol=1e-9))
+      self.assertTrue(np.allclose(tracker.P, single.P, rtol=1e-9, atol=1e-9))
+    z_pred, S = kft.Decoupled_Kalman_Filter_Tracker.predict_batch(batch, 110.0)
+    for j, single in enumerate(singles):
+      expected_z, expected_S = single.predict_measurement(110.0)
+      self.assertTrue(np.allclose(z_pred[j], expected_z))
+      self.assertTrue(np.allclose(S[j], expected_S))
+
+    with self.assertRaises(ValueError):
+      kft.create_tracker(kernel='axis', steady_state=True)
+    logging.debug(f"test_axis_kernelTest pass!")
+
+  def test_out_of_sequenceTest(self):
+    rng = np.random.default_rng(0)
+    times = [2.0 * i for i in range(12)]
+    meas = [measurement_pb2.measurement(x=0.1 * time + rng.normal(0, 0.1),
+                                        y=0.2 * time + rng.normal(0, 0.1),
+                                        z=0.05 * time + rng.normal(0, 0.1), time=time)
+            for time in times]
+    # the measurement at 14 arrives after the one at 18
+    late = meas[:7] + meas[8:10] + meas[7:8] + meas[10:]
+    for kernel in ('legacy', 'standard', 'sqrt', 'axis'):
+      ordered = kft.create_tracker(kernel=kernel)
+      shuffled = kft.create_tracker(kernel=kernel, oosm_window=5.0)
+      for m in meas:
+        ordered.add_measurement(m)
+      for m in late:
+        track = shuffled.add_measurement(m)
+      self.assertTrue(np.allclose(shuffled.X, ordered.X, rtol=1e-9, atol=1e-9))
+      self.assertTrue(np.allclose(shuffled.P, ordered.P, rtol=1e-9, atol=1e-9))
+      self.assertEqual(shuffled.time, times[-1])
+      self.assertEqual([measurement_pb2.measurement.FromString(data).time
+                        for data in track.measurements], times)
+      # the retained states cover the window and no more
+      self.assertEqual([state[0] for state in shuffled.states], [16.0, 18.0, 20.0, 22.0])
+
+      # too late for the window, the track is left as it was
+      X = shuffled.X
+      track = shuffled.add_measurement(measurement_pb2.measurement(x=1.0, time=10.0))
+      self.assertIs(shuffled.X, X)
+      self.assertEqual(len(track.measurements), len(times))
+    logging.debug(f"test_out_of_sequenceTest pass!")
+
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
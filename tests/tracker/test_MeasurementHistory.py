@@ -0,0 +1,141 @@
+import logging
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+from ColumnarCodec import MeasurementRow
+from MeasurementHistory import MeasurementHistory
+import Inst_Vel_Tracker as ivt
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+
+class test_MeasurementHistory(unittest.TestCase):
+  def test_last_kTest(self):
+    history = MeasurementHistory('last-k', 3)
+    for i in range(5):
+      history.append(measurement_pb2.measurement(x=float(i), time=i))
+    self.assertEqual(history.count, 5)
+    self.assertEqual(len(history), 3)
+    self.assertAlmostEqual(history[-1].x, 4.0)
+    self.assertAlmostEqual(history[-2].x, 3.0)
+    self.assertAlmostEqual(history[0].x, 2.0)
+
+    published = history.serialized()
+    self.assertEqual(len(published), 3)
+    for i in range(len(published)):
+      meas = measurement_pb2.measurement()
+      meas.ParseFromString(published[i])
+      self.assertAlmostEqual(meas.x, 2.0 + i)
+    logging.debug(f"test_last_kTest pass!")
+
+  def test_retentionTest(self):
+    history = MeasurementHistory('none', 3)
+    for i in range(5):
+      history.append(measurement_pb2.measurement(x=float(i), time=i))
+    self.assertEqual(history.serialized(), [])
+    self.assertAlmostEqual(history[-1].x, 4.0)
+
+    history = MeasurementHistory('all', 3)
+    for i in range(5):
+      history.append(measurement_pb2.measurement(x=float(i), time=i))
+    self.assertEqual(len(history.serialized()), 5)
+
+    with self.assertRaises(ValueError):
+      MeasurementHistory('some')
+    logging.debug(f"test_retentionTest pass!")
+
+  def test_out_of_sequenceTest(self):
+    history = MeasurementHistory('last-k', 4)
+    for time in (0, 1, 2, 4, 5):
+      history.append(measurement_pb2.measurement(x=float(time), time=time))
+    # a late measurement is inserted in time order
+    history.append(measurement_pb2.measurement(x=3.0, time=3))
+    self.assertEqual([history[i].time for i in range(len(history))], [2, 3, 4, 5])
+    published = [measurement_pb2.measurement.FromString(data).x
+                 for data in history.serialized()]
+    self.assertEqual(published, [2.0, 3.0, 4.0, 5.0])
+    # one older than everything held drops straight out of a full buffer
+    history.append(measurement_pb2.measurement(x=1.5, time=1.5))
+    self.assertEqual([history[i].time for i in range(len(history))], [2, 3, 4, 5])
+    history.append(measurement_pb2.measurement(x=6.0, time=6))
+    self.assertEqual([history[i].time for i in range(len(history))], [3, 4, 5, 6])
+    self.assertEqual(history.count, 8)
+    logging.debug(f"test_out_of_sequenceTest pass!")
+
+  def test_columnsTest(self):
+    history = MeasurementHistory('last-k', 4)
+    for time in (0, 1, 2, 4, 5):
+      history.append(measurement_pb2.measurement(x=float(time), true_z=-time, time=time))
+    columns = history.columns()
+    self.assertEqual(columns['time'].tolist(), [1, 2, 4, 5])
+    self.assertEqual(columns['true_z'].tolist(), [-1, -2, -4, -5])
+    # a late measurement is inserted in time order, earlier columns are unchanged
+    history.append(measurement_pb2.measurement(x=3.0, time=3))
+    self.assertEqual(history.columns()['x'].tolist(), [2, 3, 4, 5])
+    self.assertEqual(columns['x'].tolist(), [1, 2, 4, 5])
+    history.append(measurement_pb2.measurement(x=6.0, time=6))
+    self.assertEqual(history.columns()['x'].tolist(), [3, 4, 5, 6])
+
+    history = MeasurementHistory('all')
+    for i in range(40):
+      history.append(measurement_pb2.measurement(y=2.0 * i, time=i))
+    history.append(measurement_pb2.measurement(y=-1.0, time=0.5))
+    self.assertEqual(history.columns()['y'].tolist(), [0, -1] + [2.0 * i for i in range(1, 40)])
+    self.assertEqual(history.columns()['x'].tolist(), [0] * 41)
+
+    history = MeasurementHistory('none', 4)
+    history.append(measurement_pb2.measurement(x=1.0, time=1))
+    self.assertEqual(history.columns()['x'].size, 0)
+    logging.debug(f"test_columnsTest pass!")
+
+  def test_measurement_rowsTest(self):
+    history = MeasurementHistory('last-k', 3)
+    for time in (0, 1, 3):
+      history.append(MeasurementRow(x=float(time), y=0.0, z=0.0, time=time,
+                                    true_x=0.0, true_y=0.0, true_z=-time))
+    history.append(measurement_pb2.measurement(x=4.0, time=4))
+    # a late row is inserted in time order
+    history.append(MeasurementRow(2.0, 0.0, 0.0, 2, 0.0, 0.0, -2.0))
+    self.assertEqual(history.columns()['x'].tolist(), [2, 3, 4])
+    # rows are only serialized once a v1 track message needs them
+    self.assertIsNone(history._bytes[0])
+    measurements = [measurement_pb2.measurement.FromString(data)
+                    for data in history.serialized()]
+    self.assertEqual([meas.time for meas in measurements], [2, 3, 4])
+    self.assertEqual(measurements[1].true_z, -3.0)
+
+    tracker = ivt.Inst_Vel_Tracker('last-k', 2)
+    for i in range(3):
+      new_track = tracker.add_measurement(MeasurementRow(2.0 * i, 0.0, 0.0, i, 0.0, 0.0, 0.0),
+                                          history=False)
+    self.assertAlmostEqual(new_track.x_velocity, 2.0)
+    self.assertEqual(len(new_track.measurements), 0)
+    logging.debug(f"test_measurement_rowsTest pass!")
+
+  def test_Inst_Vel_TrackerTest(self):
+    tracker = ivt.Inst_Vel_Tracker('last-k', 2)
+    for i in range(4):
+      new_track = tracker.add_measurement(
+        measurement_pb2.measurement(x=2.0 * i, y=3.0 * i, z=-1.0 * i, time=i))
+    self.assertAlmostEqual(new_track.x_velocity, 2.0)
+    self.assertAlmostEqual(new_track.y_velocity, 3.0)
+    self.assertAlmostEqual(new_track.z_velocity, -1.0)
+    self.assertEqual(len(new_track.measurements), 2)
+    logging.debug(f"test_Inst_Vel_TrackerTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
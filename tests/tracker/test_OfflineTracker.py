@@ -0,0 +1,87 @@
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+import OfflineTracker
+import SimFileCreator
+import SimFileLoader
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_OfflineTracker(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.basename = os.path.join(self.tmpdir.name, "track")
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_scansTest(self):
+    tracks = SimFileLoader.pad_tracks(np.array([7, 3, 3, 7, 3]),
+                                      np.array([2.0, 4.0, 0.0, 0.0, 2.0]),
+                                      meas=np.arange(15.0).reshape(5, 3),
+                                      truth=np.zeros((5, 3)),
+                                      truth_velocity=np.ones((5, 3)))
+    groups, truth = OfflineTracker.scans(tracks)
+    self.assertEqual([group['time'].tolist() for group in groups],
+                     [[0.0, 0.0], [2.0, 2.0], [4.0]])
+    self.assertEqual(groups[0]['x'].tolist(), [6.0, 9.0])
+    self.assertEqual(groups[2]['z'].tolist(), [5.0])
+    self.assertEqual(truth.shape, (5, 6))
+    self.assertTrue((truth[:, 3:] == 1.0).all())
+    logging.debug(f"scans pass!")
+
+  def test_track_errorsTest(self):
+    P = np.broadcast_to(4.0 * np.identity(6), (5, 6, 6)).copy()
+    P[3] = np.nan
+    P[4] = np.ones((6, 6))
+    errors = OfflineTracker.track_errors(np.zeros((5, 6)), np.array([1, 2, 1, 1, 1]),
+                                         np.full((5, 6), 2.0), P, settle=1)
+    # the first update of tracks 1 and 2 is left out, a missing or a
+    # singular covariance only leaves the NEES of its own update undefined
+    self.assertEqual(errors['position'].shape, (3, 3))
+    self.assertTrue(np.allclose(errors['nees'][0], 6.0))
+    self.assertTrue(np.isnan(errors['nees'][1]))
+    self.assertTrue(np.isnan(errors['nees'][2]))
+    errors = {name: values[:2] for name, values in errors.items()}
+    summary = OfflineTracker.summarize(errors)
+    self.assertAlmostEqual(summary['position_rmse'], np.sqrt(12.0))
+    self.assertAlmostEqual(summary['nees_mean'], 6.0)
+    self.assertEqual(summary['nees_above_bound'], 0.0)
+    logging.debug(f"track errors pass!")
+
+  def test_run_fileTest(self):
+    times = np.arange(0, 40, 2.0)
+    for fmt in ('npz', 'csv'):
+      path = SimFileCreator.write_shard(0, 0, 3, times, 5, self.basename, fmt)
+      for kernel in ('legacy', 'standard', 'axis'):
+        result = OfflineTracker.run_file(path, dict(kernel=kernel, retention='none'))
+        self.assertEqual(result['targets'], 3)
+        # the simulated targets are far apart, one track each
+        self.assertEqual(result['tracks'], 3)
+        self.assertEqual(result['errors']['position'].shape, (3 * (times.size - 2), 3))
+        summary = OfflineTracker.summarize(result['errors'])
+        self.assertLess(summary['velocity_rmse'], 1.0)
+        # the legacy covariance is not an error covariance
+        self.assertEqual(np.isnan(result['errors']['nees']).all(), kernel == 'legacy')
+        self.assertEqual(summary['nees_mean'] is None, kernel == 'legacy')
+    logging.debug(f"run file pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import logging
+import numpy as np
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+from ShardedTracker import ShardedTrackStrategyFactory
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+
+class test_ShardedTracker(unittest.TestCase):
+  def test_ShardedTrackerTest(self):
+    rng = np.random.default_rng(11)
+    # keep the targets away from the shard cell edges so none changes shard
+    start = rng.integers(0, 10, size=(40, 3)) * 100.0 + rng.uniform(20, 80, size=(40, 3))
+    track_int = ShardedTrackStrategyFactory(3, 100.0, filter_type='ivt')
+    try:
+      for step in range(3):
+        positions = start + step * 0.5
+        group = measurement_pb2.measurement_group()
+        for x, y, z in positions.tolist():
+          meas = measurement_pb2.measurement(x=x, y=y, z=z, time=step)
+          group.measurements.append(meas.SerializeToString())
+        track_grp = track_int.process_measurement(group)
+        tracks = [measurement_pb2.track.FromString(data) for data in track_grp.tracks]
+        ids = [track.track_id for track in tracks]
+        self.assertEqual(len(ids), 40)
+        self.assertEqual(len(set(ids)), 40)
+        self.assertTrue(all(len(track.measurements) == step + 1 for track in tracks))
+
+      columns = {'x': start[:, 0] + 1.5, 'y': start[:, 1] + 1.5,
+                 'z': start[:, 2] + 1.5, 'time': np.full(40, 3.0)}
+      for name in ('true_x', 'true_y', 'true_z'):
+        columns[name] = np.zeros(40)
+      tracks = track_int.process_columns(columns)
+      self.assertEqual(sorted(tracks['track_id'].tolist()), sorted(ids))
+      self.assertTrue(all(len(history['x']) == 4 for history in tracks['measurements']))
+      self.assertEqual(track_int.routed.sum(), 160)
+    finally:
+      track_int.close()
+    logging.debug(f"test_ShardedTrackerTest pass!")
+
+  def test_quiet_shardTest(self):
+    track_int = ShardedTrackStrategyFactory(2, 100.0, filter_type='ivt', max_misses=1)
+    try:
+      # one target in a cell of each shard
+      positions = [(50.0 + 100.0 * i, 50.0, 50.0) for i in range(8)]
+      shard = track_int.route(positions).tolist()
+      targets = [positions[shard.index(0)], positions[shard.index(1)]]
+      def scan(points, time):
+        group = measurement_pb2.measurement_group()
+        for x, y, z in points:
+          meas = measurement_pb2.measurement(x=x, y=y, z=z, time=time)
+          group.measurements.append(meas.SerializeToString())
+        return {measurement_pb2.track.FromString(data).track_id: i
+                for i, data in enumerate(track_int.process_measurement(group).tracks)}
+      first = scan(targets, 0)
+      # the second shard goes quiet long enough for its track to be dropped
+      for time in (1, 2):
+        scan(targets[:1], time)
+      tracks = scan(targets, 3)
+      self.assertEqual(len(tracks), 2)
+      self.assertEqual(len(set(tracks) & set(first)), 1)
+
+      # a dead worker fails the scan clearly
+      track_int._workers[1].terminate()
+      track_int._workers[1].join()
+      with self.assertRaisesRegex(RuntimeError, "shard 1 worker"):
+        scan(targets, 4)
+    finally:
+      track_int.close()
+    logging.debug(f"test_quiet_shardTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
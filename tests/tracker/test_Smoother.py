@@ -0,0 +1,113 @@
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Simulator'))
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackConsumer'))
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackPlot'))
+import Kalman_Filter_Tracker as kft
+import SimFileCreator
+import Smoother
+import TrackStore
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class test_Smoother(unittest.TestCase):
+  def setUp(self):
+    times = np.arange(0, 30, 2.0)
+    self.tracks = SimFileCreator.generate_tracks(4, times, np.random.default_rng(1))
+    self.length = np.array([15, 9, 15, 4])
+    self.time = np.tile(times, (4, 1))
+    for i, length in enumerate(self.length):
+      self.time[i, length:] = np.nan
+
+  def trackers(self, kernel):
+    trackers = []
+    for i, length in enumerate(self.length):
+      tracker = kft.create_tracker(kernel=kernel)
+      states = []
+      for k in range(length):
+        x, y, z = self.tracks['meas'][i, k]
+        tracker.add_measurement(measurement_pb2.measurement(x=x, y=y, z=z, time=self.time[i, k]))
+        states.append(tracker.X[:, 0])
+      trackers.append((tracker, np.array(states)))
+    return trackers
+
+  def test_rts_smoothTest(self):
+    for kernel in Smoother.SMOOTHER_KERNELS:
+      result = Smoother.rts_smooth(self.time, self.tracks['meas'], self.length, kernel)
+      for i, (tracker, states) in enumerate(self.trackers(kernel)):
+        length = self.length[i]
+        # the forward pass is the tracker's filter
+        self.assertTrue(np.allclose(result['X_filter'][i, :length], states, atol=1e-9))
+        # the newest state is already smoothed, padding repeats it
+        self.assertTrue(np.allclose(result['X'][i, length - 1:], states[-1], atol=1e-9))
+        # a track smoothed alone matches the padded batch
+        alone = Smoother.rts_smooth(self.time[i:i + 1, :length],
+                                    self.tracks['meas'][i:i + 1, :length], kernel=kernel)
+        self.assertTrue(np.allclose(alone['X'][0], result['X'][i, :length], atol=1e-9))
+        self.assertTrue(np.allclose(alone['P'][0], result['P'][i, :length], atol=1e-9))
+
+        # fixed lag over the retained states is the full smoother's estimate
+        lag = min(3, length - 1)
+        time, X, P = Smoother.fixed_lag(tracker, lag)
+        self.assertEqual(time, self.time[i, length - 1 - lag])
+        self.assertTrue(np.allclose(X[:, 0], alone['X'][0, length - 1 - lag], atol=1e-9))
+        self.assertTrue(np.allclose(P, alone['P'][0, length - 1 - lag], atol=1e-9))
+      # smoothing never loses information
+      self.assertTrue((np.trace(result['P'], axis1=2, axis2=3) <=
+                       np.trace(result['P_filter'], axis1=2, axis2=3) + 1e-9).all())
+
+    with self.assertRaises(ValueError):
+      Smoother.rts_smooth(self.time, self.tracks['meas'], kernel='legacy')
+    with self.assertRaises(ValueError):
+      Smoother.fixed_lag(kft.create_tracker(kernel='legacy'), 2)
+    logging.debug(f"rts smooth pass!")
+
+  def test_track_fileTest(self):
+    # a track file published with a last-k history of 3 measurements
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = os.path.join(tmpdir, "track.bin")
+      store = TrackStore.TrackStore(path)
+      for k in range(self.time.shape[1]):
+        for i in np.nonzero(k < self.length)[0]:
+          history = slice(max(k - 2, 0), k + 1)
+          meas = self.tracks['meas'][i, history]
+          truth = self.tracks['truth'][i, history]
+          tracks = {'track_id': np.array([i + 1]), 'x_pred_pos': np.zeros(1),
+                    'y_pred_pos': np.zeros(1), 'z_pred_pos': np.zeros(1),
+                    'x_velocity': np.zeros(1), 'y_velocity': np.zeros(1),
+                    'z_velocity': np.zeros(1),
+                    'measurements': [{'x': meas[:, 0], 'y': meas[:, 1], 'z': meas[:, 2],
+                                      'time': self.time[i, history],
+                                      'true_x': truth[:, 0], 'true_y': truth[:, 1],
+                                      'true_z': truth[:, 2]}]}
+          store.write(TrackStore.records(tracks).tobytes())
+      store.close()
+      tracks = Smoother.load_tracks([path])
+    self.assertEqual(tracks['track_id'].tolist(), [1, 2, 3, 4])
+    self.assertEqual(tracks['length'].tolist(), self.length.tolist())
+    valid = ~np.isnan(self.time)
+    self.assertTrue(np.allclose(tracks['meas'][valid], self.tracks['meas'][valid]))
+    self.assertTrue(np.allclose(tracks['truth'][valid], self.tracks['truth'][valid]))
+    self.assertTrue(np.array_equal(tracks['time'], self.time, equal_nan=True))
+    logging.debug(f"track file pass!")
+
+if __name__ == '__main__':
+    unittest.main()
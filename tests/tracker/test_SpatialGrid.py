@@ -0,0 +1,66 @@
+import logging
+import numpy as np
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+from SpatialGrid import SpatialGrid
+from TrackStrategyFactory import TrackStrategyFactory
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+
+class test_SpatialGrid(unittest.TestCase):
+  def test_candidatesTest(self):
+    rng = np.random.default_rng(5)
+    tracks = rng.uniform(-500, 500, size=(400, 3))
+    points = np.vstack((tracks[:100] + rng.normal(0, 2, size=(100, 3)),
+                        rng.uniform(-500, 500, size=(100, 3))))
+    grid = SpatialGrid(25.0)
+    grid.build(tracks)
+    track_idx, meas_idx = grid.candidates(points)
+    found = set(zip(track_idx.tolist(), meas_idx.tolist()))
+    self.assertEqual(len(found), track_idx.size)
+
+    # Every pair within one cell along each axis has to be a candidate
+    close = np.all(np.abs(tracks[:, None, :] - points[None, :, :]) < 25.0, axis=-1)
+    expected = set(zip(*[idx.tolist() for idx in np.nonzero(close)]))
+    self.assertTrue(expected <= found)
+    self.assertLess(len(found), tracks.shape[0] * points.shape[0] / 10)
+    self.assertEqual(grid.stats['candidates'], len(found))
+    self.assertEqual(grid.stats['tracks'], 400)
+    logging.debug(f"test_candidatesTest pass!")
+
+  def test_factory_gridTest(self):
+    rng = np.random.default_rng(9)
+    start = rng.uniform(0, 1000, size=(50, 3))
+    results = []
+    for cell_size in (None, 20.0):
+      factory = TrackStrategyFactory('ivt', cell_size=cell_size)
+      factory.track_id = 1
+      for step in range(4):
+        positions = start + step * 1.5
+        columns = {'x': positions[:, 0], 'y': positions[:, 1], 'z': positions[:, 2],
+                   'time': np.full(50, float(step))}
+        for name in ('true_x', 'true_y', 'true_z'):
+          columns[name] = np.zeros(50)
+        tracks = factory.process_columns(columns)
+      results.append(tracks['track_id'].tolist())
+    self.assertEqual(results[0], results[1])
+    self.assertEqual(sorted(results[1]), list(range(1, 51)))
+    logging.debug(f"test_factory_gridTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,146 @@
+import grpc
+import logging
+import threading
+import time
+import unittest
+import os
+import sys
+
+from concurrent import futures
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+from TrackPublisher import TrackPublisher
+from StreamWindow import StreamWindow
+import measurement_pb2
+import measurement_pb2_grpc
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+class GatedConsumer(measurement_pb2_grpc.TrackProducerServicer):
+  """
+    Track consumer that holds every call until it is released
+  """
+  def __init__(self):
+    self.release = threading.Event()
+    self.received = []
+    self.calls = 0
+
+  def ProcessTrack(self, request, context):
+    self.release.wait()
+    self.calls += 1
+    for data in request.tracks:
+      self.received.append(measurement_pb2.track.FromString(data))
+    return google_dot_protobuf_dot_empty__pb2.Empty()
+
+  def StreamTracks(self, request_iterator, context):
+    for request in request_iterator:
+      self.release.wait()
+      self.calls += 1
+      for data in request.tracks:
+        self.received.append(measurement_pb2.track.FromString(data))
+      yield measurement_pb2.ack(sequence=request.sequence)
+
+def track_group(*track_ids, x=0.0):
+  tracks = [measurement_pb2.track(track_id=track_id, x_pred_pos=x).SerializeToString()
+            for track_id in track_ids]
+  return measurement_pb2.track_group(tracks=tracks).SerializeToString()
+
+class test_TrackPublisher(unittest.TestCase):
+  def setUp(self):
+    self.consumer = GatedConsumer()
+    self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    measurement_pb2_grpc.add_TrackProducerServicer_to_server(self.consumer, self.server)
+    port = self.server.add_insecure_port('localhost:0')
+    self.server.start()
+    self.channel = grpc.insecure_channel(f'localhost:{port}')
+
+  def tearDown(self):
+    self.consumer.release.set()
+    self.channel.close()
+    self.server.stop(None)
+
+  def test_coalesceTest(self):
+    publisher = TrackPublisher(self.channel, max_queue=16, max_batch=8)
+    publisher.publish('v1', track_group(1))
+    for i in range(2, 6):
+      publisher.publish('v1', track_group(i))
+    self.consumer.release.set()
+    publisher.close()
+    stats = publisher.stats()
+    self.assertEqual(stats['published'], 5)
+    self.assertEqual(stats['queue_depth'], 0)
+    self.assertLess(stats['sends'], 5)
+    self.assertEqual(self.consumer.calls, stats['sends'])
+    self.assertEqual([track.track_id for track in self.consumer.received], [1, 2, 3, 4, 5])
+    self.assertGreater(stats['latency_max'], 0.0)
+    logging.debug(f"coalesce pass!")
+
+  def test_dropOldestTest(self):
+    publisher = TrackPublisher(self.channel, max_queue=2, overflow='drop-oldest')
+    publisher.publish('v1', track_group(1))
+    # wait for the first group to be in flight so the queue holds the rest
+    while publisher.stats()['queue_depth']:
+      time.sleep(0.001)
+    for i in range(2, 6):
+      publisher.publish('v1', track_group(i))
+    self.assertEqual(publisher.stats()['queue_depth'], 2)
+    self.assertEqual(publisher.stats()['dropped'], 2)
+    self.consumer.release.set()
+    publisher.close()
+    self.assertEqual([track.track_id for track in self.consumer.received], [1, 4, 5])
+    logging.debug(f"drop oldest pass!")
+
+  def test_mergeLatestTest(self):
+    publisher = TrackPublisher(self.channel, max_queue=1, overflow='merge-latest')
+    publisher.publish('v1', track_group(1))
+    while publisher.stats()['queue_depth']:
+      time.sleep(0.001)
+    publisher.publish('v1', track_group(1, 2, x=1.0))
+    publisher.publish('v1', track_group(2, 3, x=2.0))
+    publisher.publish('v1', track_group(1, x=3.0))
+    self.assertEqual(publisher.stats()['merged'], 2)
+    self.consumer.release.set()
+    publisher.close()
+    received = [(track.track_id, track.x_pred_pos) for track in self.consumer.received]
+    self.assertEqual(received, [(1, 0.0), (2, 2.0), (3, 2.0), (1, 3.0)])
+    logging.debug(f"merge latest pass!")
+
+  def test_streamDeadlineTest(self):
+    stub = measurement_pb2_grpc.TrackProducerStub(self.channel)
+    stream = StreamWindow(stub.StreamTracks, window=1)
+    publisher = TrackPublisher(self.channel, max_batch=1, deadline=0.1, stream=stream)
+    for i in range(1, 4):
+      publisher.publish('v1', track_group(i))
+    # the consumer holds back its acks, the sends after the first one
+    # give up at the deadline instead of blocking the publisher
+    start = time.monotonic()
+    while publisher.stats()['failed'] < 2 and time.monotonic() - start < 5:
+      time.sleep(0.01)
+    self.assertEqual(publisher.stats()['failed'], 2)
+    self.consumer.release.set()
+    publisher.publish('v1', track_group(4))
+    publisher.close()
+    stream.close(timeout=5)
+    self.assertEqual(publisher.stats()['published'], 2)
+    self.assertEqual([track.track_id for track in self.consumer.received], [1, 4])
+    logging.debug(f"stream deadline pass!")
+
+  def test_invalidOverflowTest(self):
+    with self.assertRaises(ValueError):
+      TrackPublisher(self.channel, overflow='ignore')
+    logging.debug(f"invalid overflow pass!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import itertools
+import logging
+import numpy as np
+import threading
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
+from TrackStrategyFactory import TrackStrategyFactory
+import Association
+import measurement_pb2
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+def measurement_group(positions, time):
+  group = measurement_pb2.measurement_group()
+  for x, y, z in positions:
+    meas = measurement_pb2.measurement(x=x, y=y, z=z, time=time)
+    group.measurements.append(meas.SerializeToString())
+  return group
+
+def track_ids(track_grp):
+  tracks = {}
+  for data in track_grp.tracks:
+    track = measurement_pb2.track.FromString(data)
+    tracks[track.track_id] = track
+  return tracks
+
+class test_TrackStrategyFactory(unittest.TestCase):
+  def test_multi_targetTest(self):
+    for filter_type, kernel in (('kft', 'legacy'), ('ivt', 'legacy'), ('kft', 'axis')):
+      factory = TrackStrategyFactory(filter_type, max_misses=1, kernel=kernel)
+      factory.track_id = 1
+      # Two targets moving apart, reported in a different order every scan
+      first = track_ids(factory.process_measurement(
+        measurement_group([(0.0, 0.0, 0.0), (50.0, 50.0, 50.0)], 0)))
+      self.assertEqual(sorted(first), [1, 2])
+      for step in range(1, 5):
+        positions = [(50.0 + step, 50.0, 50.0), (0.0, step * 0.5, 0.0)]
+        tracks = track_ids(factory.process_measurement(measurement_group(positions, step)))
+        self.assertEqual(sorted(tracks), [1, 2])
+        self.assertEqual(len(tracks[1].measurements), step + 1)
+        last = measurement_pb2.measurement.FromString(tracks[1].measurements[-1])
+        self.assertAlmostEqual(last.y, step * 0.5)
+        last = measurement_pb2.measurement.FromString(tracks[2].measurements[-1])
+        self.assertAlmostEqual(last.x, 50.0 + step)
+      self.assertEqual(len(factory.Tracks), 2)
+
+      # A measurement far from both tracks starts a new track, and tracks
+      # that go unmeasured are dropped after max_misses scans
+      tracks = track_ids(factory.process_measurement(
+        measurement_group([(1000.0, 1000.0, 1000.0)], 5)))
+      self.assertEqual(list(tracks), [3])
+      factory.process_measurement(measurement_group([(1000.0, 1000.0, 1000.0)], 6))
+      self.assertEqual([track.track_id for track in factory.Tracks], [3])
+    logging.debug(f"test_multi_targetTest pass!")
+
+  def test_threadsTest(self):
+    # the server threads of both schemas share one factory, each thread
+    # reports its own targets so the other threads' tracks coast, are
+    # dropped and restarted while it runs
+    factory = TrackStrategyFactory('kft', kernel='standard', max_misses=1)
+    errors = []
+    def run(thread):
+      positions = np.array([(1e4 * thread + 100.0 * i, 0.0, 0.0) for i in range(10)])
+      try:
+        for scan in range(25):
+          if thread % 2:
+            tracks = track_ids(factory.process_measurement(measurement_group(positions, scan)))
+            self.assertEqual(len(tracks), len(positions))
+          else:
+            columns = {name: np.full(len(positions), float(scan)) for name in
+                       ('x', 'y', 'z', 'time', 'true_x', 'true_y', 'true_z')}
+            columns['x'], columns['y'], columns['z'] = positions.T
+            tracks = factory.process_columns(columns)
+            self.assertEqual(np.unique(tracks['track_id']).size, len(positions))
+      except Exception as e:
+        errors.append(e)
+    threads = [threading.Thread(target=run, args=(thread,)) for thread in range(8)]
+    # switch threads often so the groups interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+    finally:
+      sys.setswitchinterval(interval)
+    self.assertEqual(errors, [])
+    logging.debug(f"test_threadsTest pass!")
+
+  def test_out_of_sequenceTest(self):
+    for kernel in ('standard', 'axis'):
+      factory = TrackStrategyFactory('kft', kernel=kernel)
+      factory.track_id = 1
+      for time in (0, 2, 6):
+        factory.process_measurement(measurement_group([(time, 0.0, 0.0), (100.0, time, 0.0)], time))
+      # a late group is folded into the tracks it belongs to
+      tracks = track_ids(factory.process_measurement(
+        measurement_group([(4.0, 0.0, 0.0), (100.0, 4.0, 0.0)], 4)))
+      self.assertEqual(sorted(tracks), [1, 2])
+      for track in tracks.values():
+        times = [measurement_pb2.measurement.FromString(data).time
+                 for data in track.measurements]
+        self.assertEqual(times, [0, 2, 4, 6])
+      self.assertEqual([track.time for track in factory.Tracks], [6, 6])
+    logging.debug(f"test_out_of_sequenceTest pass!")
+
+  def test_candidate_pairsTest(self):
+    rng = np.random.default_rng(2)
+    z_pred = rng.uniform(0, 100, (300, 3))
+    A = rng.normal(0, 1, (300, 3, 3))
+    S = A @ A.transpose(0, 2, 1) + np.identity(3)
+    Y = np.concatenate((z_pred[:200] + rng.normal(0, 1, (200, 3)),
+                        rng.uniform(0, 100, (100, 3))))
+    # every pair inside the gate is a candidate
+    cost, gated = Association.mahalanobis_cost(z_pred, S, Y)
+    track_idx, meas_idx = Association.candidate_pairs(z_pred, S, Y)
+    self.assertLess(track_idx.size, gated.size // 10)
+    pair_cost, pair_gated = Association.pair_cost(z_pred, S, Y, track_idx, meas_idx)
+    expected = np.nonzero(gated)
+    np.testing.assert_array_equal(track_idx[pair_gated], expected[0])
+    np.testing.assert_array_equal(meas_idx[pair_gated], expected[1])
+    np.testing.assert_allclose(pair_cost[pair_gated], cost[gated])
+    logging.debug(f"test_candidate_pairsTest pass!")
+
+  def test_assignmentTest(self):
+    # Track 0 is close to both measurements, track 1 only to measurement 0,
+    # the optimal assignment gives measurement 0 to track 1
+    cost = np.array([[1.0, 2.0],
+                     [0.5, np.inf]])
+    track_idx, meas_idx = np.nonzero(np.isfinite(cost))
+    tracks, meas = Association.assign(track_idx, meas_idx,
+                                      cost[track_idx, meas_idx], 2)
+    self.assertEqual(dict(zip(tracks.tolist(), meas.tolist())), {0: 1, 1: 0})
+
+    # three clusters, one a chain through every measurement it holds
+    track_idx = np.array([0, 1, 1, 2, 3, 4, 4])
+    meas_idx = np.array([2, 2, 0, 0, 5, 3, 4])
+    self.assertEqual(Association._components(track_idx, meas_idx, 6).tolist(),
+                     [0, 0, 0, 0, 3, 4, 4])
+
+    rng = np.random.default_rng(1)
+    cost = rng.random((6, 4))
+    rows, cols = Association._hungarian(cost.T)
+    self.assertEqual(len(set(cols.tolist())), 4)
+    best = min(sum(cost[perm[j], j] for j in range(4))
+               for perm in itertools.permutations(range(6), 4))
+    self.assertAlmostEqual(cost[cols, rows].sum(), best)
+    logging.debug(f"test_assignmentTest pass!")
+
+if __name__ == '__main__':
+  unittest.main()
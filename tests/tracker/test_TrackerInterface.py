@@ -9,6 +9,7 @@ SOURCE_PATH = os.path.join(
 )
 sys.path.append(SOURCE_PATH)
 sys.path.append(os.path.join(SOURCE_PATH, 'auto_generated'))
+sys.path.append(os.path.join(SOURCE_PATH, 'Common'))
 sys.path.append(os.path.join(SOURCE_PATH, 'Tracker'))
 import trackStrategyInterface as ti
 import measurement_pb2
@@ -0,0 +1,107 @@
+import logging
+import numpy as np
+import tempfile
+import unittest
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(
+    TEST_PATH,"../../src"
+)
+sys.path.append(SOURCE_PATH)
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackConsumer'))
+sys.path.append(os.path.join(SOURCE_PATH, 'TrackPlot'))
+import TrackLoader
+import TrackStore
+
+logging.basicConfig(
+            format='%(asctime)s,%(msecs)d %(levelname)-2s ' +
+                   '[%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d:%H:%M:%S',
+            level=logging.DEBUG)
+
+# (track_id, number of measurements) of every track update in the file
+UPDATES = [(1, 2), (2, 1), (1, 3), (3, 0), (2, 2), (1, 1)]
+
+def write_text(path):
+  with open(path, "w") as myfile:
+    myfile.write(f"#trk x_pred_pos y_pred_pos z_pred_pos vel_x vel_y vel_z track_id\n")
+    myfile.write(f"#meas x y z true_x true_y true_z\n")
+    for update, (track_id, count) in enumerate(UPDATES):
+      myfile.write(f"trk {update}.5 {track_id} 0.0 1.0 2.0 3.0 {track_id}\n")
+      for j in range(count):
+        myfile.write(f"meas {update} {j} 0.25 {update} {j} 1e-3\n")
+
+def write_store(path):
+  store = TrackStore.TrackStore(path)
+  for update, (track_id, count) in enumerate(UPDATES):
+    tracks = {'track_id': np.array([track_id]), 'x_pred_pos': np.array([update + 0.5]),
+              'y_pred_pos': np.array([float(track_id)]), 'z_pred_pos': np.zeros(1),
+              'x_velocity': np.ones(1), 'y_velocity': np.full(1, 2.0),
+              'z_velocity': np.full(1, 3.0),
+              'measurements': [{'x': np.full(count, float(update)), 'y': np.arange(count, dtype=float),
+                                'z': np.full(count, 0.25), 'time': np.zeros(count),
+                                'true_x': np.full(count, float(update)),
+                                'true_y': np.arange(count, dtype=float),
+                                'true_z': np.full(count, 1e-3)}]}
+    store.write(TrackStore.records(tracks).tobytes())
+  store.close()
+
+class test_TrackLoader(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.text = os.path.join(self.tmpdir.name, "track.track")
+    self.binary = os.path.join(self.tmpdir.name, "track.bin")
+    write_text(self.text)
+    write_store(self.binary)
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def check(self, tracks, meas):
+    self.assertEqual(tracks['track_id'].tolist(), [track_id for track_id, _ in UPDATES])
+    self.assertEqual(tracks['x_pred_pos'].tolist(), [i + 0.5 for i in range(len(UPDATES))])
+    self.assertTrue((tracks['vel_z'] == 3.0).all())
+    self.assertEqual(tracks['update'].tolist(), list(range(len(UPDATES))))
+    expected = [(update, track_id) for update, (track_id, count) in enumerate(UPDATES)
+                for j in range(count)]
+    self.assertEqual(list(zip(meas['update'].tolist(), meas['track_id'].tolist())), expected)
+    self.assertEqual(meas['x'].tolist(), [float(update) for update, _ in expected])
+    self.assertTrue((meas['true_z'] == 1e-3).all())
+
+  def test_loadTextTest(self):
+    self.assertFalse(TrackLoader.is_track_store(self.text))
+    self.check(*TrackLoader.load_tracks(self.text))
+    # chunks smaller than a line still split on whole lines
+    for chunk_size in (7, 64, 100):
+      self.check(*TrackLoader.load_tracks(self.text, chunk_size))
+    logging.debug(f"load text pass!")
+
+  def test_loadStoreTest(self):
+    self.assertTrue(TrackLoader.is_track_store(self.binary))
+    self.check(*TrackLoader.load_tracks(self.binary))
+    self.check(*TrackLoader.load_tracks(self.binary, 3 * TrackStore.RECORD_DTYPE.itemsize))
+    logging.debug(f"load store pass!")
+
+  def test_streamFilterTest(self):
+    chunks = list(TrackLoader.iter_tracks(self.text, 64, track_ids=[1]))
+    self.assertGreater(len(chunks), 1)
+    tracks, meas = TrackLoader.load_tracks(self.text, 64, track_ids=[1])
+    self.assertEqual(tracks['update'].tolist(), [0, 2, 5])
+    self.assertEqual(meas['update'].tolist(), [0, 0, 2, 2, 2, 5])
+    self.assertEqual(TrackLoader.last_measurements(meas).tolist(), [1, 4, 5])
+    tracks, meas = TrackLoader.load_tracks(self.binary, track_ids=[9])
+    self.assertEqual((tracks['update'].size, meas['update'].size), (0, 0))
+    logging.debug(f"stream filter pass!")
+
+  def test_decimateTest(self):
+    self.assertEqual(TrackLoader.decimate(5, 10).tolist(), [0, 1, 2, 3, 4])
+    idx = TrackLoader.decimate(1000001, 1000)
+    self.assertLessEqual(idx.size, 1000)
+    self.assertEqual((idx[0], idx[-1]), (0, 1000000))
+    self.assertTrue((np.diff(idx) > 0).all())
+    logging.debug(f"decimate pass!")
+
+if __name__ == '__main__':
+    unittest.main()